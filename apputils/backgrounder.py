@@ -323,8 +323,14 @@ class Backgrounder(QtCore.QObject):
 
     def __call__(self, callbacks, call, *args, **kwargs):
         myfuture = None
+        owner = getattr(call, "__self__", None)
         if hasattr(call, "future_invocation"):
             myfuture, call = call.future_invocation()
+        elif getattr(call, "__name__", None) == "get" and hasattr(
+            owner, "future_invocation"
+        ):
+            # a bound client.get as most callers pass it
+            myfuture, call = owner.future_invocation()
         f1 = self.executor.submit(call, *args, **kwargs)
         f1._gen = callbacks()
         f1._status_callbacks = next(f1._gen)
@@ -388,6 +394,16 @@ class Backgrounder(QtCore.QObject):
                 value, exception = d.result(), None
             except Exception as e:
                 value, exception = None, e
+            if exception == None and isinstance(value, futures.Future):
+                # The call handed back a parked job (e.g. an rtx queued
+                # request); wait on that future with the worker thread freed.
+                value._gen = d._gen
+                value._status_callbacks = d._status_callbacks
+                value._invfuture = getattr(d, "_invfuture", None)
+                self.futures.append(value)
+                if not self.timer.isActive():
+                    self.timer.start()
+                continue
             try:
                 if self._aborted:
                     value, exception = None, BackgrounderAbort("aborted jobs")
@@ -1,2 +1,4 @@
 from .rtxclient import *  # noqa: F401
+from .rtxasync import *  # noqa: F401
+from .rtxstartup import *  # noqa: F401
 from .localfiles import *  # noqa: F401
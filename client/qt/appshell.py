@@ -1,6 +1,7 @@
 import sys
 import os.path
 import platform
+import logging
 import functools
 import collections
 from PySide6 import QtCore, QtGui, QtWidgets
@@ -14,9 +15,12 @@ from . import utils
 from . import about
 from . import plugpoint
 from . import reportdock
+from . import perfdock
 from . import reports
 from . import winlist
 
+logger = logging.getLogger(__name__)
+
 
 class ClientURLMenuItem:
     def __init__(self, item_name, client_url, auth_name, shortcut=None):
@@ -59,6 +63,9 @@ class DocumentThread(QtCore.QObject):
 class ShellWindow(QtWidgets.QMainWindow, qtviews.TabbedWorkspaceMixin):
     ID = "main-window"
 
+    # emitted from request threads on circuit breaker changes
+    connection_state = QtCore.Signal(str, str)
+
     def __init__(self, parent=None):
         super(ShellWindow, self).__init__(parent)
         self.initTabbedWorkspace()
@@ -69,7 +76,10 @@ class ShellWindow(QtWidgets.QMainWindow, qtviews.TabbedWorkspaceMixin):
         winlist.register(self, self.ID)
 
         self.report_manager = None
+        self.timings_dock = None
         self.pending_urls = []
+        self.device_token_wanted = False
+        self.plugins_initialized = False
         self.menu_actions = []
         self.submenus = {}
         self.statics = []
@@ -100,12 +110,24 @@ class ShellWindow(QtWidgets.QMainWindow, qtviews.TabbedWorkspaceMixin):
             lambda url: plugpoint.show_link_parented(self, url)
         )
         status.addPermanentWidget(self.server_connection)
+        self.offline_indicator = QtWidgets.QLabel()
+        self.offline_indicator.setStyleSheet("QLabel { color: red; }")
+        self.offline_indicator.hide()
+        status.addPermanentWidget(self.offline_indicator)
+        self.connection_state.connect(self.update_connection_state)
+        self._watching_breakers = None
+
+        # one timer restarted by each login so that refreshes do not pile up
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.ensure_refreshed)
 
         screen = QtGui.QScreen()
         screensize = screen.availableGeometry()
         self.resize(QtCore.QSize(screensize.width() * 0.7, screensize.height() * 0.7))
 
         self.geo = apputils.WindowGeometry(self)
+        self.backgrounder = apputils.Backgrounder(self)
 
     def add_schematic_menu(self, mbar, menu_name, schematic):
         applicable = []
@@ -204,6 +226,9 @@ class ShellWindow(QtWidgets.QMainWindow, qtviews.TabbedWorkspaceMixin):
             lambda: serverdlgs.server_diagnostics(self, self.session)
         )
 
+        self.action_timings = QtGui.QAction("Request &Timings", self)
+        self.action_timings.triggered.connect(self.show_request_timings)
+
         self.action_exceptions = QtGui.QAction("View &Exception Log", self)
         app = QtCore.QCoreApplication.instance()
         self.action_exceptions.triggered.connect(app.excepter.show)
@@ -212,19 +237,24 @@ class ShellWindow(QtWidgets.QMainWindow, qtviews.TabbedWorkspaceMixin):
         self.menu_help.addAction(self.action_about)
         self.menu_help.addAction(self.action_syshelp)
         self.menu_help.addAction(self.action_serverdiag)
+        self.menu_help.addAction(self.action_timings)
         self.menu_help.addAction(self.action_exceptions)
 
     def rtx_login(self):
-        if not self.session.authenticated():
+        # A saved login restored from the metadata store is authenticating in
+        # the background; the shell is drawn from the stored metadata
+        # meanwhile and the login pipeline waits for it.
+        if not self.session.authenticated() and not self.session.login_pending():
             dlg = serverdlgs.RtxLoginDialog(
-                self, self.session, settings_group="Example"
+                self, self.session, settings_group="Example", defer_device_token=True
             )
             if dlg.exec_() == QtWidgets.QDialog.DialogCode.Accepted:
-                pass
+                self.device_token_wanted = dlg.device_token_wanted
             else:
                 self.close()
                 return False
         self.post_login()
+        return True
 
     def start_doc_server(self):
         if platform.system() == "Windows":
@@ -251,17 +281,24 @@ class ShellWindow(QtWidgets.QMainWindow, qtviews.TabbedWorkspaceMixin):
         plugpoint.show_link_parented(self, QtCore.QUrl(url))
 
     def ensure_refreshed(self):
-        self.session.session_refresh()
-        self.post_login()
+        self.session.session_refresh(eager=True)
+        self.post_login(interactive=False)
 
-    def post_login(self):
+    def post_login(self, interactive=True):
+        # drawn from the capabilities at hand which may be those stored from
+        # the last session
         self.setup_menu_bar()
 
         s = self.session
         conn_info = f"<a href=\"{s.prefix('')}\">{s.server_url}</a> {s.rtx_username}"
         self.server_connection.setText(conn_info)
+        self.watch_connection_state()
 
-        plugpoint.plugin_initialize(self)
+        # once per shell; a fresh login after a refused one or a session
+        # refresh must not start the plugin timers again
+        if not self.plugins_initialized:
+            self.plugins_initialized = True
+            plugpoint.plugin_initialize(self)
 
         for url in self.pending_urls:
             self.handle_url(url)
@@ -271,8 +308,72 @@ class ShellWindow(QtWidgets.QMainWindow, qtviews.TabbedWorkspaceMixin):
         # refresh the session & reports every 45 minutes
         # - new menu based on updated permissions
         # - update report list based on permissions
-        ms = 52 * 60 * 1000
-        self.refresh_timer = QtCore.QTimer.singleShot(ms, self.ensure_refreshed)
+        self.refresh_timer.start(52 * 60 * 1000)
+
+        if interactive:
+            pipeline = self.login_pipeline()
+            self.backgrounder(self.finish_login_pipeline, pipeline.run)
+        else:
+            self.report_dock.reload_reports()
+
+    def login_pipeline(self):
+        """
+        Declare the start-up fetches which follow a login; see
+        client.LoginPipeline.  Plugins add theirs in login_stages.
+        """
+        s = self.session
+        pipeline = client.LoginPipeline()
+
+        restored = s.login_pending()
+        pipeline.add(
+            "auth",
+            s.await_login,
+            # the menus were drawn from the stored capabilities
+            apply=(lambda _: self.setup_menu_bar()) if restored else None,
+        )
+        if self.device_token_wanted:
+            self.device_token_wanted = False
+            pipeline.add("device_token", s.save_device_token, requires=["auth"])
+        pipeline.add(
+            "reports",
+            self.report_dock.fetch_reports,
+            requires=["auth"],
+            apply=self.report_dock.apply_reports,
+        )
+        plugpoint.plugin_login_stages(self, pipeline)
+        return pipeline
+
+    def finish_login_pipeline(self):
+        pipeline = yield
+        pipeline.apply()
+        logger.info("login timings\n%s", pipeline.format_timings())
+
+        auth = pipeline.stages["auth"]
+        if auth.status == "failed":
+            # the restored login was refused, the server is unavailable or
+            # its answer was not understood; ask for a fresh login
+            self.rtx_login()
+
+    def watch_connection_state(self):
+        breakers = getattr(self.session, "breakers", None)
+        if breakers == None or breakers is self._watching_breakers:
+            return
+        breakers.add_listener(self.connection_state.emit)
+        self._watching_breakers = breakers
+        self.update_connection_state(None, self.session.breaker_state())
+
+    def update_connection_state(self, host, state):
+        if state == "open":
+            self.offline_indicator.setText("Offline")
+            self.offline_indicator.setToolTip(
+                f"The server {self.session.server_url} is not responding."
+            )
+            self.offline_indicator.show()
+        elif state == "half-open":
+            self.offline_indicator.setText("Reconnecting ...")
+            self.offline_indicator.show()
+        else:
+            self.offline_indicator.hide()
 
     def setup_menu_bar(self):
         # This function is intended to be idempotent so that new permissions
@@ -303,7 +404,10 @@ class ShellWindow(QtWidgets.QMainWindow, qtviews.TabbedWorkspaceMixin):
                 self.session, self.exports_dir, self
             )
 
-            self.report_dock = reportdock.ReportsDock(self.session, self.exports_dir)
+            # the login pipeline loads the report list
+            self.report_dock = reportdock.ReportsDock(
+                self.session, self.exports_dir, load=False
+            )
             self.report_dock.main_window = self
             self.report_dock.hide()
 
@@ -313,8 +417,6 @@ class ShellWindow(QtWidgets.QMainWindow, qtviews.TabbedWorkspaceMixin):
                 settingsKey=self.report_dock.ID,
                 addto="dock",
             )
-        else:
-            self.report_dock.reload_reports()
 
         return True
 
@@ -324,6 +426,18 @@ class ShellWindow(QtWidgets.QMainWindow, qtviews.TabbedWorkspaceMixin):
     def show_reports(self):
         self.report_dock.show()
 
+    def show_request_timings(self):
+        if self.timings_dock == None:
+            self.timings_dock = perfdock.RequestTimingsDock(self.session)
+            self.timings_dock.main_window = self
+            self.addWorkspaceWindow(
+                self.timings_dock,
+                self.timings_dock.TITLE,
+                settingsKey=self.timings_dock.ID,
+                addto="dock",
+            )
+        self.timings_dock.show()
+
     def close_current(self):
         self.closeTab(self.workspace.currentIndex())
 
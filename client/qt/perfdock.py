@@ -0,0 +1,85 @@
+from PySide6 import QtCore, QtGui, QtWidgets
+import apputils
+import apputils.widgets as widgets
+import apputils.models as models
+
+
+class RequestTimingsDock(QtWidgets.QWidget):
+    """
+    Show the request timing percentiles of the session (see
+    client.rtxperf.RequestStats) by endpoint & phase.  The list refreshes
+    every few seconds while visible.
+    """
+
+    ID = "request_timings_dock"
+    TITLE = "Request Timings"
+
+    def __init__(self, session, parent=None):
+        super(RequestTimingsDock, self).__init__(parent)
+
+        # 1) Init window
+        self.setWindowTitle(self.TITLE)
+        self.setObjectName(self.ID)
+
+        # 2) Init connections
+        self.session = session
+
+        # 3) Make widgets
+        self.action_refresh = QtGui.QAction("Refresh", self)
+        self.action_refresh.setIcon(QtGui.QIcon(":/clientshell/view-refresh.png"))
+        self.action_refresh.triggered.connect(self.refresh)
+        self.action_reset = QtGui.QAction("Reset", self)
+        self.action_reset.triggered.connect(self.reset)
+
+        self.search_edit = widgets.SearchEdit()
+        self.refresh_btn = QtWidgets.QToolButton()
+        self.refresh_btn.setDefaultAction(self.action_refresh)
+        self.reset_btn = QtWidgets.QToolButton()
+        self.reset_btn.setDefaultAction(self.action_reset)
+        self.grid = widgets.TableView()
+
+        self.layout = QtWidgets.QVBoxLayout(self)
+        self.layout.setContentsMargins(0, 0, 0, 0)
+        self.editrow = QtWidgets.QHBoxLayout()
+        self.editrow.addWidget(self.search_edit)
+        self.editrow.addWidget(self.refresh_btn)
+        self.editrow.addWidget(self.reset_btn)
+        self.layout.addLayout(self.editrow)
+        self.layout.addWidget(self.grid)
+
+        self.model = None
+        self.proxy = QtCore.QSortFilterProxyModel(self)
+        self.proxy.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        self.proxy.setFilterKeyColumn(0)
+        self.search_edit.textEdited.connect(self.proxy.setFilterFixedString)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(3000)
+        self.timer.timeout.connect(self.refresh)
+
+        # 4) Launch
+        self.geo = apputils.WindowGeometry(self, grids=[self.grid])
+
+        self.refresh()
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        return super(RequestTimingsDock, self).showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        return super(RequestTimingsDock, self).hideEvent(event)
+
+    def reset(self):
+        self.session.perf.reset()
+        self.refresh()
+
+    def refresh(self):
+        table = self.session.perf.as_table()
+        if self.model == None:
+            self.model = models.ObjectQtModel(table.columns, parent=self)
+            self.proxy.setSourceModel(self.model)
+            with self.geo.grid_reset(self.grid):
+                self.grid.setModel(self.proxy)
+        self.model.set_rows(table.rows)
@@ -52,6 +52,18 @@ def plugin_initialize(parent):
         f(state, parent)
 
 
+def plugin_login_stages(parent, pipeline):
+    """
+    Let plugins add their start-up fetches to the client.LoginPipeline of the
+    shell as login_stages(state, parent, pipeline).  Stages needing the
+    server should require "auth".
+    """
+    state = QtWidgets.QApplication.instance()
+
+    for f in attr_extension_plug("login_stages"):
+        f(state, parent, pipeline)
+
+
 def url_params(url):
     values = urllib.parse.parse_qs(url.query())
     # dict(url.queryItems())
@@ -6,6 +6,7 @@ import apputils
 import apputils.widgets as widgets
 import apputils.models as models
 import apputils.viewmenus as viewmenus
+import client
 from . import utils
 from . import icons
 
@@ -43,8 +44,9 @@ class BranchedFilterProxyModel(QtCore.QSortFilterProxyModel):
 class ReportsDock(QtWidgets.QWidget):
     ID = "reports_dock"
     TITLE = "Reports"
+    URL = "api/user/logged-in/reports"
 
-    def __init__(self, session, exports_dir, parent=None):
+    def __init__(self, session, exports_dir, parent=None, load=True):
         super(ReportsDock, self).__init__(parent)
 
         # 1) Init window
@@ -55,6 +57,7 @@ class ReportsDock(QtWidgets.QWidget):
         # 2) Init connections
         self.client = session.std_client()
         self.exports_dir = exports_dir
+        self.reports_data = None
         self.backgrounder = apputils.Backgrounder(self)
 
         # 3) Make widgets
@@ -91,7 +94,10 @@ class ReportsDock(QtWidgets.QWidget):
         # 4) Launch
         self.geo = apputils.WindowGeometry(self, grids=[self.grid])
 
-        self.reload_reports()
+        if load:
+            self.reload_reports()
+        else:
+            self.show_stored_reports()
 
     def closeEvent(self, event):
         if len(self.backgrounder.futures) > 0:
@@ -100,44 +106,35 @@ class ReportsDock(QtWidgets.QWidget):
         return super(ReportsDock, self).closeEvent(event)
 
     def reload_reports(self):
-        url = "api/user/logged-in/reports"
-        self.backgrounder(self.load_reports_model, self.client.get, url)
+        self.show_stored_reports()
+        self.backgrounder(self.load_reports_model, self.fetch_reports)
 
-    def load_reports_model(self):
-        self.setEnabled(False)
-        try:
-            content = yield
-            self.reports_data = content.main_table()
+    def show_stored_reports(self):
+        stored = self.client.session.cached_metadata("reports")
+        if stored != None and self.reports_data == None:
+            # show the list of the last session while it is revalidated
+            self.show_reports(stored)
 
-            self.model = models.ObjectQtModel(
-                descendant_attr="model_children",
-                columns=[models.field("description", "Report")],
-            )
+    def fetch_reports(self):
+        # None if the stored list is current
+        return self.client.session.revalidate_metadata("reports", self.URL)
 
-            for x in self.reports_data.rows:
-                x.model_children = []
+    def apply_reports(self, content):
+        if content != None:
+            self.show_reports(content)
 
-            self.role_headers = []
-            rolekey = lambda x: (
-                x.role_sort,
-                x.role,
-                x.description if x.description != None else "",
-            )
-            self.reports_data.rows.sort(key=rolekey)
-            rolekey = lambda x: (x.role_sort, x.role)
-            for k, g in itertools.groupby(self.reports_data.rows, key=rolekey):
-                self.role_headers.append(RoleReportHeader(k[1], list(g)))
-            self.model.set_rows(self.role_headers)
-            self.model2.setSourceModel(self.model)
-
-            with self.geo.grid_reset(self.grid):
-                self.grid.setModel(self.model2)
-                self.grid.expandAll()
-
-            self.ctxmenu.update_model()
+    def load_reports_model(self):
+        # a list on display stays usable while it is refreshed
+        self.setEnabled(self.reports_data != None)
+        try:
+            content = yield
+            self.apply_reports(content)
         except httpx.NetworkError:
             # avoid a message on a refresh that fails
             pass
+        except client.RtxUnauthorized:
+            # a restored login was refused; the shell prompts for a login
+            pass
         except:
             utils.exception_message(
                 self.window(), f"There was an error loading the {self.TITLE}."
@@ -145,6 +142,36 @@ class ReportsDock(QtWidgets.QWidget):
         finally:
             self.setEnabled(True)
 
+    def show_reports(self, content):
+        self.reports_data = content.main_table()
+
+        self.model = models.ObjectQtModel(
+            descendant_attr="model_children",
+            columns=[models.field("description", "Report")],
+        )
+
+        for x in self.reports_data.rows:
+            x.model_children = []
+
+        self.role_headers = []
+        rolekey = lambda x: (
+            x.role_sort,
+            x.role,
+            x.description if x.description != None else "",
+        )
+        self.reports_data.rows.sort(key=rolekey)
+        rolekey = lambda x: (x.role_sort, x.role)
+        for k, g in itertools.groupby(self.reports_data.rows, key=rolekey):
+            self.role_headers.append(RoleReportHeader(k[1], list(g)))
+        self.model.set_rows(self.role_headers)
+        self.model2.setSourceModel(self.model)
+
+        with self.geo.grid_reset(self.grid):
+            self.grid.setModel(self.model2)
+            self.grid.expandAll()
+
+        self.ctxmenu.update_model()
+
     def refilter(self, newText):
         self.model2.setFilterFixedString(newText)
 
@@ -198,6 +198,8 @@ class ReportPreview(QtWidgets.QWidget):
         # 2) Init connections
         self.report = report
         self.client = session.std_client()
+        # report results may be large; decode them as they download
+        self.report_client = session.stream_client()
         self.backgrounder = apputils.Backgrounder(self)
         self.exports_dir = exports_dir
 
@@ -500,9 +502,8 @@ class ReportPreview(QtWidgets.QWidget):
                 apputils.information(self.window(), m.format(v[0].label, str(e)))
                 return
         self.run, tail, params = self.report.prepare_url(values)
-        # TODO: cancel should work on self.client.get, but it does not.
         self.backgrounder.named["main-report"](
-            self.run_wrapper, self.client, tail, **params
+            self.run_wrapper, self.report_client, tail, **params
         )
 
     def run_wrapper(self):
@@ -567,7 +568,9 @@ class ReportPreview(QtWidgets.QWidget):
         self.header_strings = self.run.content.keys["headers"]
         self.expansions = self.run.content.keys.get("expansions", [])
         mixin = None if len(self.expansions) == 0 else TreeRowMixin
-        self.report_data = self.run.content.main_table(mixin=mixin)
+        # A flat report is read-only & may be very large; build its rows as
+        # the grid shows them so that the first screen is shown at once.
+        self.report_data = self.run.content.main_table(mixin=mixin, lazy=mixin == None)
         self.stack = [self.report_data]
         column_stack = self.run.content.main_columns()
         for t, _ in self.expansions:
@@ -103,7 +103,14 @@ class RtxLoginDialog(QtWidgets.QDialog):
     ID = "rtx-login-dialog"
     TITLE = "Yenot Sign-on"
 
-    def __init__(self, parent, session, settings_group=None, allow_offline=False):
+    def __init__(
+        self,
+        parent,
+        session,
+        settings_group=None,
+        allow_offline=False,
+        defer_device_token=False,
+    ):
         super(RtxLoginDialog, self).__init__(parent)
 
         self.setObjectName(self.ID)
@@ -113,6 +120,10 @@ class RtxLoginDialog(QtWidgets.QDialog):
 
         self.settings_group = settings_group
         self.allow_offline = allow_offline
+        # With defer_device_token the device token is not saved here; the
+        # caller does so (e.g. in its login pipeline) if device_token_wanted.
+        self.defer_device_token = defer_device_token
+        self.device_token_wanted = False
         app = QtCore.QCoreApplication.instance()
         self.setWindowTitle(app.applicationName())
 
@@ -204,7 +215,9 @@ class RtxLoginDialog(QtWidgets.QDialog):
 
         if not self.session.pending_2fa:
             devtoken = self.rtx_save_device_token.isChecked()
-            if devtoken:
+            if devtoken and self.defer_device_token:
+                self.device_token_wanted = True
+            elif devtoken:
                 self.session.save_device_token()
 
             self.rtx_user = username.upper()
@@ -30,7 +30,6 @@ class ChangeListener:
 
     def chained_listen(self):
         kwargs = {"key": self.chain_key, "index": self.chain_index}
-        # TODO: cancel should work on self.client.get, but it does not.
         self.backgrounder.named[self.chain_key](
             self.chained_reload, self.client, self.url, **kwargs
         )
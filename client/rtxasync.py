@@ -0,0 +1,268 @@
+import asyncio
+import json
+import httpx
+from .rtxclient import (
+    SessionStateMixin,
+    StdPayload,
+    raw_payload,
+    RtxError,
+    RtxServerError,
+    RtxUnauthorized,
+    exception_string,
+    raise_exception_ex,
+    read_login_config,
+    response_result,
+)
+from .rtxqueue import queued_job_delay
+
+
+class AsyncRtxSession(SessionStateMixin, httpx.AsyncClient):
+    """
+    This is the asyncio sibling of RtxSession.  It shares the authorization
+    state handling and offers the same clients, but every request is a
+    coroutine so that many requests may be in flight on one event loop.
+
+    Typical use in a script is to authenticate a blocking session with
+    auto_session and then fan out with :meth:`from_session`::
+
+        async with AsyncRtxSession.from_session(session) as asession:
+            client = asession.std_client()
+            payloads = await asyncio.gather(
+                *[client.get("api/persona/{}", pid) for pid in ids]
+            )
+    """
+
+    def __init__(self, server_url=None):
+        # see RtxSession for the time-out rationale
+        timeout = httpx.Timeout(5.0, read=120.0)
+        super(AsyncRtxSession, self).__init__(timeout=timeout)
+        self._init_state(server_url)
+        self._refresh_lock = asyncio.Lock()
+        # the blocking session this one was made from (see from_session)
+        self._owner = None
+
+    @classmethod
+    def from_session(cls, session):
+        """
+        Construct an asyncio session sharing the server and the (cookie based)
+        authentication of an existing session.
+
+        The refresh token stays with the existing session:  it refreshes the
+        access token (on its timer or inline) and this session adopts the
+        rotated cookies rather than refreshing them out from under it.
+        """
+        self = cls(session.server_url)
+        self._owner = session
+        self.pending_2fa = session.pending_2fa
+        self.capabilities = session.capabilities
+        self.settings_map = dict(session.settings_map)
+        self._adopt_auth()
+        return self
+
+    def _adopt_auth(self):
+        owner = self._owner
+        with owner._refresh_lock:
+            self.cookies = httpx.Cookies(owner.cookies)
+            self.access_token = owner.access_token
+            self.access_token_expiration = owner.access_token_expiration
+            if owner.authenticated():
+                self.rtx_userid = owner.rtx_userid
+                self.rtx_username = owner.rtx_username
+
+    def _owner_refresh(self):
+        self._owner.session_refresh()
+        self._adopt_auth()
+
+    async def ensure_static_settings(self, settings_names):
+        not_yet_here = set(settings_names).difference(set(self.settings_map.keys()))
+        if len(not_yet_here) == 0:
+            # already there, all done
+            return
+
+        client = self.std_client()
+        params = {f"s{i}": v for i, v in enumerate(not_yet_here)}
+        content = await client.get("api/static_settings", **params)
+
+        for k, table in content.all_tables():
+            self.settings_map[k] = table
+
+    async def authenticate(self, username, password=None, device_token=None):
+        p = {"username": username}
+        if password is not None:
+            p["password"] = password
+        if device_token is not None:
+            p["device_token"] = device_token
+        try:
+            r = await self.post(self.prefix("api/session"), data=p)
+        except httpx.ConnectError:
+            raise RtxServerError(f"The login server {self.server_url} was unavailable.")
+        except httpx.TimeoutException:
+            raise RtxServerError(
+                f"The login server {self.server_url} was slow responding."
+            )
+        if r.status_code == 403:
+            raise RtxUnauthorized(
+                "Invalid user name or password.  Check your caps lock."
+            )
+        elif r.status_code >= 300:
+            raise RtxServerError(
+                f"Login response failed from server {self.server_url}.\n\n{exception_string(r, 'POST')}"
+            )
+
+        self.cache_auth_payload(r, is_2fa_context=True)
+        return True
+
+    async def session_refresh(self):
+        if self._owner != None:
+            owner = self._owner
+            if (
+                owner.access_token_expiration != self.access_token_expiration
+                or self.expired()
+            ):
+                # the owner's lock & refresh are blocking; keep them off the loop
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self._owner_refresh)
+            return
+
+        if not self.refresh_due():
+            return
+
+        async with self._refresh_lock:
+            # another task may have refreshed while we waited for the lock
+            if not self.refresh_due():
+                return
+
+            r = await self.get(self.prefix("api/session/refresh"))
+            if r.status_code in (401, 403):
+                # see RtxSession.session_refresh
+                await aread_yenotpass(self)
+            elif r.status_code != 200:
+                raise raise_exception_ex(r, "GET")
+            else:
+                self.cache_auth_payload(r)
+
+    async def logout(self):
+        if self.access_token:
+            r = await self.put(self.prefix("api/session/logout"))
+            if r.status_code != 200:
+                raise raise_exception_ex(r, "PUT")
+
+            # manually clear this
+            self.access_token = None
+            self.access_token_expiration = None
+
+    async def aclose(self):
+        # A session made by from_session shares its server session with the
+        # blocking session; logging out is left to the owner of that one.
+        if self._owner == None:
+            await self.logout()
+
+        await super(AsyncRtxSession, self).aclose()
+
+    def raw_client(self):
+        return AsyncRtxClient(self, raw_payload)
+
+    def std_client(self):
+        return AsyncRtxClient(self, StdPayload)
+
+    def json_client(self):
+        return AsyncRtxClient(self, json.loads)
+
+
+class AsyncRtxClient:
+    """
+    This class is the asyncio counterpart of RtxClient.  The rtx 202/303
+    queued job handling, error mapping and result factories are the same, but
+    the methods are coroutines and waiting on a queued job yields to the event
+    loop rather than sleeping a thread.
+
+    :param session:  an AsyncRtxSession
+    :param result_factory:  callable applied to the response text
+    """
+
+    def __init__(self, session, result_factory):
+        self.session = session
+        self.result_factory = result_factory
+
+    async def _finish(self, r, method):
+        s = self.session
+        # This is special rtx queued long job handling logic
+        while r.status_code in [202, 303]:  # accepted, redirect
+            queued = r.headers["Location"]
+            sleeptime = queued_job_delay(r)
+            if sleeptime > 0:
+                await asyncio.sleep(sleeptime)
+            r = await s.get(queued, follow_redirects=True)
+        if r.status_code != 200:
+            raise raise_exception_ex(r, method)
+        return response_result(self.result_factory, r)
+
+    async def get(self, tail, *args, **kwargs):
+        tail = tail.format(*args)
+        s = self.session
+        headers = {}
+        accept = s.accept_header()
+        if hasattr(self.result_factory, "from_payload") and accept != None:
+            headers["Accept"] = accept
+        if "cancel_token" in kwargs:
+            headers["X-Yenot-CancelToken"] = kwargs["cancel_token"]
+            del kwargs["cancel_token"]
+        await s.session_refresh()
+        r = await s.get(
+            s.prefix(tail), params=kwargs, headers=headers, follow_redirects=True
+        )
+        return await self._finish(r, "GET")
+
+    async def post(self, tail, *args, **kwargs):
+        tail = tail.format(*args)
+        files = kwargs.pop("files", None)
+        data = kwargs.pop("data", None)
+        s = self.session
+        await s.session_refresh()
+        r = await s.post(
+            s.prefix(tail), params=kwargs, data=data, files=files, follow_redirects=True
+        )
+        return await self._finish(r, "POST")
+
+    async def put(self, tail, *args, **kwargs):
+        tail = tail.format(*args)
+        files = kwargs.pop("files", None)
+        data = kwargs.pop("data", None)
+        s = self.session
+        await s.session_refresh()
+        r = await s.put(
+            s.prefix(tail), params=kwargs, data=data, files=files, follow_redirects=True
+        )
+        return await self._finish(r, "PUT")
+
+    async def delete(self, tail, *args, **kwargs):
+        # delete does not accept a body per many sources (including httpx)
+
+        tail = tail.format(*args)
+        s = self.session
+        await s.session_refresh()
+        r = await s.delete(s.prefix(tail), params=kwargs, follow_redirects=True)
+        return await self._finish(r, "DELETE")
+
+
+async def aread_yenotpass(session):
+    login = read_login_config()
+
+    if login is not None:
+        session.set_base_url(login.get("server_url"))
+
+        if "username" in login and "device_token" in login:
+            await session.authenticate(
+                login["username"], device_token=login["device_token"]
+            )
+
+
+async def auto_async_session(arg_url=None):
+    session = AsyncRtxSession(arg_url)
+    if not arg_url:
+        # see auto_session
+        try:
+            await aread_yenotpass(session)
+        except RtxError:
+            pass
+    return session
@@ -0,0 +1,107 @@
+import time
+import random
+import concurrent.futures as futures
+import httpx
+
+
+class RequestSpec:
+    """
+    One request of a bulk run; the arguments are those of the RtxClient
+    method named by method.  A get is safe to repeat; another method is
+    only when marked with idempotent=True (which is also passed on to the
+    RtxClient method).
+    """
+
+    SAFE_METHODS = ("get", "head", "options")
+
+    def __init__(self, method, tail, *args, **kwargs):
+        self.method = method.lower()
+        self.tail = tail
+        self.args = args
+        self.kwargs = kwargs
+
+    @property
+    def idempotent(self):
+        return self.method in self.SAFE_METHODS or self.kwargs.get("idempotent", False)
+
+    @classmethod
+    def coerce(cls, spec):
+        if isinstance(spec, cls):
+            return spec
+        # tuple form ("get", "api/persona/{}", persona_id, {"bit_type": "urls"})
+        method, tail, *args = spec
+        kwargs = args.pop() if len(args) > 0 and isinstance(args[-1], dict) else {}
+        return cls(method, tail, *args, **kwargs)
+
+    def __repr__(self):
+        return f"RequestSpec({self.method.upper()} {self.tail.format(*self.args)})"
+
+
+class BulkResult:
+    def __init__(self, spec):
+        self.spec = spec
+        self.value = None
+        self.error = None
+        self.attempts = 0
+
+    @property
+    def ok(self):
+        return self.error == None
+
+
+def bulk_execute(
+    client,
+    specs,
+    parallelism=8,
+    retries=2,
+    retry_on=(httpx.TransportError,),
+    backoff=0.5,
+    progress=None,
+):
+    """
+    Run the request specs with at most parallelism requests in flight and
+    return a list of BulkResult in the order of specs.  A failure is recorded
+    in its BulkResult and does not stop the batch.  Failures of idempotent
+    specs matching retry_on are retried up to retries times with jittered
+    exponential backoff.  A write which is not marked idempotent is never
+    sent twice (the server may have acted on it before the failure).  The
+    failures which the session's transport retries itself (see
+    rtxretry.RetryPolicy) are not retried again here.
+
+    The progress callback is called as progress(done, total) from the
+    calling thread.
+    """
+    specs = [RequestSpec.coerce(s) for s in specs]
+    results = [BulkResult(s) for s in specs]
+    policy = getattr(client.session, "retry_policy", None)
+    transport_retried = policy.exceptions if policy != None else ()
+
+    def run_one(result):
+        spec = result.spec
+        func = getattr(client, spec.method)
+        while True:
+            result.attempts += 1
+            try:
+                result.value = func(spec.tail, *spec.args, **spec.kwargs)
+                return
+            except retry_on as e:
+                if (
+                    not spec.idempotent
+                    or isinstance(e, transport_retried)
+                    or result.attempts > retries
+                ):
+                    result.error = e
+                    return
+                delay = backoff * 2 ** (result.attempts - 1)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+            except Exception as e:
+                result.error = e
+                return
+
+    total = len(results)
+    with futures.ThreadPoolExecutor(max(1, parallelism)) as executor:
+        pending = [executor.submit(run_one, r) for r in results]
+        for done, _ in enumerate(futures.as_completed(pending), 1):
+            if progress != None:
+                progress(done, total)
+    return results
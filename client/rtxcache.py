@@ -0,0 +1,263 @@
+import re
+import time
+import threading
+import collections
+import concurrent.futures as futures
+
+
+def request_key(tail, params):
+    return (tail, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+
+class CacheEntry:
+    def __init__(self, tail, response, ttl, result):
+        self.tail = tail
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        # the parsed result stands in for the body which is not kept; its
+        # size is taken to be that of the body
+        self.result = result
+        self.size = len(response.content)
+        self.ttl = ttl
+        self.stored = time.monotonic()
+
+    def fresh(self):
+        return time.monotonic() - self.stored < self.ttl
+
+    def validators(self):
+        headers = {}
+        if self.etag != None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified != None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    This is a bounded LRU cache of parsed GET responses for RtxSession.  An
+    entry younger than its time-to-live is answered with-out contacting the
+    server.  An older entry is revalidated with If-None-Match/If-Modified-
+    Since and a 304 reply reuses the parsed result (e.g. StdPayload) of the
+    entry.
+
+    The time-to-live comes from the first matching rule in ttl_rules, a list
+    of (regex, seconds) pairs matched against the url tail (e.g.
+    "api/static_settings").  A rule with seconds of None excludes the
+    matching endpoints from caching.  Unmatched endpoints use default_ttl; the
+    default of 0 means "always revalidate".
+
+    Only the parsed result is kept (the key includes the result factory).
+    The cache holds at most max_entries entries and max_bytes of response
+    bodies; a response body larger than max_entry_bytes is not cached.
+
+    Parsed results are shared by every caller which hits the entry so they
+    must be treated as read-only.  StdPayload constructs a new ClientTable on
+    each named_table call which makes this natural for std clients.
+    """
+
+    def __init__(
+        self,
+        max_entries=256,
+        ttl_rules=None,
+        default_ttl=0.0,
+        max_bytes=32 * 2**20,
+        max_entry_bytes=4 * 2**20,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl_rules = [(re.compile(p), ttl) for p, ttl in (ttl_rules or [])]
+        self.default_ttl = default_ttl
+
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def ttl_for(self, tail):
+        for regex, ttl in self.ttl_rules:
+            if regex.search(tail):
+                return ttl
+        return self.default_ttl
+
+    @staticmethod
+    def key(tail, params):
+        return request_key(tail, params)
+
+    def lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry != None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key, tail, response, ttl, result):
+        """
+        Keep result (parsed from response) for key and return the entry or
+        None if the response is not to be cached.
+        """
+        if "no-store" in response.headers.get("Cache-Control", ""):
+            return None
+        entry = CacheEntry(tail, response, ttl, result)
+        if entry.etag == None and entry.last_modified == None and ttl <= 0:
+            # nothing to revalidate with and never fresh
+            return None
+        if entry.size > self.max_entry_bytes:
+            return None
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old != None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+        return entry
+
+    def record(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        # Hits include revalidated responses (304); misses are responses
+        # which downloaded a body.
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+            }
+
+
+def chained_future(source):
+    """
+    Return a new future which resolves with source.  Cancelling the returned
+    future leaves source running.
+    """
+    chained = futures.Future()
+
+    def relay(f):
+        if not chained.set_running_or_notify_cancel():
+            return
+        if f.cancelled():
+            chained.set_exception(futures.CancelledError())
+        elif f.exception() != None:
+            chained.set_exception(f.exception())
+        else:
+            chained.set_result(f.result())
+
+    source.add_done_callback(relay)
+    return chained
+
+
+class FutureShares:
+    """
+    The future of a deferred result shared by holders callers.  Each caller
+    takes its own chained future with share and source is cancelled only
+    when every one of them has been cancelled so that one caller giving up
+    does not cancel the others.
+    """
+
+    def __init__(self, source, holders):
+        self.source = source
+        self.holders = holders
+        self._lock = threading.Lock()
+        self._released = 0
+
+    def share(self):
+        chained = chained_future(self.source)
+        chained.shares = self
+        chained.add_done_callback(self._done)
+        return chained
+
+    def _done(self, chained):
+        if not chained.cancelled():
+            return
+        with self._lock:
+            self._released += 1
+            last = self._released == self.holders
+        if last:
+            self.source.cancel()
+
+
+class _Flight:
+    def __init__(self):
+        self.future = futures.Future()
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls so that one thread (the leader) does
+    the work and the others wait for and share its result.  The key is
+    discarded once the leader finishes so later calls start afresh.
+
+    Results which are themselves futures (see RtxClient defer_queued) are
+    handed out as a chained future per caller (see FutureShares) so that
+    each caller may attach its own callbacks & cancel with-out affecting the
+    others.  A waiting caller which receives one of the retry_on exceptions
+    from the leader calls func itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, func, retry_on=()):
+        with self._lock:
+            flight = self._calls.get(key)
+            leader = flight == None
+            if leader:
+                flight = _Flight()
+                self._calls[key] = flight
+                self.leaders += 1
+            else:
+                flight.followers += 1
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                result = flight.future.result()
+            except retry_on:
+                return func()
+            if isinstance(result, FutureShares):
+                result = result.share()
+            return result
+
+        try:
+            result = func()
+        except BaseException as e:
+            with self._lock:
+                del self._calls[key]
+            flight.future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._calls[key]
+            # no caller joins once the key is gone
+            holders = flight.followers + 1
+        if isinstance(result, futures.Future) and holders > 1:
+            shares = FutureShares(result, holders)
+            flight.future.set_result(shares)
+            return shares.share()
+        flight.future.set_result(result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced}
@@ -0,0 +1,324 @@
+import queue
+import socket
+import threading
+import contextlib
+import httpx
+import httpcore
+
+_current = threading.local()
+
+
+class CancelScope:
+    """
+    The requests made by a thread while it is inside this scope (with
+    scope: ...) can be aborted from any other thread by cancel.  The
+    sockets they are blocked on are shut down so that httpx returns at once
+    with an error and futures adopted by the scope (e.g. queued jobs being
+    waited on) are cancelled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._streams = set()
+        self._futures = set()
+        self.cancelled = False
+
+    def __enter__(self):
+        # the scope may be entered by several threads (see _Exchange)
+        if not hasattr(_current, "outer"):
+            _current.outer = []
+        _current.outer.append(getattr(_current, "scope", None))
+        _current.scope = self
+        return self
+
+    def __exit__(self, *args):
+        _current.scope = _current.outer.pop()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            streams, self._streams = self._streams, set()
+            pending, self._futures = self._futures, set()
+        for stream in streams:
+            stream.abort()
+        for f in pending:
+            f.cancel()
+
+    def attach(self, stream):
+        with self._lock:
+            if self.cancelled:
+                return False
+            self._streams.add(stream)
+            return True
+
+    def detach(self, stream):
+        with self._lock:
+            self._streams.discard(stream)
+
+    def adopt(self, future):
+        with self._lock:
+            if not self.cancelled:
+                self._futures.add(future)
+                future.add_done_callback(self._forget)
+                return
+        future.cancel()
+
+    def _forget(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+
+def current_scope():
+    return getattr(_current, "scope", None)
+
+
+def cancelled():
+    """
+    Return True if the current thread is in a cancelled scope.
+    """
+    scope = current_scope()
+    return scope != None and scope.cancelled
+
+
+class CancellableStream(httpcore.NetworkStream):
+    """
+    A network stream which registers with the current thread's cancel
+    scope while it does I/O.  Abort shuts down the socket from another
+    thread which wakes the blocked read or write.
+
+    An HTTP/2 connection carries the streams of other requests so it is not
+    registered; CancellableTransport runs such a request in a thread of its
+    own which the requesting thread stops waiting for.
+    """
+
+    def __init__(self, stream, sock=None):
+        self.stream = stream
+        self.sock = sock if sock != None else stream.get_extra_info("socket")
+
+    def multiplexed(self):
+        ssl_object = self.stream.get_extra_info("ssl_object")
+        return ssl_object != None and ssl_object.selected_alpn_protocol() == "h2"
+
+    def _io(self, func, *args):
+        scope = current_scope()
+        if scope == None or self.multiplexed():
+            return func(*args)
+        if not scope.attach(self):
+            raise httpcore.ReadError("request cancelled")
+        try:
+            return func(*args)
+        finally:
+            scope.detach(self)
+
+    def read(self, max_bytes, timeout=None):
+        return self._io(self.stream.read, max_bytes, timeout)
+
+    def write(self, buffer, timeout=None):
+        return self._io(self.stream.write, buffer, timeout)
+
+    def close(self):
+        self.stream.close()
+
+    def abort(self):
+        if self.sock == None:
+            return
+        try:
+            # bypass ssl.SSLSocket.shutdown which would unwrap the TLS layer
+            # under the reading thread
+            socket.socket.shutdown(self.sock, socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def start_tls(self, ssl_context, server_hostname=None, timeout=None):
+        stream = self.stream.start_tls(ssl_context, server_hostname, timeout)
+        return CancellableStream(stream)
+
+    def get_extra_info(self, info):
+        return self.stream.get_extra_info(info)
+
+
+class CancellableBackend(httpcore.NetworkBackend):
+    """
+    Wrap an httpcore network backend so that its streams can be aborted by
+    a CancelScope.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def connect_tcp(self, *args, **kwargs):
+        return CancellableStream(self.backend.connect_tcp(*args, **kwargs))
+
+    def connect_unix_socket(self, *args, **kwargs):
+        return CancellableStream(self.backend.connect_unix_socket(*args, **kwargs))
+
+    def sleep(self, seconds):
+        self.backend.sleep(seconds)
+
+
+def _transport_error(exc):
+    # httpcore & httpx name their transport exceptions alike
+    for cls in type(exc).__mro__:
+        mapped = getattr(httpx, cls.__name__, None)
+        if isinstance(mapped, type) and issubclass(mapped, httpx.TransportError):
+            return mapped(str(exc))
+    return None
+
+
+@contextlib.contextmanager
+def _httpx_errors():
+    try:
+        yield
+    except Exception as e:
+        mapped = _transport_error(e)
+        if mapped == None:
+            raise
+        raise mapped from e
+
+
+class _ResponseStream(httpx.SyncByteStream):
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __iter__(self):
+        with _httpx_errors():
+            for part in self.stream:
+                yield part
+
+    def close(self):
+        if hasattr(self.stream, "close"):
+            self.stream.close()
+
+
+class _Exchange:
+    """
+    A request run in a thread of its own (in the scope of the requesting
+    thread) which hands the response & the parts of its body to the
+    requesting thread.  The requesting thread polls for them and raises
+    ReadError as soon as the scope is cancelled.  An HTTP/2 stream cannot be
+    aborted with-out the connection of the other requests; it is left to
+    finish in the background and its response is dropped.
+    """
+
+    POLL = 0.1
+
+    def __init__(self, pool, request, scope):
+        self.scope = scope
+        self.queue = queue.Queue(maxsize=16)
+        self.closed = False
+        thread = threading.Thread(
+            target=self._run, args=(pool, request), name="rtx-exchange", daemon=True
+        )
+        thread.start()
+
+    def _put(self, error, item):
+        # False once the requesting thread has stopped reading
+        while not self.closed:
+            try:
+                self.queue.put((error, item), timeout=self.POLL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self, pool, request):
+        with self.scope:
+            try:
+                response = pool.handle_request(request)
+            except Exception as e:
+                self._put(e, None)
+                return
+            try:
+                if self._put(None, response):
+                    for part in response.stream:
+                        if not self._put(None, part):
+                            break
+                    else:
+                        # the end of the body
+                        self._put(None, None)
+            except Exception as e:
+                self._put(e, None)
+            finally:
+                response.close()
+
+    def _get(self):
+        while True:
+            try:
+                error, item = self.queue.get(timeout=self.POLL)
+            except queue.Empty:
+                if self.scope.cancelled:
+                    self.close()
+                    raise httpcore.ReadError("request cancelled")
+                continue
+            if error != None:
+                self.close()
+                raise error
+            return item
+
+    def response(self):
+        return self._get()
+
+    def __iter__(self):
+        while True:
+            part = self._get()
+            if part == None:
+                return
+            yield part
+
+    def close(self):
+        self.closed = True
+
+
+class CancellableTransport(httpx.BaseTransport):
+    """
+    An httpx transport on an httpcore connection pool whose connections
+    are made by a CancellableBackend.  This does what httpx.HTTPTransport
+    does for a direct connection.
+
+    With http2 a request in a cancel scope may share an HTTP/2 connection
+    (negotiated for https) and is run by an _Exchange.
+    """
+
+    def __init__(self, http2=False, limits=None, verify=True):
+        self.http2 = http2
+        limits = limits if limits != None else httpx.Limits()
+        self.pool = httpcore.ConnectionPool(
+            ssl_context=httpx.create_ssl_context(verify=verify),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=CancellableBackend(httpcore.SyncBackend()),
+        )
+
+    def handle_request(self, request):
+        req = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        scope = current_scope()
+        with _httpx_errors():
+            if self.http2 and scope != None and request.url.scheme == "https":
+                stream = _Exchange(self.pool, req, scope)
+                resp = stream.response()
+            else:
+                resp = self.pool.handle_request(req)
+                stream = resp.stream
+        return httpx.Response(
+            status_code=resp.status,
+            headers=resp.headers,
+            stream=_ResponseStream(stream),
+            extensions=resp.extensions,
+        )
+
+    def close(self):
+        self.pool.close()
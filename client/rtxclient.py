@@ -5,12 +5,29 @@ import json
 import uuid
 import datetime
 import socket
+import threading
 import urllib.parse
+import importlib.util
+import concurrent.futures as futures
 import jose.jwt
 import httpx
 import tzlocal
 import rtlib
 from . import identity
+from .rtxqueue import queued_job_scheduler
+from .rtxcache import ResponseCache, SingleFlight, request_key
+from .rtxmeta import MetadataStore
+from .rtxbulk import RequestSpec, BulkResult, bulk_execute
+from .rtxperf import RequestStats
+from .rtxstream import PositionalRows, decode_payload
+from .rtxretry import (
+    RetryPolicy,
+    CircuitBreakers,
+    RetryTransport,
+    CircuitOpenError,
+    host_key,
+)
+from .rtxcancel import CancelScope, current_scope, cancelled, CancellableTransport
 
 
 class RtxError(Exception):
@@ -60,17 +77,18 @@ class STATIC:
         raise RuntimeError("check server")
 
 
-class RtxSession(httpx.Client):
-    def __init__(self, server_url=None):
-        # httpx default time-out of 5 seconds is not sufficient for long
-        # polling or longish reports.
-        timeout = httpx.Timeout(5.0, read=120.0)
-        super(RtxSession, self).__init__(timeout=timeout)
+class SessionStateMixin:
+    """
+    This mixin holds the connection and authorization state shared by the
+    blocking and asyncio sessions.  Nothing here does network I/O.
+    """
+
+    def _init_state(self, server_url):
+        self.headers["X-Yenot-Timezone"] = str(tzlocal.get_localzone())
         if server_url:
             self.set_base_url(server_url)
         else:
             self.server_url = None
-        self.headers["X-Yenot-Timezone"] = str(tzlocal.get_localzone())
 
         self.pending_2fa = False
         self.capabilities = None
@@ -79,6 +97,84 @@ class RtxSession(httpx.Client):
         self._recent_reports = []
 
         self.settings_map = {}
+        self.response_cache = None
+        self.metadata_enabled = False
+        self.metadata = None
+        # the background authentication of a login restored from the
+        # metadata store (see restore_yenotpass)
+        self.pending_login = None
+        # compact encodings of rtlib tables to request; empty for plain JSON
+        self.wire_formats = rtlib.server.wire_formats()
+
+    def accept_header(self):
+        """
+        Return the Accept header for a request whose result factory takes a
+        decoded payload (see decode_result) or None to leave the default.
+        JSON remains acceptable so that a server with-out the compact
+        encodings answers as before.
+        """
+        if len(self.wire_formats) == 0:
+            return None
+        return ", ".join(self.wire_formats + ["application/json;q=0.5"])
+
+    def enable_response_cache(
+        self,
+        max_entries=256,
+        ttl_rules=None,
+        default_ttl=0.0,
+        max_bytes=32 * 2**20,
+        max_entry_bytes=4 * 2**20,
+    ):
+        """
+        Opt in to the conditional GET cache; see ResponseCache for the
+        meaning of the arguments.
+        """
+        self.response_cache = ResponseCache(
+            max_entries, ttl_rules, default_ttl, max_bytes, max_entry_bytes
+        )
+        return self.response_cache
+
+    def enable_metadata_store(self):
+        """
+        Opt in to keeping the login-time metadata on disk; see MetadataStore.
+        """
+        self.metadata_enabled = True
+        if getattr(self, "rtx_username", None):
+            self._open_metadata(self.rtx_username)
+
+    def _open_metadata(self, username):
+        if not self.metadata_enabled or not self.server_url:
+            return None
+        login = (self.server_url, username)
+        if self.metadata == None or self.metadata.login != login:
+            self.metadata = MetadataStore.for_login(*login)
+        return self.metadata
+
+    def restore_metadata(self, username):
+        """
+        Take the user & capabilities of the last login of username from the
+        metadata store.  Return False if there is nothing stored.  The
+        session is not authenticated by this.
+        """
+        store = self._open_metadata(username)
+        login = store.body("login") if store != None else None
+        if login == None:
+            return False
+        payload = StdPayload(login)
+        self.rtx_userid = payload.keys["userid"]
+        self.rtx_username = payload.keys["username"]
+        self.capabilities = payload.named_table("capabilities")
+        return True
+
+    def cached_metadata(self, name):
+        """
+        Return the StdPayload stored as name in the metadata store or None.
+        """
+        body = self.metadata.body(name) if self.metadata != None else None
+        return StdPayload(body) if body != None else None
+
+    def login_pending(self):
+        return self.pending_login != None
 
     def connected(self):
         return self.server_url is not None
@@ -90,22 +186,6 @@ class RtxSession(httpx.Client):
         self.server_url = server_url
         if self.server_url and not self.server_url.endswith("/"):
             self.server_url += "/"
-        # TODO figure out retries in httpx
-        # self.mount(self.server_url, requests.adapters.HTTPAdapter(max_retries=3))
-
-    def save_device_token(self):
-        client = self.std_client()
-        device = f"{socket.gethostname()} (Desktop client)"
-        content = client.post(
-            "api/user/me/device-token/new", device_name=device, expdays=int(365.25 * 6)
-        )
-        saved_token = content.main_table().rows[0].token
-
-        update_auth_config(
-            server_url=self.server_url,
-            username=self.rtx_username,
-            device_token=saved_token,
-        )
 
     def prefix(self, tail):
         return self.server_url + tail
@@ -127,19 +207,6 @@ class RtxSession(httpx.Client):
             r._as_tuple()[0] if not withkey else r._as_tuple()[:2] for r in table.rows
         ]
 
-    def ensure_static_settings(self, settings_names):
-        not_yet_here = set(settings_names).difference(set(self.settings_map.keys()))
-        if len(not_yet_here) == 0:
-            # already there, all done
-            return
-
-        client = self.std_client()
-        params = {f"s{i}": v for i, v in enumerate(not_yet_here)}
-        content = client.get("api/static_settings", **params)
-
-        for k, table in content.all_tables():
-            self.settings_map[k] = table
-
     def authorized(self, activity):
         if not self.capabilities:
             return False
@@ -149,6 +216,26 @@ class RtxSession(httpx.Client):
                 return True
         return False
 
+    # refresh the access token this many seconds before it expires
+    REFRESH_LEAD = 10 * 60
+    # treat the token as expired this many seconds early to allow for the
+    # request in flight & clock skew
+    EXPIRY_MARGIN = 30
+
+    def refresh_due(self):
+        if not self.access_token_expiration:
+            return False
+        return time.time() + self.REFRESH_LEAD >= self.access_token_expiration
+
+    def expired(self):
+        if not self.access_token_expiration:
+            return False
+        return time.time() + self.EXPIRY_MARGIN >= self.access_token_expiration
+
+    def _schedule_refresh(self):
+        # sessions with a background refresh override this
+        pass
+
     def cache_auth_payload(self, r, is_2fa_context=False):
         assert r.status_code == 200, "this function assumes a successful response"
 
@@ -163,11 +250,191 @@ class RtxSession(httpx.Client):
             self.pending_2fa = True
         else:
             payload = StdPayload(payload)
+            if self.response_cache != None and payload.keys["userid"] != getattr(
+                self, "rtx_userid", None
+            ):
+                # cached content may be specific to the prior user
+                self.response_cache.clear()
             self.rtx_userid = payload.keys["userid"]
             self.rtx_username = payload.keys["username"]
             self.access_token = True
             self.access_token_expiration = payload.keys["access_expiration"]
             self.capabilities = payload.named_table("capabilities")
+            self.pending_login = None
+            self._schedule_refresh()
+
+            store = self._open_metadata(self.rtx_username)
+            if store != None:
+                keep = ["userid", "username", "capabilities"]
+                store.put("login", {k: payload.keys[k] for k in keep})
+
+
+def http2_available():
+    # httpx speaks HTTP/2 only with the optional h2 package
+    return importlib.util.find_spec("h2") != None
+
+
+class RtxSession(SessionStateMixin, httpx.Client):
+    """
+    The http session with an rtx server.
+
+    :param server_url:  base url of the rtx server
+    :param http2:  multiplex requests over HTTP/2 connections when the h2
+        package is installed (otherwise HTTP/1.1 is used)
+    :param limits:  httpx.Limits for the connection pool
+    :param prewarm:  open a connection to the server in the background as
+        soon as the server url is known (see prewarm)
+    """
+
+    DEFAULT_LIMITS = httpx.Limits(
+        max_connections=50, max_keepalive_connections=10, keepalive_expiry=30.0
+    )
+
+    def __init__(self, server_url=None, http2=False, limits=None, prewarm=False):
+        # httpx default time-out of 5 seconds is not sufficient for long
+        # polling or longish reports.
+        timeout = httpx.Timeout(5.0, read=120.0)
+        # Transient connection failures and gateway errors are retried for
+        # safe requests; a host which keeps failing has its circuit breaker
+        # opened so that requests fail at once rather than each timing out.
+        self.retry_policy = RetryPolicy()
+        self.breakers = CircuitBreakers()
+        self.http2 = http2 and http2_available()
+        # RequestFuture.cancel aborts the connection of the request
+        inner = CancellableTransport(
+            http2=self.http2,
+            limits=limits if limits != None else self.DEFAULT_LIMITS,
+        )
+        transport = RetryTransport(inner, self.retry_policy, self.breakers)
+        super(RtxSession, self).__init__(timeout=timeout, transport=transport)
+        self.prewarm_connection = prewarm
+        self._prewarmed = None
+        self._init_state(server_url)
+        self.queued_jobs = queued_job_scheduler()
+        # concurrent identical GETs share one round trip
+        self.single_flight = SingleFlight()
+        # timing histograms of RtxClient calls by endpoint
+        self.perf = RequestStats()
+        # The access token is refreshed from a timer thread before it is due
+        # to expire; the lock keeps a single refresh in flight.
+        self._refresh_lock = threading.RLock()
+        self._refresh_timer = None
+
+    def set_base_url(self, server_url):
+        super(RtxSession, self).set_base_url(server_url)
+        if self.prewarm_connection:
+            self.prewarm()
+
+    def prewarm(self):
+        """
+        Connect to the server (TCP & TLS handshake) from a background thread
+        so that the connection is waiting in the pool for the first real
+        request.  Errors are ignored; the request which follows reports
+        them.
+        """
+        if not self.server_url or self._prewarmed == self.server_url:
+            return
+        self._prewarmed = url = self.server_url
+
+        def warm():
+            try:
+                self.head(url, extensions={"retry": False})
+            except Exception:
+                pass
+
+        threading.Thread(target=warm, name="rtx-prewarm", daemon=True).start()
+
+    def breaker_state(self):
+        """
+        Return the circuit breaker state ("closed", "open" or "half-open")
+        of the server; anything but closed means the server is unreachable
+        or being retried.
+        """
+        if not self.server_url:
+            return "closed"
+        return self.breakers.state(host_key(self.server_url))
+
+    def save_device_token(self):
+        client = self.std_client()
+        device = f"{socket.gethostname()} (Desktop client)"
+        content = client.post(
+            "api/user/me/device-token/new", device_name=device, expdays=int(365.25 * 6)
+        )
+        saved_token = content.main_table().rows[0].token
+
+        update_auth_config(
+            server_url=self.server_url,
+            username=self.rtx_username,
+            device_token=saved_token,
+        )
+
+    def ensure_static_settings(self, settings_names):
+        not_yet_here = set(settings_names).difference(set(self.settings_map.keys()))
+        if len(not_yet_here) == 0:
+            # already there, all done
+            return
+
+        not_yet_here = sorted(not_yet_here)
+        params = {f"s{i}": v for i, v in enumerate(not_yet_here)}
+        name = "static_settings:" + ",".join(not_yet_here)
+        content = self.cached_metadata(name)
+        if content != None:
+            # use the tables of the last session now & refresh them shortly
+            self._background(self._revalidate_settings, name, params)
+        else:
+            content = self.revalidate_metadata(name, "api/static_settings", **params)
+
+        for k, table in content.all_tables():
+            self.settings_map[k] = table
+
+    def _revalidate_settings(self, name, params):
+        try:
+            content = self.revalidate_metadata(name, "api/static_settings", **params)
+        except Exception:
+            # keep the stored tables; the next start tries again
+            return
+        if content != None:
+            for k, table in content.all_tables():
+                self.settings_map[k] = table
+
+    def _background(self, func, *args):
+        threading.Thread(
+            target=func, args=args, name="rtx-metadata", daemon=True
+        ).start()
+
+    def revalidate_metadata(self, name, tail, **params):
+        """
+        GET tail conditionally on the entry name of the metadata store.
+        Return the new StdPayload (which is stored) or None if the stored
+        entry is current.  With-out a metadata store this is a plain GET
+        which always returns the payload.
+        """
+        store = self.metadata
+        if store == None:
+            return self.std_client().get(tail, **params)
+
+        headers = store.validators(name)
+        # stored bodies are JSON whatever the negotiated wire formats
+        headers["Accept"] = "application/json"
+        timing = self.perf.start("GET", tail)
+        try:
+            self.session_refresh()
+            r = self.get(
+                self.prefix(tail),
+                params=params,
+                headers=headers,
+                extensions=timing.extensions,
+                follow_redirects=True,
+            )
+        finally:
+            timing.finish()
+        if r.status_code == 304 and store.body(name) != None:
+            return None
+        if r.status_code != 200:
+            raise raise_exception_ex(r, "GET")
+        body = json.loads(r.text)
+        store.put(name, body, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+        return StdPayload(body)
 
     def authenticate_pin1(self, username, pin):
         p = {"username": username, "pin": pin}
@@ -239,12 +506,26 @@ class RtxSession(httpx.Client):
         self.cache_auth_payload(r, is_2fa_context=True)
         return True
 
-    def session_refresh(self):
-        if not self.access_token_expiration:
-            return
+    def session_refresh(self, eager=False):
+        """
+        Refresh the access token inline if it has expired (or with eager if
+        it is merely due).  Normally the background timer has refreshed it
+        ahead of time and this returns at once.  A restored login which is
+        still authenticating is waited for.
+        """
+        self.await_login()
+        due = self.refresh_due() if eager else self.expired()
+        if due:
+            self._refresh(eager)
+
+    def _refresh(self, eager=True):
+        with self._refresh_lock:
+            # another thread may have refreshed while we waited for the lock
+            due = self.refresh_due() if eager else self.expired()
+            if not due:
+                return
 
-        # All the action is in the cookie exchange
-        if time.time() + 10 * 60 >= self.access_token_expiration:
+            # All the action is in the cookie exchange
             r = self.get(self.prefix("api/session/refresh"))
             if r.status_code in (401, 403):
                 # If the refresh token cannot be refreshed try simply starting
@@ -258,7 +539,72 @@ class RtxSession(httpx.Client):
             else:
                 self.cache_auth_payload(r)
 
+    def login_in_background(self, username, device_token):
+        """
+        Authenticate from a background thread; requests made meanwhile wait
+        for it in session_refresh.
+        """
+        pending = futures.Future()
+        pending.set_running_or_notify_cancel()
+        self.pending_login = pending
+
+        def login():
+            try:
+                self.authenticate(username, device_token=device_token)
+            except BaseException as e:
+                pending.set_exception(e)
+            else:
+                pending.set_result(True)
+
+        threading.Thread(target=login, name="rtx-login", daemon=True).start()
+        return pending
+
+    def await_login(self):
+        """
+        Wait for a background authentication (see login_in_background) and
+        raise its error if it failed.  The error is raised to the callers
+        waiting at the time only; later requests go on unauthenticated.
+        """
+        pending = self.pending_login
+        if pending == None:
+            return
+        try:
+            pending.result()
+        except BaseException:
+            if self.pending_login is pending:
+                self.pending_login = None
+            raise
+
+    def _schedule_refresh(self, delay=None):
+        with self._refresh_lock:
+            self._cancel_refresh()
+            if not self.access_token_expiration:
+                return
+            if delay == None:
+                lead = self.access_token_expiration - self.REFRESH_LEAD
+                delay = max(lead - time.time(), 0.0)
+            self._refresh_timer = threading.Timer(delay, self._background_refresh)
+            self._refresh_timer.daemon = True
+            self._refresh_timer.name = "rtx-session-refresh"
+            self._refresh_timer.start()
+
+    def _cancel_refresh(self):
+        with self._refresh_lock:
+            if self._refresh_timer != None:
+                self._refresh_timer.cancel()
+                self._refresh_timer = None
+
+    def _background_refresh(self):
+        try:
+            self._refresh()
+        except Exception:
+            # Try again shortly; a request made after the token expires
+            # refreshes inline and reports the failure.
+            if self.access_token and not self.expired():
+                self._schedule_refresh(delay=60.0)
+
     def logout(self):
+        self._cancel_refresh()
         if self.access_token:
             r = self.put(self.prefix("api/session/logout"))
             if r.status_code != 200:
@@ -325,7 +671,7 @@ class RtxSession(httpx.Client):
             pass
 
     def raw_client(self):
-        return RtxClient(self, lambda x: x)
+        return RtxClient(self, raw_payload)
 
     def std_client(self):
         return RtxClient(self, StdPayload)
@@ -333,30 +679,66 @@ class RtxSession(httpx.Client):
     def json_client(self):
         return RtxClient(self, json.loads)
 
+    def stream_client(self):
+        return RtxClient(self, StreamedStdPayload)
+
 
 class RequestFuture:
+    """
+    A cancellable client.get invocation (see RtxClient.future_invocation).
+    Cancelling aborts the request in flight (shutting down its connection)
+    or drops its queued job so that the worker thread returns at once with
+    RtxRequestCancellation.  The server is also told to stop the request.
+    """
+
     def __init__(self, session):
         self.session = session
         self.cancel_token = str(uuid.uuid1())
         self.cancelled = False
         self.running = False
+        self.parked = None
+        self.scope = CancelScope()
 
     def cancel(self):
         self.cancelled = True
-        if self.running and self.cancel_token != None:
+        running, token = self.running, self.cancel_token
+        self.scope.cancel()
+        parked = self.parked
+        if parked != None:
+            parked.cancel()
+            shares = getattr(parked, "shares", None)
+            if shares != None and not shares.source.cancelled():
+                # the queued job is shared with other callers (SingleFlight)
+                token = None
+        if running and token != None:
             self.session.put(
                 self.session.prefix("api/request/cancel"),
-                params={"token": self.cancel_token},
+                params={"token": token},
             )
 
+    def _finished(self, *args):
+        self.running = False
+        self.cancel_token = None
+        self.parked = None
+
     def get(self, client, tail, *args, **kwargs):
         kwargs["cancel_token"] = self.cancel_token
+        kwargs["defer_queued"] = True
+        result = None
+        if self.cancelled:
+            raise RtxRequestCancellation("The request was cancelled.")
         try:
             self.running = True
-            result = client.get(tail, *args, **kwargs)
+            with self.scope:
+                result = client.get(tail, *args, **kwargs)
         finally:
-            self.running = False
-            self.cancel_token = None
+            if isinstance(result, futures.Future):
+                # The server queued the job; it stays cancellable until the
+                # scheduler resolves it.
+                self.parked = result
+                result.add_done_callback(self._finished)
+            else:
+                self._finished()
         return result
 
 
@@ -380,6 +762,16 @@ class RtxClient:
     with-out further parsing.  Note that you should expect requests to
     potentially take a long time.
 
+    GET requests are retried after transient failures (see
+    rtxretry.RetryPolicy); pass ``idempotent=True`` to post, put or delete to
+    allow the same for a request which is safe to repeat.
+
+    A request which the server queues (202/303) is parked with the shared
+    QueuedJobScheduler.  Normally the call waits for the scheduler to resolve
+    it; with ``defer_queued=True`` the call returns the scheduler's
+    concurrent.futures.Future instead so that the calling thread is released
+    (see Backgrounder.check_futures).
+
     TODO:  error callback not yet written ... message boxes for the moment
 
     :param session:  the as-yet-amorphous connection manager
@@ -397,103 +789,282 @@ class RtxClient:
         invoke = lambda *args, **kwargs: future.get(self, *args, **kwargs)
         return future, invoke
 
+    def _streaming(self):
+        return hasattr(self.result_factory, "from_stream")
+
+    def _headers(self, headers=None):
+        headers = {} if headers == None else headers
+        if hasattr(self.result_factory, "from_payload"):
+            accept = self.session.accept_header()
+            if accept != None:
+                headers["Accept"] = accept
+        return headers
+
+    def _result(self, r, method, timing):
+        if self._streaming():
+            # the response may be open with the body unread
+            try:
+                if r.status_code != 200:
+                    r.read()
+                    raise raise_exception_ex(r, method)
+                if not is_wire_format(r):
+                    with timing.phase("decode"):
+                        result = self.result_factory.from_stream(r.iter_bytes())
+                    return timed_payload(result, timing)
+                r.read()
+            finally:
+                r.close()
+
+        # a queued job's final response arrives unread
+        r.read()
+        if r.status_code != 200:
+            raise raise_exception_ex(r, method)
+        with timing.phase("decode"):
+            result = response_result(self.result_factory, r)
+        return timed_payload(result, timing)
+
+    def _finish(self, r, method, timing, defer_queued=False):
+        if r.status_code not in [202, 303]:
+            return self._result(r, method, timing)
+        r.close()
+
+        # This is special rtx queued long job handling logic
+        queued_at = time.perf_counter()
+
+        def finish(r2):
+            timing.record("queued", time.perf_counter() - queued_at)
+            return self._result(r2, method, timing)
+
+        scheduler = self.session.queued_jobs
+        parked = scheduler.park(self.session, r, finish)
+        if defer_queued:
+            return parked
+        scope = current_scope()
+        if scope != None:
+            scope.adopt(parked)
+        try:
+            return parked.result()
+        except futures.CancelledError:
+            raise RtxRequestCancellation("The request was cancelled.")
+
+    def _timed(self, timing, call):
+        # The timing is complete when the call returns or, for a deferred
+        # queued job, when its future resolves.
+        try:
+            result = call()
+        except httpx.TransportError as e:
+            if cancelled():
+                raise RtxRequestCancellation("The request was cancelled.") from e
+            timing.finish()
+            raise
+        except BaseException:
+            timing.finish()
+            raise
+        if isinstance(result, futures.Future):
+            result.add_done_callback(lambda f: timing.finish())
+        else:
+            timing.finish()
+        return result
+
     def get(self, tail, *args, **kwargs):
-        tail = tail.format(*args)
-        s = self.session
-        headers = {}
+        template, tail = tail, tail.format(*args)
+        headers = self._headers()
         if "cancel_token" in kwargs:
             headers["X-Yenot-CancelToken"] = kwargs["cancel_token"]
             del kwargs["cancel_token"]
+        defer_queued = kwargs.pop("defer_queued", False)
+
+        def fetch():
+            timing = self.session.perf.start("GET", template)
+            call = lambda: self._get(tail, kwargs, headers, timing, defer_queued)
+            return self._timed(timing, call)
+
+        flight = self.session.single_flight
+        if flight == None:
+            return fetch()
+
+        # a blocking call must not join a deferred one and get its future
+        key = (request_key(tail, kwargs), self.result_factory, defer_queued)
+        # A request we joined may have been cancelled by its owner; ours was
+        # not so it is re-issued.
+        return flight.do(key, fetch, retry_on=(RtxRequestCancellation,))
+
+    def _get(self, tail, params, headers, timing, defer_queued):
+        s = self.session
+        cache = s.response_cache
+        ttl = None
+        if cache != None and not self._streaming():
+            ttl = cache.ttl_for(tail)
+        entry = None
+        if ttl != None:
+            # the entry body depends on the negotiated format
+            key = (cache.key(tail, params), headers.get("Accept"), self.result_factory)
+            entry = cache.lookup(key)
+            if entry != None and entry.fresh():
+                cache.record("hits")
+                return entry.result
+            if entry != None:
+                headers.update(entry.validators())
+
         s.session_refresh()
-        r = s.get(s.prefix(tail), params=kwargs, headers=headers, follow_redirects=True)
-        # This is special rtx queued long job handling logic
-        while r.status_code in [202, 303]:  # accepted, redirect
-            queued = r.headers["Location"]
-            if "Expected-Duration" in r.headers:
-                sleeptime = float(r.headers["Expected-Duration"])
-                if sleeptime > 2.0:
-                    sleeptime /= 1.5
-                time.sleep(sleeptime)
-            r = s.get(queued, follow_redirects=True)
-        if r.status_code != 200:
-            raise raise_exception_ex(r, "GET")
-        return self.result_factory(r.text)
+        if self._streaming():
+            request = s.build_request(
+                "GET",
+                s.prefix(tail),
+                params=params,
+                headers=headers,
+                extensions=timing.extensions,
+            )
+            r = s.send(request, stream=True, follow_redirects=True)
+        else:
+            r = s.get(
+                s.prefix(tail),
+                params=params,
+                headers=headers,
+                extensions=timing.extensions,
+                follow_redirects=True,
+            )
+
+        if ttl != None:
+            if r.status_code == 304 and entry != None:
+                entry.stored = time.monotonic()
+                cache.record("hits")
+                cache.record("revalidated")
+                return entry.result
+            if r.status_code == 200:
+                cache.record("misses")
+                result = self._result(r, "GET", timing)
+                cache.store(key, tail, r, ttl, result)
+                return result
+        return self._finish(r, "GET", timing, defer_queued)
 
     def post(self, tail, *args, **kwargs):
-        tail = tail.format(*args)
-        if "files" in kwargs:
-            files = kwargs.pop("files")
-        else:
-            files = None
-        if "data" in kwargs:
-            data = kwargs.pop("data")
-        else:
-            data = None
+        template, tail = tail, tail.format(*args)
+        files = kwargs.pop("files", None)
+        data = kwargs.pop("data", None)
+        idempotent = kwargs.pop("idempotent", False)
         s = self.session
-        s.session_refresh()
-        r = s.post(
-            s.prefix(tail), params=kwargs, data=data, files=files, follow_redirects=True
-        )
-        # This is special rtx queued long job handling logic
-        while r.status_code in [202, 303]:  # accepted, redirect
-            queued = r.headers["Location"]
-            if "Expected-Duration" in r.headers:
-                sleeptime = float(r.headers["Expected-Duration"])
-                if sleeptime > 2.0:
-                    sleeptime /= 1.5
-                time.sleep(sleeptime)
-            r = s.get(queued, follow_redirects=True)
-        if r.status_code != 200:
-            raise raise_exception_ex(r, "POST")
-        return self.result_factory(r.text)
+        timing = s.perf.start("POST", template)
+
+        def call():
+            s.session_refresh()
+            r = s.post(
+                s.prefix(tail),
+                params=kwargs,
+                data=data,
+                files=files,
+                headers=self._headers(),
+                extensions={"idempotent": idempotent, **timing.extensions},
+                follow_redirects=True,
+            )
+            return self._finish(r, "POST", timing)
+
+        return self._timed(timing, call)
 
     def put(self, tail, *args, **kwargs):
-        tail = tail.format(*args)
-        if "files" in kwargs:
-            files = kwargs.pop("files")
-        else:
-            files = None
-        if "data" in kwargs:
-            data = kwargs.pop("data")
-        else:
-            data = None
+        template, tail = tail, tail.format(*args)
+        files = kwargs.pop("files", None)
+        data = kwargs.pop("data", None)
+        idempotent = kwargs.pop("idempotent", False)
         s = self.session
-        s.session_refresh()
-        r = s.put(
-            s.prefix(tail), params=kwargs, data=data, files=files, follow_redirects=True
-        )
-        # This is special rtx queued long job handling logic
-        while r.status_code in [202, 303]:  # accepted, redirect
-            queued = r.headers["Location"]
-            if "Expected-Duration" in r.headers:
-                sleeptime = float(r.headers["Expected-Duration"])
-                if sleeptime > 2.0:
-                    sleeptime /= 1.5
-                time.sleep(sleeptime)
-            r = s.get(queued, follow_redirects=True)
-        if r.status_code != 200:
-            raise raise_exception_ex(r, "PUT")
-        return self.result_factory(r.text)
+        timing = s.perf.start("PUT", template)
+
+        def call():
+            s.session_refresh()
+            r = s.put(
+                s.prefix(tail),
+                params=kwargs,
+                data=data,
+                files=files,
+                headers=self._headers(),
+                extensions={"idempotent": idempotent, **timing.extensions},
+                follow_redirects=True,
+            )
+            return self._finish(r, "PUT", timing)
+
+        return self._timed(timing, call)
 
     def delete(self, tail, *args, **kwargs):
         # delete does not accept a body per many sources (including httpx)
 
-        tail = tail.format(*args)
+        template, tail = tail, tail.format(*args)
+        idempotent = kwargs.pop("idempotent", False)
         s = self.session
-        s.session_refresh()
-        r = s.delete(s.prefix(tail), params=kwargs, follow_redirects=True)
-        # This is special rtx queued long job handling logic
-        while r.status_code in [202, 303]:  # accepted, redirect
-            queued = r.headers["Location"]
-            if "Expected-Duration" in r.headers:
-                sleeptime = float(r.headers["Expected-Duration"])
-                if sleeptime > 2.0:
-                    sleeptime /= 1.5
-                time.sleep(sleeptime)
-            r = s.get(queued, follow_redirects=True)
-        if r.status_code != 200:
-            raise raise_exception_ex(r, "DELETE")
-        return self.result_factory(r.text)
+        timing = s.perf.start("DELETE", template)
+
+        def call():
+            s.session_refresh()
+            r = s.delete(
+                s.prefix(tail),
+                params=kwargs,
+                headers=self._headers(),
+                extensions={"idempotent": idempotent, **timing.extensions},
+                follow_redirects=True,
+            )
+            return self._finish(r, "DELETE", timing)
+
+        return self._timed(timing, call)
+
+    def map(self, specs, parallelism=8, retries=2, progress=None, **kwargs):
+        """
+        Run many requests concurrently and return their BulkResult list in
+        order; see rtxbulk.bulk_execute.  Each spec is a RequestSpec or a
+        tuple ``(method, tail, *args[, kwargs_dict])``::
+
+            results = client.map(
+                [("delete", "api/persona/{}", p.id) for p in personas]
+            )
+        """
+        return bulk_execute(
+            self,
+            specs,
+            parallelism=parallelism,
+            retries=retries,
+            progress=progress,
+            **kwargs,
+        )
+
+
+def is_wire_format(response):
+    ctype = response.headers.get("Content-Type", "")
+    return ctype.split(";")[0].strip().lower() in rtlib.server.wire_formats()
+
+
+def decode_result(result_factory, content_type, content, encoding="utf-8"):
+    """
+    Apply the result factory to a response body.  A body in one of the
+    compact rtlib wire formats is decoded here and passed to the factory's
+    from_payload; other bodies are passed as text.
+    """
+    if hasattr(result_factory, "from_payload"):
+        payload = rtlib.server.deserialize_wire(
+            content, content_type, rows=PositionalRows
+        )
+        if payload != None:
+            return result_factory.from_payload(payload)
+    return result_factory(content.decode(encoding or "utf-8"))
+
+
+def response_result(result_factory, response):
+    if not hasattr(result_factory, "from_payload") or not is_wire_format(response):
+        return result_factory(response.text)
+    return decode_result(
+        result_factory,
+        response.headers.get("Content-Type"),
+        response.content,
+        response.encoding,
+    )
+
+
+def timed_payload(result, timing):
+    # let StdPayload.named_table record the table phase of the endpoint
+    if isinstance(result, StdPayload):
+        result._timing = timing
+    return result
+
+
+def raw_payload(text):
+    return text
 
 
 class StdPayload:
@@ -504,6 +1075,10 @@ class StdPayload:
         else:
             self._pay = rawpay
 
+    @classmethod
+    def from_payload(cls, payload):
+        return cls(payload)
+
     @property
     def keys(self):
         return self._pay
@@ -518,15 +1093,37 @@ class StdPayload:
             if self._pay[tname] != None and len(self._pay[tname]) == 2:
                 yield tname, self.named_table(tname)
 
-    def named_table(self, name, mixin=None, cls_members=None):
+    def named_table(
+        self,
+        name,
+        mixin=None,
+        cls_members=None,
+        columnar=False,
+        lazy=False,
+        track_changes=False,
+    ):
         t = self._pay[name]
-        return rtlib.ClientTable(
-            t["columns"], t["data"], mixin=mixin, cls_members=cls_members
+        start = time.perf_counter()
+        table = rtlib.ClientTable(
+            t["columns"],
+            t["data"],
+            mixin=mixin,
+            cls_members=cls_members,
+            positional=isinstance(t["data"], PositionalRows),
+            columnar=columnar,
+            lazy=lazy,
+            track_changes=track_changes,
         )
+        timing = getattr(self, "_timing", None)
+        if timing != None:
+            timing.record("table", time.perf_counter() - start)
+        return table
 
-    def main_table(self, mixin=None, cls_members=None):
+    def main_table(self, mixin=None, cls_members=None, columnar=False, lazy=False):
         mn = self._pay["__main_table__"]
-        return self.named_table(mn, mixin, cls_members=cls_members)
+        return self.named_table(
+            mn, mixin, cls_members=cls_members, columnar=columnar, lazy=lazy
+        )
 
     def named_columns(self, name):
         return self._pay[name]["columns"]
@@ -536,20 +1133,59 @@ class StdPayload:
         return self.named_columns(mn)
 
 
-def read_yenotpass(session):
+class StreamedStdPayload(StdPayload):
+    """
+    This result factory decodes the response body incrementally as it
+    arrives rather than from the complete text.  Table rows are kept as
+    tuples (see rtxstream.decode_payload) which bounds peak memory on very
+    large reports.  Responses for this factory are not kept in the response
+    cache.
+    """
+
+    @classmethod
+    def from_stream(cls, chunks):
+        return cls(decode_payload(chunks))
+
+
+def read_login_config():
     ypfile = os.path.join(identity.get_appdata_dir(), "config")
 
     config = configparser.ConfigParser()
     config.read(ypfile)
 
     if "login" in config.sections():
-        login = config["login"]
-        session.server_url = login.get("server_url")
+        return config["login"]
+    return None
+
+
+def read_yenotpass(session):
+    login = read_login_config()
+
+    if login is not None:
+        session.set_base_url(login.get("server_url"))
 
         if "username" in login and "device_token" in login:
             session.authenticate(login["username"], device_token=login["device_token"])
 
 
+def restore_yenotpass(session):
+    """
+    Restore the saved login from the metadata store of the last session and
+    start authenticating it in the background.  Return False (and do
+    nothing) if the saved login or its metadata is missing.
+    """
+    login = read_login_config()
+    if login is None or "username" not in login or "device_token" not in login:
+        return False
+
+    session.set_base_url(login.get("server_url"))
+    session.enable_metadata_store()
+    if not session.restore_metadata(login["username"]):
+        return False
+    session.login_in_background(login["username"], login["device_token"])
+    return True
+
+
 def update_auth_config(**kwargs):
     ypfile = os.path.join(identity.get_appdata_dir(), "config")
     if not os.path.exists(os.path.dirname(ypfile)):
@@ -568,9 +1204,21 @@ def update_auth_config(**kwargs):
     config.write(open(ypfile, "w"))
 
 
-def auto_session(arg_url=None):
-    session = RtxSession(arg_url)
+def auto_session(arg_url=None, metadata_store=False, **kwargs):
+    """
+    Return an RtxSession for the url or else the saved login (which is used
+    to authenticate).  Keyword arguments are passed to RtxSession.
+
+    With metadata_store the login-time metadata is kept on disk and a saved
+    login seen before is returned at once with its stored capabilities
+    while it authenticates in the background (see restore_yenotpass).
+    """
+    session = RtxSession(arg_url, **kwargs)
+    if metadata_store:
+        session.enable_metadata_store()
     if not arg_url:
+        if metadata_store and restore_yenotpass(session):
+            return session
         # only auto-read if no url is specified, that's a little crude but gets
         # the point for now.
         try:
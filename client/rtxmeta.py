@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from . import identity
+
+
+class MetadataStore:
+    """
+    An on-disk store of the login-time metadata of one server & user (the
+    capabilities of the login, the report list and static settings tables)
+    so that the shell can be drawn at start-up before the server answers.
+    Each entry holds the decoded JSON body with the validators (ETag &
+    Last-Modified) of the response for revalidating it with a conditional
+    GET.
+
+    The file is rewritten whole (via a temporary file) on each change.  A
+    file written with a different VERSION is ignored and replaced.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, login=None):
+        self.path = path
+        self.login = login
+        self._lock = threading.Lock()
+        self._entries = self._read()
+
+    @classmethod
+    def for_login(cls, server_url, username):
+        key = f"{server_url}|{username}".encode("utf8")
+        name = hashlib.sha1(key).hexdigest()[:20] + ".json"
+        path = os.path.join(identity.get_appdata_dir(), "metadata", name)
+        return cls(path, login=(server_url, username))
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf8") as f:
+                doc = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(doc, dict) or doc.get("version") != self.VERSION:
+            return {}
+        return doc.get("entries", {})
+
+    def _write(self):
+        # called with the lock held
+        doc = {"version": self.VERSION, "entries": self._entries}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp, "w", encoding="utf8") as f:
+            json.dump(doc, f)
+        os.replace(temp, self.path)
+
+    def body(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+            return entry["body"] if entry != None else None
+
+    def validators(self, name):
+        headers = {}
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry == None:
+            return headers
+        if entry.get("etag") != None:
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified") != None:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, name, body, etag=None, last_modified=None):
+        with self._lock:
+            self._entries[name] = {
+                "body": body,
+                "etag": etag,
+                "last_modified": last_modified,
+                "stored": time.time(),
+            }
+            try:
+                self._write()
+            except OSError:
+                # the store is an optimization; keep going in memory
+                pass
+
+    def discard(self, name):
+        with self._lock:
+            if self._entries.pop(name, None) != None:
+                try:
+                    self._write()
+                except OSError:
+                    pass
+
+    def names(self):
+        with self._lock:
+            return list(self._entries.keys())
@@ -0,0 +1,160 @@
+import time
+import threading
+import contextlib
+import collections
+import rtlib
+
+# The phases of a request in the order they are reported.
+#   connect   TCP connect & TLS handshake (absent on a reused connection)
+#   ttfb      request headers sent to response headers received
+#   download  reading the response body
+#   decode    applying the result factory (e.g. json.loads to StdPayload)
+#   table     constructing a ClientTable from the payload (named_table)
+#   queued    waiting for a queued (202/303) job to finish
+#   total     the client call from start to finish
+PHASES = ["connect", "ttfb", "download", "decode", "table", "queued", "total"]
+
+
+class RollingHistogram:
+    """
+    The most recent samples (seconds) of one phase of one endpoint.
+    Percentiles are computed over this window on demand.
+    """
+
+    def __init__(self, size=500):
+        self.samples = collections.deque(maxlen=size)
+        self.count = 0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def percentiles(self, *quantiles):
+        ordered = sorted(self.samples)
+        if len(ordered) == 0:
+            return [None for _ in quantiles]
+        last = len(ordered) - 1
+        return [ordered[min(last, int(q * len(ordered)))] for q in quantiles]
+
+
+class RequestTiming:
+    """
+    The timing of one client call.  The trace method is an httpx "trace"
+    request extension which marks the transport events; finish turns those
+    marks into the connect, ttfb and download phases.
+    """
+
+    def __init__(self, stats, key):
+        self.stats = stats
+        self.key = key
+        self.started = time.perf_counter()
+        self.spans = collections.defaultdict(float)
+        self._open = {}
+
+    def trace(self, event_name, info):
+        # Events are named e.g. "connection.connect_tcp.started" or
+        # "http11.receive_response_body.complete" (http2 for HTTP/2).
+        name, _, stage = event_name.rpartition(".")
+        name = name.split(".", 1)[-1]
+        now = time.perf_counter()
+        if stage == "started":
+            self._open[name] = now
+            if name == "send_request_headers":
+                self._open["ttfb"] = now
+        elif stage in ("complete", "failed") and name in self._open:
+            self.spans[name] += now - self._open.pop(name)
+            if name == "receive_response_headers" and "ttfb" in self._open:
+                self.spans["ttfb"] += now - self._open.pop("ttfb")
+
+    @property
+    def extensions(self):
+        return {"trace": self.trace}
+
+    def record(self, phase, seconds):
+        self.stats.record(self.key, phase, seconds)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def finish(self):
+        connect = self.spans.get("connect_tcp", 0.0) + self.spans.get("start_tls", 0.0)
+        if connect > 0:
+            self.record("connect", connect)
+        if "ttfb" in self.spans:
+            self.record("ttfb", self.spans["ttfb"])
+        if "receive_response_body" in self.spans:
+            self.record("download", self.spans["receive_response_body"])
+        self.record("total", time.perf_counter() - self.started)
+
+
+class RequestStats:
+    """
+    Rolling timing histograms of the requests of a session keyed by
+    endpoint.  The key is the method and url template (e.g. "GET
+    api/persona/{}") so that all requests of one endpoint are pooled.
+    """
+
+    def __init__(self, window=500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def start(self, method, template):
+        return RequestTiming(self, f"{method} {template}")
+
+    def record(self, key, phase, seconds):
+        with self._lock:
+            hist = self._histograms.get((key, phase))
+            if hist == None:
+                hist = RollingHistogram(self.window)
+                self._histograms[(key, phase)] = hist
+            hist.add(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def summary(self):
+        """
+        Return a list of (endpoint, phase, count, p50, p95, p99, maximum)
+        tuples in milliseconds.
+        """
+        ms = lambda x: x * 1000.0
+        results = []
+        with self._lock:
+            for (key, phase), hist in self._histograms.items():
+                p50, p95, p99 = hist.percentiles(0.50, 0.95, 0.99)
+                mx = max(hist.samples)
+                results.append(
+                    (key, phase, hist.count, ms(p50), ms(p95), ms(p99), ms(mx))
+                )
+        order = {p: i for i, p in enumerate(PHASES)}
+        results.sort(key=lambda r: (r[0], order.get(r[1], len(PHASES))))
+        return results
+
+    def as_table(self):
+        """
+        Return the summary as an rtlib ClientTable.
+        """
+        ms = lambda label: {
+            "type": "numeric",
+            "label": label,
+            "widget_kwargs": {"decimals": 1},
+        }
+        columns = [
+            ("endpoint", {"label": "Endpoint", "char_width": 40}),
+            ("phase", {"label": "Phase"}),
+            ("count", {"type": "integer", "label": "Count"}),
+            ("p50", ms("p50 (ms)")),
+            ("p95", ms("p95 (ms)")),
+            ("p99", ms("p99 (ms)")),
+            ("maximum", ms("Max (ms)")),
+        ]
+        attrs = [c[0] for c in columns]
+        rows = [dict(zip(attrs, row)) for row in self.summary()]
+        return rtlib.ClientTable(columns, rows)
@@ -0,0 +1,163 @@
+import time
+import heapq
+import itertools
+import threading
+import concurrent.futures as futures
+
+
+def queued_job_delay(response):
+    """
+    Return the seconds to wait before polling the queued job location of a
+    202/303 response.  The server hint is shaved so that we tend to poll just
+    before the job completes.
+    """
+    if "Expected-Duration" not in response.headers:
+        return 0.0
+    sleeptime = float(response.headers["Expected-Duration"])
+    if sleeptime > 2.0:
+        sleeptime /= 1.5
+    return sleeptime
+
+
+class QueuedJob:
+    def __init__(self, session, response, finish):
+        self.session = session
+        self.location = response.headers["Location"]
+        self.finish = finish
+        self.interval = None
+        self.future = futures.Future()
+
+
+class QueuedJobScheduler:
+    """
+    The rtx server answers a long request with 202/303 and a Location to poll
+    for the result.  This scheduler parks such jobs and polls all of them from
+    one thread.  The delay before each poll is the server's Expected-Duration
+    hint when given, otherwise an exponential backoff between min_interval
+    and max_interval.
+
+    :meth:`park` returns a concurrent.futures.Future which resolves to
+    ``finish(response)`` of the final response.  Cancelling that future drops
+    the job at its next poll.  The final response is handed over with its
+    body unread and the finish callables run on a small separate pool so
+    that downloading & decoding one large report does not hold up the polls.
+    A poll which fails (e.g. a reply with-out a Location) fails its own job
+    only.
+    """
+
+    def __init__(self, min_interval=0.25, max_interval=5.0, backoff=1.5, finishers=2):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+        self._cond = threading.Condition()
+        self._heap = []
+        self._sequence = itertools.count()
+        self._thread = None
+        self._finisher = futures.ThreadPoolExecutor(
+            finishers, thread_name_prefix="rtx-queued-finish"
+        )
+
+    def park(self, session, response, finish):
+        job = QueuedJob(session, response, finish)
+        self._schedule(job, response)
+        job.future.add_done_callback(lambda f: self._cancelled(job))
+        return job.future
+
+    def pending(self):
+        with self._cond:
+            return len(self._heap)
+
+    def next_interval(self, job, response):
+        hint = queued_job_delay(response)
+        if hint > 0:
+            job.interval = None
+            return hint
+        if job.interval is None:
+            job.interval = self.min_interval
+        else:
+            job.interval = min(job.interval * self.backoff, self.max_interval)
+        return job.interval
+
+    def _schedule(self, job, response):
+        due = time.monotonic() + self.next_interval(job, response)
+        with self._cond:
+            heapq.heappush(self._heap, (due, next(self._sequence), job))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="rtx-queued-poll", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def _cancelled(self, job):
+        # drop a cancelled job now rather than at its next poll
+        if not job.future.cancelled():
+            return
+        with self._cond:
+            self._heap = [entry for entry in self._heap if entry[2] is not job]
+            heapq.heapify(self._heap)
+            self._cond.notify()
+
+    def _next_due(self):
+        with self._cond:
+            while True:
+                if len(self._heap) == 0:
+                    self._cond.wait()
+                    continue
+                due, _, job = self._heap[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                return job
+
+    def _run(self):
+        while True:
+            job = self._next_due()
+            if job.future.cancelled():
+                continue
+
+            try:
+                self._poll(job)
+            except Exception as e:
+                if job.future.set_running_or_notify_cancel():
+                    job.future.set_exception(e)
+
+    def _poll(self, job):
+        s = job.session
+        request = s.build_request("GET", job.location)
+        r = s.send(request, stream=True, follow_redirects=True)
+        if r.status_code in [202, 303]:  # accepted, redirect
+            r.close()
+            job.location = r.headers["Location"]
+            self._schedule(job, r)
+        else:
+            self._finisher.submit(self._complete, job, r)
+
+    def _complete(self, job, r):
+        try:
+            if not job.future.set_running_or_notify_cancel():
+                return
+            try:
+                job.future.set_result(job.finish(r))
+            except Exception as e:
+                job.future.set_exception(e)
+        finally:
+            r.close()
+
+
+_SCHEDULER = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def queued_job_scheduler():
+    """
+    Return the process wide scheduler shared by all sessions.
+    """
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = QueuedJobScheduler()
+        return _SCHEDULER
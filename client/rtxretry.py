@@ -0,0 +1,260 @@
+import time
+import random
+import threading
+import httpx
+from .rtxcancel import cancelled
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+def host_key(url):
+    """
+    Return the key of the circuit breaker of the host of url (a str or
+    httpx.URL); a default port given explicitly is dropped so that
+    "https://host:443/" and "https://host/" share a breaker.
+    """
+    url = httpx.URL(url)
+    return url.host if url.port == None else f"{url.host}:{url.port}"
+
+
+class CircuitOpenError(httpx.ConnectError):
+    """
+    The request was not sent because the circuit breaker for the host is
+    open.  This subclasses httpx.ConnectError so that callers which report an
+    unavailable server handle it the same way.
+    """
+
+
+class RetryPolicy:
+    """
+    This decides which failed requests are sent again and after what delay.
+    Only GET/HEAD/OPTIONS requests and requests marked idempotent (the
+    "idempotent" request extension, see RtxClient.post) are retried.  A
+    request is retried after a connection failure or a reply with one of the
+    gateway statuses; a read timeout is not retried since the server may
+    still be working on it.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(
+        self,
+        retries=3,
+        backoff=0.25,
+        max_backoff=4.0,
+        statuses=(502, 503, 504),
+        exceptions=(
+            httpx.ConnectError,
+            httpx.ConnectTimeout,
+            httpx.RemoteProtocolError,
+        ),
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self.exceptions = exceptions
+
+    def retryable(self, request):
+        if request.extensions.get("idempotent", False):
+            return True
+        return request.method in self.SAFE_METHODS
+
+    def delay(self, attempt, response=None):
+        """
+        Return the seconds to wait before the retry following the given
+        (1-based) attempt; this is "full jitter" exponential backoff unless
+        the server sent a short Retry-After.
+        """
+        if response != None and "Retry-After" in response.headers:
+            try:
+                after = float(response.headers["Retry-After"])
+                if after <= self.max_backoff:
+                    return after
+            except ValueError:
+                pass
+        ceiling = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Track consecutive failures to reach one host.  After failure_threshold
+    failures the breaker opens and requests fail at once for reset_timeout
+    seconds.  Then one trial request is let through (half-open); its success
+    closes the breaker and its failure opens it again.
+
+    allow returns False or a permit which must be passed to release when the
+    request is done (whatever the outcome) so that a trial which ends in
+    neither success nor failure (e.g. cancelled by the client) lets the next
+    request be the trial.
+    """
+
+    def __init__(self, host, failure_threshold=5, reset_timeout=30.0, listener=None):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.listener = listener
+
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def allow(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self._set_state(HALF_OPEN)
+            if self._trial:
+                return False
+            self._trial = True
+            return HALF_OPEN
+
+    def release(self, permit):
+        if permit == HALF_OPEN:
+            with self._lock:
+                self._trial = False
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial = False
+            self._set_state(CLOSED)
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def _set_state(self, state):
+        # called with the lock held
+        if state == self.state:
+            return
+        self.state = state
+        if self.listener != None:
+            self.listener(self.host, state)
+
+
+class CircuitBreakers:
+    """
+    The circuit breakers of a session by host.  Listeners added with
+    add_listener are called as listener(host, state) on each state change
+    from the thread of the request which caused it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._breakers = {}
+        self._listeners = []
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def _notify(self, host, state):
+        for listener in list(self._listeners):
+            listener(host, state)
+
+    def breaker(self, host):
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker == None:
+                breaker = CircuitBreaker(
+                    host, self.failure_threshold, self.reset_timeout, self._notify
+                )
+                self._breakers[host] = breaker
+            return breaker
+
+    def state(self, host):
+        with self._lock:
+            breaker = self._breakers.get(host)
+        return breaker.state if breaker != None else CLOSED
+
+    def states(self):
+        with self._lock:
+            return {host: b.state for host, b in self._breakers.items()}
+
+
+class RetryTransport(httpx.BaseTransport):
+    """
+    An httpx transport wrapping another to add the retry policy & circuit
+    breakers of an RtxSession.  Gateway error responses are returned as
+    they are once the retries are spent so that the caller reports the
+    server error as usual.  A request with the extension ``retry`` set to
+    False is passed straight through.
+    """
+
+    # failures to reach the server; a read timeout (e.g. of a slow report)
+    # or an error raised locally does not count against the host
+    BREAKER_EXCEPTIONS = (
+        httpx.NetworkError,
+        httpx.ConnectTimeout,
+        httpx.ProtocolError,
+    )
+
+    def __init__(self, transport, policy, breakers):
+        self.transport = transport
+        self.policy = policy
+        self.breakers = breakers
+
+    def handle_request(self, request):
+        if not request.extensions.get("retry", True):
+            # e.g. a connection pre-warm which must not count as a failure
+            return self.transport.handle_request(request)
+
+        breaker = self.breakers.breaker(host_key(request.url))
+        retryable = self.policy.retryable(request)
+        attempt = 0
+        while True:
+            attempt += 1
+            permit = breaker.allow()
+            if not permit:
+                raise CircuitOpenError(
+                    f"The server {request.url.host} is not responding; "
+                    "requests are paused for a moment.",
+                    request=request,
+                )
+            try:
+                response = self.transport.handle_request(request)
+                if response.status_code >= 500:
+                    breaker.failure()
+                else:
+                    breaker.success()
+                if response.status_code not in self.policy.statuses:
+                    return response
+            except Exception as e:
+                if cancelled():
+                    # aborted by the client, not a server failure
+                    raise
+                if isinstance(e, self.BREAKER_EXCEPTIONS):
+                    breaker.failure()
+                if not isinstance(e, self.policy.exceptions):
+                    raise
+                if not retryable or attempt > self.policy.retries:
+                    raise
+                time.sleep(self.policy.delay(attempt))
+                continue
+            finally:
+                breaker.release(permit)
+
+            if not retryable or attempt > self.policy.retries:
+                return response
+            response.close()
+            time.sleep(self.policy.delay(attempt, response))
+
+    def close(self):
+        self.transport.close()
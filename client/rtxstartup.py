@@ -0,0 +1,176 @@
+import time
+import concurrent.futures as futures
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class Stage:
+    """
+    One fetch of a LoginPipeline.  fetch is called with no arguments from a
+    worker thread once the stages named in requires are done; apply (if
+    given) is called with the result of fetch from the thread which calls
+    LoginPipeline.apply.
+    """
+
+    def __init__(self, name, fetch, requires=(), apply=None):
+        self.name = name
+        self.fetch = fetch
+        self.requires = list(requires)
+        self.apply = apply
+
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.started = None
+        self.elapsed = None
+
+
+class LoginPipeline:
+    """
+    The start-up requests which follow a login declared as a dependency
+    graph.  Run executes each stage as soon as the stages it requires are
+    done so that independent fetches (e.g. the report list & static
+    settings) share their round trip rather than following one another.  A
+    stage whose requirement failed is skipped.
+
+    Fetches run with-out touching the GUI; their results are handed to the
+    apply callbacks of the stages afterwards on the calling thread.
+
+    Example::
+
+        pipeline = LoginPipeline()
+        pipeline.add("auth", session.await_login)
+        pipeline.add("reports", fetch_reports, requires=["auth"], apply=show)
+        pipeline.run()
+        pipeline.apply()
+        print(pipeline.format_timings())
+    """
+
+    def __init__(self, max_workers=6):
+        self.max_workers = max_workers
+        self.stages = {}
+        self.started = None
+        self.elapsed = None
+
+    def add(self, name, fetch, requires=(), apply=None):
+        if name in self.stages:
+            raise ValueError(f"duplicate login stage {name}")
+        stage = Stage(name, fetch, requires, apply)
+        self.stages[name] = stage
+        return stage
+
+    def __contains__(self, name):
+        return name in self.stages
+
+    def _check(self):
+        for stage in self.stages.values():
+            for req in stage.requires:
+                if req not in self.stages:
+                    raise ValueError(f"login stage {stage.name} requires unknown {req}")
+
+        # depth first search for a cycle
+        visiting, visited = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"login stages have a cycle through {name}")
+            visiting.add(name)
+            for req in self.stages[name].requires:
+                visit(req)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _execute(self, stage):
+        stage.started = time.perf_counter()
+        try:
+            stage.result = stage.fetch()
+            stage.status = DONE
+        except Exception as e:
+            stage.error = e
+            stage.status = FAILED
+        finally:
+            stage.elapsed = time.perf_counter() - stage.started
+        return stage
+
+    def run(self):
+        """
+        Execute the fetches of all stages and return self.  Errors are kept
+        on the stages (see failures) rather than raised.
+        """
+        self._check()
+        self.started = time.perf_counter()
+        waiting = dict(self.stages)
+
+        def ready():
+            result = []
+            for name, stage in list(waiting.items()):
+                states = [self.stages[r].status for r in stage.requires]
+                if any(s in (FAILED, SKIPPED) for s in states):
+                    stage.status = SKIPPED
+                    del waiting[name]
+                    # its dependents are skipped in turn
+                    return ready()
+                if all(s == DONE for s in states):
+                    result.append(stage)
+            for stage in result:
+                del waiting[stage.name]
+            return result
+
+        with futures.ThreadPoolExecutor(self.max_workers) as executor:
+            running = {executor.submit(self._execute, s) for s in ready()}
+            while running:
+                done, running = futures.wait(
+                    running, return_when=futures.FIRST_COMPLETED
+                )
+                running |= {executor.submit(self._execute, s) for s in ready()}
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def apply(self):
+        """
+        Call the apply callback of each completed stage in the order the
+        stages were added.  An error in a callback is kept on its stage and
+        does not stop the others.
+        """
+        for stage in self.stages.values():
+            if stage.status != DONE or stage.apply == None:
+                continue
+            try:
+                stage.apply(stage.result)
+            except Exception as e:
+                stage.error = e
+                stage.status = FAILED
+
+    def failures(self):
+        return [s for s in self.stages.values() if s.status == FAILED]
+
+    def timings(self):
+        """
+        Return a list of (stage, start, elapsed, status) tuples in seconds
+        relative to the start of run, in the order stages started.
+        """
+        rows = []
+        for stage in self.stages.values():
+            start = None if stage.started == None else stage.started - self.started
+            rows.append((stage.name, start, stage.elapsed, stage.status))
+        rows.sort(key=lambda r: (r[1] == None, r[1] or 0.0))
+        return rows
+
+    def format_timings(self):
+        ms = lambda x: "-" if x == None else f"{x * 1000.0:.0f}"
+        lines = [f"{'stage':<20} {'start':>8} {'elapsed':>8}  status"]
+        for name, start, elapsed, status in self.timings():
+            error = self.stages[name].error
+            if error != None:
+                status = f"{status} ({type(error).__name__}: {error})"
+            lines.append(f"{name:<20} {ms(start):>8} {ms(elapsed):>8}  {status}")
+        lines.append(f"{'login pipeline':<20} {'0':>8} {ms(self.elapsed):>8}")
+        return "\n".join(lines)
@@ -0,0 +1,167 @@
+import re
+import json
+import codecs
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+# characters which may continue a number
+NUMBER_TAIL = frozenset("0123456789.eE+-")
+
+
+class PositionalRows(list):
+    """
+    Table rows decoded as tuples in the order of the table columns rather
+    than as dictionaries.  rtlib.ClientTable accepts these with
+    positional=True.
+    """
+
+
+class _ChunkReader:
+    """
+    A str window over a stream of utf-8 byte chunks.  Consumed text is
+    dropped from the front of the window as the parse advances.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.scanner = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self):
+        """
+        Read at least as much text as is currently unconsumed (so that
+        retrying a partial value is amortized linear).  Return False at the
+        end of the stream.
+        """
+        if self.eof:
+            return False
+        if self.pos > 0:
+            self.buf = self.buf[self.pos :]
+            self.pos = 0
+        wanted = len(self.buf) + max(len(self.buf), 1)
+        pieces = [self.buf]
+        size = len(self.buf)
+        for chunk in self.chunks:
+            text = self.decoder.decode(chunk)
+            pieces.append(text)
+            size += len(text)
+            if size >= wanted:
+                break
+        else:
+            pieces.append(self.decoder.decode(b"", final=True))
+            self.eof = True
+        self.buf = "".join(pieces)
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                raise ValueError("unexpected end of JSON stream")
+
+    def expect(self, chars):
+        c = self.peek()
+        if c not in chars:
+            raise ValueError(f"expected one of {chars!r} in JSON stream, found {c!r}")
+        self.pos += 1
+        return c
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                v, end = self.scanner.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.more():
+                    raise
+                continue
+            # A number cut by the end of the window (e.g. 12. or 1e of
+            # 12.5 or 1e-05) is decoded as far as it goes; it is complete
+            # only if the next character cannot continue it.
+            cut = False
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                cut = end == len(self.buf) or self.buf[end] in NUMBER_TAIL
+            if not cut or self.eof:
+                self.pos = end
+                return v
+            if not self.more():
+                self.pos = end
+                return v
+
+
+def _table_rows(reader, attrs):
+    rows = PositionalRows() if attrs != None else []
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return rows
+    while True:
+        row = reader.value()
+        if attrs != None and isinstance(row, dict):
+            row = tuple([row.get(a) for a in attrs])
+        elif attrs != None:
+            row = tuple(row)
+        rows.append(row)
+        if reader.expect(",]") == "]":
+            return rows
+
+
+def _object(reader, nested):
+    """
+    Decode an object.  When nested, members named "data" are decoded row by
+    row so that an rtlib table (columns + data) never holds its rows as a
+    list of dictionaries.
+    """
+    obj = {}
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+        return obj
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if nested and key == "data" and reader.peek() == "[":
+            columns = obj.get("columns")
+            attrs = [c[0] for c in columns] if columns != None else None
+            obj[key] = _table_rows(reader, attrs)
+        elif not nested and reader.peek() == "{":
+            obj[key] = _object(reader, True)
+        else:
+            obj[key] = reader.value()
+        if reader.expect(",}") == "}":
+            break
+
+    data = obj.get("data")
+    if nested and "columns" in obj and isinstance(data, list):
+        if not isinstance(data, PositionalRows):
+            # data preceded columns in the stream
+            attrs = [c[0] for c in obj["columns"]]
+            obj["data"] = PositionalRows(
+                tuple([r.get(a) for a in attrs]) if isinstance(r, dict) else tuple(r)
+                for r in data
+            )
+    return obj
+
+
+def decode_payload(chunks):
+    """
+    Decode a JSON rtx payload from an iterable of utf-8 byte chunks (e.g.
+    httpx.Response.iter_bytes()).  The top level object is returned as a
+    dict with each rtlib table's data as PositionalRows.  Only the unparsed
+    tail of the stream and one row at a time are held as text.
+    """
+    reader = _ChunkReader(chunks)
+    if reader.peek() != "{":
+        # not an rtx payload; decode whatever it is
+        return reader.value()
+    result = _object(reader, False)
+    while True:
+        if reader.buf[reader.pos :].strip() != "":
+            raise ValueError("extra data after JSON payload")
+        reader.pos = len(reader.buf)
+        if not reader.more():
+            return result
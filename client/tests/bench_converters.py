@@ -0,0 +1,90 @@
+"""
+Compare the column-at-a-time value converters of rtlib.reportcore against a
+converter lambda called per cell (the conversion before as_python_columns)
+for each column type on synthetic one-column rows.
+
+    python client/tests/bench_converters.py [rows]
+"""
+
+import os
+import sys
+import random
+import base64
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from rtlib import reportcore
+from standin import best_of
+
+
+def old_parse_date(s):
+    if len(s) != 10 or s[4] != "-" or s[7] != "-":
+        raise ValueError(f"invalid date string {s}")
+    return datetime.date(int(s[:4]), int(s[5:7]), int(s[8:10]))
+
+
+def old_parse_datetime(v):
+    try:
+        return datetime.datetime.strptime(v, "%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        pass
+    return datetime.datetime.strptime(v, "%Y-%m-%dT%H:%M:%S.%f")
+
+
+def per_cell_converters():
+    offset = (
+        datetime.datetime.utcnow() - datetime.datetime.now()
+    ).total_seconds() / 3600
+    return {
+        "date": lambda v: old_parse_date(v) if v != None else None,
+        "datetime": lambda v: (
+            old_parse_datetime(v) - datetime.timedelta(hours=offset) if v != None else v
+        ),
+        "boolean": lambda v: False if v == None else v,
+        "binary": reportcore.parse_binary,
+        "currency_usd": lambda v: v,
+    }
+
+
+def sample_columns(rows, seed=1):
+    rand = random.Random(seed)
+    start = datetime.datetime(2020, 1, 1)
+    # a ledger has a few hundred distinct dates
+    dates = [
+        (start.date() + datetime.timedelta(days=i)).isoformat() for i in range(400)
+    ]
+    blob = base64.b64encode(b"attachment" * 4).decode("ascii")
+    return {
+        "date": [rand.choice(dates) if i % 9 else None for i in range(rows)],
+        "datetime": [
+            (start + datetime.timedelta(seconds=rand.randint(0, 10**8))).isoformat()
+            for i in range(rows)
+        ],
+        "boolean": [rand.choice([True, False, None]) for i in range(rows)],
+        "binary": [blob if i % 4 else None for i in range(rows)],
+        "currency_usd": [rand.randint(100, 500000) / 100 for i in range(rows)],
+    }
+
+
+def main(rows):
+    columns = sample_columns(rows)
+    per_cell = per_cell_converters()
+
+    print(f"{rows} rows")
+    print(f"{'type':16} {'per cell ms':>12} {'column ms':>12}")
+    for type_, values in columns.items():
+        cell = per_cell[type_]
+        meta = [(type_, {"type": type_})]
+        data = [(v,) for v in values]
+        bulk = reportcore.as_python_columns(meta, positional=True)
+        assert len(bulk(data)) == rows
+
+        cell_time = best_of(lambda: [(cell(r[0]),) for r in data], repeat=5)
+        column_time = best_of(lambda: bulk(data), repeat=5)
+        print(f"{type_:16} {cell_time * 1000:12.1f} {column_time * 1000:12.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
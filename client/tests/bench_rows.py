@@ -0,0 +1,64 @@
+"""
+Compare the construction of ClientTable rows by the generated fixedrecord
+constructors against the generic SlottedRow path (a generator coercing each
+row to a tuple & keyword-free SlottedRow.__init__ via setattr).  This
+reports the time to build the rows of a decoded report & to read them back
+with _as_tuple.
+
+    python client/tests/bench_rows.py [rows]
+"""
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import rtlib
+from rtlib import reportcore
+from standin import best_of, sample_payload
+
+
+def generic_rows(columns, data):
+    # the construction before fixedrecord generated its methods
+    members = [c[0] for c in columns]
+    DataRow = type("DataRow", (reportcore.SlottedRow,), {"__slots__": members})
+    by_type = {
+        "boolean": lambda v: False if v == None else v,
+        "date": lambda v: reportcore.parse_date(v) if v != None else None,
+    }
+    identity = lambda v: v
+    converters = [
+        (attr, by_type.get((meta or {}).get("type"), identity))
+        for attr, meta in columns
+    ]
+
+    def row_coerce(_data):
+        return tuple(func(_data[key]) for key, func in converters)
+
+    return [DataRow(*row_coerce(r)) for r in data]
+
+
+def generated_rows(columns, data):
+    table = rtlib.ClientTable(columns, data)
+    return table.rows
+
+
+def main(rows):
+    payload = sample_payload(rows)
+    decoded = json.loads(rtlib.server.serialize(payload))
+    columns = decoded["trans"]["columns"]
+    data = decoded["trans"]["data"]
+
+    print(f"{rows} rows")
+    print(f"{'construction':20} {'build ms':>10} {'as_tuple ms':>12}")
+    for label, build in [("generic", generic_rows), ("fixedrecord", generated_rows)]:
+        built = build(columns, data)
+        elapsed = best_of(lambda: build(columns, data))
+        readback = best_of(lambda: [r._as_tuple() for r in built])
+        print(f"{label:20} {elapsed * 1000:10.1f} {readback * 1000:12.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,54 @@
+"""
+Compare the JSON encoding of rtlib.server.to_json by json with DateTimeEncoder
+(the encoding before the orjson backend) against the orjson backend & the
+peak memory of to_json against to_json_stream on a synthetic report.
+
+    python client/tests/bench_serialize.py [rows]
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from rtlib.server import serialization
+from standin import best_of, sample_payload
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def drain(chunks):
+    # stand in for an upload reading the chunks
+    for _ in chunks:
+        pass
+
+
+def main(rows):
+    payload = sample_payload(rows)
+    table = payload["trans"]
+
+    print(f"{rows} rows")
+    std_time = best_of(lambda: serialization._std_json_bytes(table))
+    print(f"{'json':20} {std_time * 1000:10.1f} ms")
+    if serialization.orjson == None:
+        print("orjson is not installed")
+        return
+    fast_time = best_of(lambda: serialization._json_bytes(table))
+    print(f"{'orjson':20} {fast_time * 1000:10.1f} ms")
+
+    whole = peak_memory(lambda: serialization.to_json(table))
+    stream = peak_memory(lambda: drain(serialization.to_json_stream(table)))
+    print(f"{'to_json peak':20} {whole / 2**20:10.1f} MB")
+    print(f"{'to_json_stream peak':20} {stream / 2**20:10.1f} MB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
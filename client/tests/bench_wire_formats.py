@@ -0,0 +1,62 @@
+"""
+Compare the rtlib wire formats against the DateTimeEncoder JSON on a sample
+report served by the stand-in server.  For each encoding & compression this
+reports the bytes on the wire, the decode time of the body and the total
+time of an RtxSession std_client round trip.
+
+    python client/tests/bench_wire_formats.py [rows]
+"""
+
+import os
+import sys
+import gzip
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import rtlib
+import client
+from standin import StandinServer, best_of, sample_payload
+
+
+def main(rows):
+    payload = sample_payload(rows)
+    print(f"{rows} rows")
+    print(f"{'format':40} {'bytes':>10} {'gzip':>10} {'decode ms':>10}")
+
+    formats = [rtlib.server.JSON_CONTENT_TYPE] + rtlib.server.wire_formats()
+    for ctype in formats:
+        body = rtlib.server.serialize_wire(payload, ctype)
+        if ctype == rtlib.server.JSON_CONTENT_TYPE:
+            decode = lambda: json.loads(body)
+        else:
+            decode = lambda: rtlib.server.deserialize_wire(body, ctype)
+        print(
+            f"{ctype:40} {len(body):10} {len(gzip.compress(body, 6)):10} "
+            f"{best_of(decode, repeat=5) * 1000:10.1f}"
+        )
+
+    print()
+    print(f"{'round trip':40} {'wire bytes':>10} {'table ms':>10}")
+    with StandinServer({"api/sample": payload}) as server:
+        for ctype in formats:
+            session = client.RtxSession(server.url, prewarm=False)
+            session.wire_formats = [] if ctype == "application/json" else [ctype]
+            sizes = []
+
+            def fetch():
+                r = session.get(
+                    session.prefix("api/sample"),
+                    headers=session.std_client()._headers(),
+                )
+                sizes.append(r.num_bytes_downloaded)
+                client.response_result(client.StdPayload, r).main_table()
+
+            elapsed = best_of(fetch, repeat=5)
+            print(f"{ctype:40} {sizes[-1]:10} {elapsed * 1000:10.1f}")
+            session.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,304 @@
+"""
+A local stand-in for the rtx server which answers GET & POST requests with
+canned rtlib payloads.  It negotiates the response encoding and compression
+the way a server using rtlib.server does (negotiate, serialize_wire,
+compress_body).
+"""
+
+import os
+import ssl
+import time
+import socket
+import random
+import subprocess
+import decimal
+import datetime
+import threading
+import http.server
+import rtlib
+
+
+def best_of(func, repeat=3):
+    """
+    Return the least of the seconds taken by repeat calls of func; for the
+    bench_*.py scripts.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def sample_payload(count, seed=1):
+    """
+    Return a report-like payload with one table of count rows.
+    """
+    rand = random.Random(seed)
+    columns = [
+        ("tid", {"type": "integer"}),
+        ("trandate", {"type": "date"}),
+        ("reference", {}),
+        ("payee", {}),
+        ("memo", {}),
+        ("account", {}),
+        ("debit", {"type": "currency_usd"}),
+        ("credit", {"type": "currency_usd"}),
+        ("reconciled", {"type": "boolean"}),
+    ]
+    payees = [f"Payee {i}" for i in range(200)]
+    accounts = [f"{4000 + i} Account" for i in range(60)]
+    rows = []
+    for i in range(count):
+        amount = decimal.Decimal(rand.randint(100, 500000)) / 100
+        rows.append(
+            {
+                "tid": i + 1,
+                "trandate": datetime.date(2020, 1, 1)
+                + datetime.timedelta(days=rand.randint(0, 1500)),
+                "reference": str(rand.randint(1000, 9999)),
+                "payee": rand.choice(payees),
+                "memo": "" if rand.random() < 0.7 else f"memo {i}",
+                "account": rand.choice(accounts),
+                "debit": amount if i % 2 == 0 else None,
+                "credit": amount if i % 2 == 1 else None,
+                "reconciled": rand.random() < 0.5,
+            }
+        )
+    return {
+        "headers": ["Transaction Detail", "Sample"],
+        "__main_table__": "trans",
+        "trans": {"columns": columns, "data": rows},
+    }
+
+
+class StandinServer:
+    """
+    Serve payloads (a dict of url path to payload) on a localhost port from
+    a background thread.  With negotiate=False every response is plain
+    uncompressed JSON as from an older server.  The headers of each request
+    are kept in requests with the method & path added.
+
+    A path in delays is answered after that many seconds.  A path in queued
+    is run as a queued job of that many seconds:  the request is answered
+    with 202 and a Location which answers 202 until the job is done.
+
+    A payload may be a callable taking the request record and returning the
+    payload and a dict of extra response headers (e.g. Set-Cookie).  GET and
+    POST requests are answered alike.
+    """
+
+    def __init__(self, payloads, negotiate=True, delays=None, queued=None):
+        self.payloads = payloads
+        self.negotiate = negotiate
+        self.delays = delays or {}
+        self.queued = queued or {}
+        self.requests = []
+        # job id -> (path, time done)
+        self.jobs = {}
+
+        standin = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                path = self.path.split("?")[0].lstrip("/")
+                record = standin.record(self, path)
+                time.sleep(standin.delays.get(path, 0.0))
+                if path.startswith("job/"):
+                    path, done = standin.jobs[path]
+                    if time.monotonic() < done:
+                        standin.accepted(self, self.path.lstrip("/"))
+                        return
+                elif path in standin.queued:
+                    job = f"job/{len(standin.jobs)}"
+                    standin.jobs[job] = (path, time.monotonic() + standin.queued[path])
+                    standin.accepted(self, job)
+                    return
+                if path not in standin.payloads:
+                    self.send_error(404)
+                    return
+                payload, headers = standin.payloads[path], None
+                if callable(payload):
+                    payload, headers = payload(record)
+                standin.respond(self, payload, headers)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                self.do_GET()
+
+            def do_HEAD(self):
+                standin.record(self, self.path.split("?")[0].lstrip("/"))
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = None
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{}/".format(self.httpd.server_address[1])
+
+    def record(self, handler, path):
+        record = {**handler.headers, "method": handler.command, "path": path}
+        self.requests.append(record)
+        return record
+
+    def requests_to(self, path, method="GET"):
+        return [r for r in self.requests if r["path"] == path and r["method"] == method]
+
+    def accepted(self, handler, location):
+        handler.send_response(202)
+        handler.send_header("Location", self.url + location)
+        handler.send_header("Content-Length", "0")
+        handler.end_headers()
+
+    def respond(self, handler, payload, headers=None):
+        if self.negotiate:
+            ctype = rtlib.server.negotiate(handler.headers.get("Accept"))
+        else:
+            ctype = rtlib.server.JSON_CONTENT_TYPE
+        body = rtlib.server.serialize_wire(payload, ctype)
+        encoding = None
+        if self.negotiate:
+            encoding, body = rtlib.server.compress_body(
+                body, handler.headers.get("Accept-Encoding")
+            )
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", ctype)
+        if encoding != None:
+            handler.send_header("Content-Encoding", encoding)
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+class H2StandinServer:
+    """
+    Serve the bodies of paths (a dict of url path to bytes) over HTTP/2 with
+    TLS on a localhost port; a path in delays is answered after that many
+    seconds with-out holding up the other streams of its connection.  The
+    certificate is made by the openssl command in certdir and trusted by
+    ssl_context().  The number of connections accepted is kept in
+    connections.
+    """
+
+    def __init__(self, paths, certdir, delays=None):
+        self.paths = paths
+        self.delays = delays or {}
+        self.connections = 0
+        self.certfile = os.path.join(certdir, "cert.pem")
+        keyfile = os.path.join(certdir, "key.pem")
+        subprocess.run(
+            [
+                "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+                "-days", "1", "-subj", "/CN=localhost",
+                "-addext", "subjectAltName=IP:127.0.0.1",
+                "-keyout", keyfile, "-out", self.certfile,
+            ],
+            check=True,
+            capture_output=True,
+        )  # fmt: skip
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(self.certfile, keyfile)
+        self.context.set_alpn_protocols(["h2"])
+        self.listener = socket.create_server(("127.0.0.1", 0))
+
+    @property
+    def url(self):
+        return "https://127.0.0.1:{}/".format(self.listener.getsockname()[1])
+
+    def ssl_context(self):
+        return ssl.create_default_context(cafile=self.certfile)
+
+    def serve(self):
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self.connection, args=(sock,), daemon=True).start()
+
+    def connection(self, sock):
+        import h2.config
+        import h2.events
+        import h2.connection
+        import h2.exceptions
+
+        config = h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        conn = h2.connection.H2Connection(config=config)
+        lock = threading.Lock()
+        try:
+            sock = self.context.wrap_socket(sock, server_side=True)
+        except (OSError, ssl.SSLError):
+            return
+
+        def respond(stream_id, path):
+            body = self.paths.get(path)
+            status = "200" if body != None else "404"
+            body = body or b""
+            with lock:
+                try:
+                    conn.send_headers(
+                        stream_id,
+                        [(":status", status), ("content-length", str(len(body)))],
+                    )
+                    conn.send_data(stream_id, body, end_stream=True)
+                    sock.sendall(conn.data_to_send())
+                except (h2.exceptions.H2Error, OSError):
+                    pass
+
+        with lock:
+            conn.initiate_connection()
+            sock.sendall(conn.data_to_send())
+        while True:
+            try:
+                data = sock.recv(65535)
+            except OSError:
+                return
+            if not data:
+                return
+            with lock:
+                events = conn.receive_data(data)
+                sock.sendall(conn.data_to_send())
+            for event in events:
+                if isinstance(event, h2.events.RequestReceived):
+                    path = dict(event.headers)[":path"].lstrip("/")
+                    timer = threading.Timer(
+                        self.delays.get(path, 0.0), respond, (event.stream_id, path)
+                    )
+                    timer.daemon = True
+                    timer.start()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.listener.close()
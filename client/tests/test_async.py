@@ -0,0 +1,81 @@
+import time
+import asyncio
+import client
+import client.rtxasync as rtxasync
+from standin import StandinServer, sample_payload
+
+
+def auth_server(expires):
+    """
+    Serve a login which expires in expires seconds & a refresh which rotates
+    the rtx cookie and lasts an hour.
+    """
+    refreshes = []
+
+    def auth(expiration, cookie):
+        payload = {
+            "userid": "u1",
+            "username": "fred",
+            "access_expiration": expiration,
+            "capabilities": {"columns": [("act_name", {})], "data": []},
+        }
+        return payload, {"Set-Cookie": f"rtx={cookie}; Path=/"}
+
+    def login(record):
+        return auth(time.time() + expires, "login")
+
+    def refresh(record):
+        refreshes.append(record)
+        return auth(time.time() + 3600, f"refresh{len(refreshes)}")
+
+    payloads = {
+        "api/session": login,
+        "api/session/refresh": refresh,
+        "api/a": sample_payload(5),
+    }
+    return StandinServer(payloads)
+
+
+def test_gather_on_borrowed_session():
+    with auth_server(3600) as server:
+        session = client.RtxSession(server.url, prewarm=False)
+        session.authenticate("fred", "secret")
+
+        async def fan_out():
+            async with rtxasync.AsyncRtxSession.from_session(session) as asession:
+                std = asession.std_client()
+                return await asyncio.gather(*[std.get("api/a") for _ in range(4)])
+
+        payloads = asyncio.run(fan_out())
+
+        assert [len(p.main_table().rows) for p in payloads] == [5] * 4
+        assert {r["Cookie"] for r in server.requests_to("api/a")} == {"rtx=login"}
+        # closing the borrowed session leaves the owner logged in
+        assert session.authenticated()
+
+
+def test_borrowed_session_adopts_owner_refresh():
+    # the login is already within the expiry margin
+    with auth_server(10) as server:
+        session = client.RtxSession(server.url, prewarm=False)
+        session.authenticate("fred", "secret")
+
+        async def fetch():
+            async with rtxasync.AsyncRtxSession.from_session(session) as asession:
+                return await asession.std_client().get("api/a")
+
+        asyncio.run(fetch())
+
+        # one refresh by the owner; the async session used its cookie
+        assert len(server.requests_to("api/session/refresh")) == 1
+        assert server.requests_to("api/a")[0]["Cookie"] == "rtx=refresh1"
+        assert session.cookies["rtx"] == "refresh1"
+
+
+def test_aread_yenotpass_sets_base_url(monkeypatch):
+    monkeypatch.setattr(
+        rtxasync, "read_login_config", lambda: {"server_url": "http://rtx.example"}
+    )
+    session = rtxasync.AsyncRtxSession()
+    asyncio.run(rtxasync.aread_yenotpass(session))
+    assert session.prefix("api/a") == "http://rtx.example/api/a"
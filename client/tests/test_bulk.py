@@ -0,0 +1,57 @@
+import httpx
+from client.rtxbulk import bulk_execute
+from client.rtxretry import RetryPolicy
+
+
+class Session:
+    retry_policy = RetryPolicy()
+
+
+class Client:
+    """
+    Fail each call with failure until it has been called fail_times times.
+    """
+
+    session = Session()
+
+    def __init__(self, failure, fail_times=1):
+        self.failure = failure
+        self.fail_times = fail_times
+        self.calls = []
+
+    def call(self, method, tail, *args, **kwargs):
+        self.calls.append((method, tail))
+        if self.calls.count((method, tail)) <= self.fail_times:
+            raise self.failure
+        return method
+
+    def get(self, tail, *args, **kwargs):
+        return self.call("get", tail)
+
+    def put(self, tail, *args, **kwargs):
+        return self.call("put", tail)
+
+
+def run(client, specs):
+    return bulk_execute(client, specs, retries=2, backoff=0.001)
+
+
+def test_writes_are_not_repeated():
+    client = Client(httpx.ReadTimeout("slow"))
+    results = run(client, [("put", "api/a"), ("get", "api/b")])
+    assert isinstance(results[0].error, httpx.ReadTimeout)
+    assert results[0].attempts == 1
+    assert results[1].ok and results[1].attempts == 2
+
+
+def test_idempotent_writes_are_retried():
+    client = Client(httpx.ReadTimeout("slow"))
+    (result,) = run(client, [("put", "api/a", {"idempotent": True})])
+    assert result.ok and result.attempts == 2
+
+
+def test_transport_retries_are_not_repeated():
+    client = Client(httpx.ConnectError("down"))
+    (result,) = run(client, [("get", "api/a")])
+    assert isinstance(result.error, httpx.ConnectError)
+    assert result.attempts == 1
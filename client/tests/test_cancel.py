@@ -0,0 +1,78 @@
+import time
+import socket
+import threading
+import httpx
+import pytest
+import client
+from client.rtxcancel import CancelScope, CancellableTransport
+from standin import StandinServer, H2StandinServer, sample_payload
+
+
+def test_cancel_aborts_request_in_flight():
+    payloads = {"api/slow": sample_payload(5)}
+    with StandinServer(payloads, delays={"api/slow": 3.0}) as server:
+        session = client.RtxSession(server.url, prewarm=False)
+        future, invoke = session.std_client().future_invocation()
+        outcome = {}
+
+        def run():
+            try:
+                invoke("api/slow")
+            except Exception as e:
+                outcome["error"] = e
+            outcome["returned"] = time.monotonic()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        time.sleep(0.3)
+        cancelled_at = time.monotonic()
+        future.cancel()
+        thread.join(5)
+
+        assert isinstance(outcome["error"], client.RtxRequestCancellation)
+        assert outcome["returned"] - cancelled_at < 1.0
+
+
+def test_transport_errors_are_httpx_errors():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    session = client.RtxSession(f"http://127.0.0.1:{port}/", prewarm=False)
+    session.retry_policy.retries = 0
+    with pytest.raises(httpx.ConnectError):
+        session.get(session.prefix("api/x"))
+
+
+def test_cancel_on_http2_connection(tmp_path):
+    pytest.importorskip("h2")
+    paths = {"slow": b"slow", "fast": b"fast"}
+    with H2StandinServer(paths, tmp_path, delays={"slow": 3.0}) as server:
+        transport = CancellableTransport(http2=True, verify=server.ssl_context())
+        session = httpx.Client(transport=transport)
+        assert session.get(server.url + "fast").http_version == "HTTP/2"
+
+        scope = CancelScope()
+        outcome = {}
+
+        def run():
+            with scope:
+                try:
+                    session.get(server.url + "slow")
+                except httpx.ReadError as e:
+                    outcome["error"] = e
+            outcome["returned"] = time.monotonic()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        time.sleep(0.3)
+        cancelled_at = time.monotonic()
+        scope.cancel()
+        thread.join(5)
+
+        assert isinstance(outcome["error"], httpx.ReadError)
+        assert outcome["returned"] - cancelled_at < 1.0
+        # the connection is kept for the other requests
+        with CancelScope():
+            assert session.get(server.url + "fast").content == b"fast"
+        assert server.connections == 1
+        session.close()
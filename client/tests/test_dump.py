@@ -0,0 +1,81 @@
+import os
+import json
+import pytest
+import replicate
+import client
+from standin import StandinServer, sample_payload
+
+# the cli plugins register their commands on the global router
+replicate.init_global_router({"session": None})
+
+import cliplugs.finance as finance  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "args, jobs, rest",
+    [
+        (["--jobs", "3", "out"], 3, ["out"]),
+        (["out", "--jobs=2"], 2, ["out"]),
+        (["out"], min(4, os.cpu_count() or 1), ["out"]),
+    ],
+)
+def test_parse_jobs(args, jobs, rest):
+    assert finance.parse_jobs(args) == (jobs, rest)
+
+
+@pytest.mark.parametrize("args", [["--jobs"], ["--jobs", "x"], ["--jobs=0"]])
+def test_parse_jobs_errors(args):
+    with pytest.raises(replicate.UserError):
+        finance.parse_jobs(args)
+
+
+def dump_files():
+    dfiles = [
+        finance.DumpFile(os.path.join("2020", f"r{i}.html"), "Sample", f"api/r{i}")
+        for i in range(3)
+    ]
+    # a request of its own as concurrent identical GETs share a round trip
+    opened = finance.DumpFile(
+        "open.html", "Sample", "api/r0", resumable=False, period="open"
+    )
+    return dfiles + [opened]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_dump_resumes(tmp_path, jobs):
+    payloads = {f"api/r{i}": sample_payload(10, seed=i) for i in range(3)}
+    with StandinServer(payloads) as server:
+        session = client.RtxSession(server.url, prewarm=False)
+        finance.run_dump(session, tmp_path, dump_files(), jobs)
+
+        manifest = json.loads((tmp_path / finance.MANIFEST_NAME).read_text())
+        assert sorted(manifest) == [
+            os.path.join("2020", f"r{i}.html") for i in range(3)
+        ] + ["open.html"]
+        for path, entry in manifest.items():
+            assert entry["sha256"] == finance.file_sha256(tmp_path / path)
+        assert "Payee" in (tmp_path / "2020" / "r1.html").read_text()
+        assert len(server.requests) == 4
+
+        # a truncated file is dumped again; an open period always is
+        (tmp_path / "2020" / "r1.html").write_text("<html>")
+        finance.run_dump(session, tmp_path, dump_files(), jobs)
+        again = [r["path"] for r in server.requests[4:]]
+        assert sorted(again) == ["api/r0", "api/r1"]
+        assert not list(tmp_path.glob("**/*.part"))
+
+
+def test_run_dump_failure_resumes(tmp_path):
+    payloads = {"api/r0": sample_payload(5), "api/r1": sample_payload(5)}
+    with StandinServer(payloads) as server:
+        session = client.RtxSession(server.url, prewarm=False)
+        with pytest.raises(replicate.UserError):
+            finance.run_dump(session, tmp_path, dump_files(), 2)
+        manifest = finance.read_manifest(tmp_path)
+        assert os.path.join("2020", "r2.html") not in manifest
+
+        server.payloads["api/r2"] = sample_payload(5)
+        finance.run_dump(session, tmp_path, dump_files()[:3], 2)
+        # only the failed file is fetched again
+        assert len(server.requests_to("api/r2")) == 2
+        assert len(server.requests_to("api/r0")) == 2
@@ -0,0 +1,137 @@
+import threading
+import time
+import pytest
+import client
+
+
+def recorder():
+    events = []
+    lock = threading.Lock()
+
+    def stage(name, delay=0.0, error=None):
+        def fetch():
+            with lock:
+                events.append(("start", name))
+            time.sleep(delay)
+            with lock:
+                events.append(("end", name))
+            if error != None:
+                raise error
+            return name.upper()
+
+        return fetch
+
+    return events, stage
+
+
+def test_dependency_order():
+    events, stage = recorder()
+    pipeline = client.LoginPipeline()
+    pipeline.add("auth", stage("auth", 0.05))
+    pipeline.add("reports", stage("reports", 0.05), requires=["auth"])
+    pipeline.add("statics", stage("statics", 0.05), requires=["auth"])
+    pipeline.add("summary", stage("summary"), requires=["reports", "statics"])
+    pipeline.run()
+
+    assert [s.status for s in pipeline.stages.values()] == ["done"] * 4
+    assert pipeline.failures() == []
+
+    position = {event: index for index, event in enumerate(events)}
+    assert position[("end", "auth")] < position[("start", "reports")]
+    assert position[("end", "auth")] < position[("start", "statics")]
+    assert position[("end", "reports")] < position[("start", "summary")]
+    assert position[("end", "statics")] < position[("start", "summary")]
+
+    # independent stages overlap
+    assert position[("start", "statics")] < position[("end", "reports")]
+    assert position[("start", "reports")] < position[("end", "statics")]
+
+
+def test_failure_skips_dependents():
+    events, stage = recorder()
+    pipeline = client.LoginPipeline()
+    pipeline.add("auth", stage("auth"))
+    pipeline.add("reports", stage("reports", error=client.RtxError("refused")))
+    pipeline.add("summary", stage("summary"), requires=["reports"])
+    pipeline.add("detail", stage("detail"), requires=["summary"])
+    pipeline.add("statics", stage("statics"), requires=["auth"])
+    pipeline.run()
+
+    status = {name: s.status for name, s in pipeline.stages.items()}
+    assert status == {
+        "auth": "done",
+        "reports": "failed",
+        "summary": "skipped",
+        "detail": "skipped",
+        "statics": "done",
+    }
+    assert [s.name for s in pipeline.failures()] == ["reports"]
+    assert isinstance(pipeline.stages["reports"].error, client.RtxError)
+    started = {name for kind, name in events if kind == "start"}
+    assert started == {"auth", "reports", "statics"}
+
+
+def test_apply_in_added_order():
+    _, stage = recorder()
+    applied = []
+
+    def broken(result):
+        raise ValueError("bad result")
+
+    pipeline = client.LoginPipeline()
+    pipeline.add("auth", stage("auth", 0.05), apply=applied.append)
+    pipeline.add("broken", stage("broken"), apply=broken)
+    pipeline.add("reports", stage("reports"), apply=applied.append)
+    pipeline.add("failed", stage("failed", error=ValueError("x")), apply=applied.append)
+    pipeline.run()
+    pipeline.apply()
+
+    assert applied == ["AUTH", "REPORTS"]
+    assert pipeline.stages["broken"].status == "failed"
+    assert str(pipeline.stages["broken"].error) == "bad result"
+
+
+def test_invalid_graph():
+    _, stage = recorder()
+    pipeline = client.LoginPipeline()
+    pipeline.add("reports", stage("reports"), requires=["auth"])
+    with pytest.raises(ValueError, match="unknown auth"):
+        pipeline.run()
+
+    pipeline = client.LoginPipeline()
+    pipeline.add("a", stage("a"), requires=["b"])
+    pipeline.add("b", stage("b"), requires=["a"])
+    with pytest.raises(ValueError, match="cycle"):
+        pipeline.run()
+
+    with pytest.raises(ValueError, match="duplicate"):
+        pipeline.add("a", stage("a"))
+
+
+def test_format_timings():
+    _, stage = recorder()
+    pipeline = client.LoginPipeline()
+    pipeline.add("auth", stage("auth", 0.05))
+    pipeline.add("reports", stage("reports", error=client.RtxError("refused")))
+    pipeline.add("summary", stage("summary"), requires=["reports"])
+    pipeline.run()
+
+    timings = {
+        name: (start, elapsed, status)
+        for name, start, elapsed, status in pipeline.timings()
+    }
+    assert timings["auth"][1] >= 0.05
+    assert timings["summary"] == (None, None, "skipped")
+    # stages which never started sort last
+    assert pipeline.timings()[-1][0] == "summary"
+
+    lines = pipeline.format_timings().split("\n")
+    assert lines[0].split() == ["stage", "start", "elapsed", "status"]
+    assert len(lines) == 5
+    rows = {line.split()[0]: line for line in lines[1:-1]}
+    assert rows["auth"].split()[-1] == "done"
+    assert int(rows["auth"].split()[2]) >= 50
+    assert rows["reports"].endswith("failed (RtxError: refused)")
+    assert rows["summary"].split() == ["summary", "-", "-", "skipped"]
+    assert lines[-1].startswith("login pipeline")
+    assert int(lines[-1].split()[-1]) >= 50
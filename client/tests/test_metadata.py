@@ -0,0 +1,118 @@
+import json
+import time
+import pytest
+import client
+import client.identity as identity
+from client.rtxmeta import MetadataStore
+from standin import StandinServer, sample_payload
+
+
+def login_payload(username="alice"):
+    return {
+        "userid": "u-1",
+        "username": username,
+        "access_expiration": time.time() + 3600,
+        "capabilities": {
+            "columns": [("act_name", {})],
+            "data": [{"act_name": "get_api_reports"}],
+        },
+    }
+
+
+@pytest.fixture
+def appdata(tmp_path, monkeypatch):
+    monkeypatch.setattr(identity, "get_appdata_dir", lambda: str(tmp_path))
+    return tmp_path
+
+
+def save_login(appdata, server):
+    (appdata / "config").write_text(
+        f"[login]\nserver_url = {server.url}\nusername = alice\ndevice_token = dt\n"
+    )
+
+
+def test_store_round_trip(tmp_path):
+    path = str(tmp_path / "metadata" / "store.json")
+    store = MetadataStore(path)
+    assert store.body("login") == None
+    assert store.validators("login") == {}
+
+    store.put("login", {"username": "alice"})
+    store.put("reports", [1, 2], etag='"r1"', last_modified="Mon, 01 Jan 2024")
+
+    store = MetadataStore(path)
+    assert sorted(store.names()) == ["login", "reports"]
+    assert store.body("login") == {"username": "alice"}
+    assert store.body("reports") == [1, 2]
+    assert store.validators("login") == {}
+    assert store.validators("reports") == {
+        "If-None-Match": '"r1"',
+        "If-Modified-Since": "Mon, 01 Jan 2024",
+    }
+
+    store.discard("reports")
+    assert MetadataStore(path).names() == ["login"]
+
+
+def test_store_ignores_other_versions(tmp_path):
+    path = tmp_path / "store.json"
+    path.write_text(json.dumps({"version": 0, "entries": {"login": {"body": 1}}}))
+    assert MetadataStore(str(path)).names() == []
+
+    path.write_text("{not json")
+    store = MetadataStore(str(path))
+    assert store.names() == []
+    store.put("login", {"username": "alice"})
+    assert MetadataStore(str(path)).body("login") == {"username": "alice"}
+
+
+def test_restore_saved_login(appdata):
+    with StandinServer({"api/session": login_payload()}) as server:
+        save_login(appdata, server)
+        session = client.RtxSession(server.url, prewarm=False)
+        # nothing stored from an earlier session
+        assert not client.restore_yenotpass(session)
+
+        session.authenticate("alice", device_token="dt")
+        assert session.metadata.body("login")["username"] == "alice"
+
+        restored = client.RtxSession(None, prewarm=False)
+        assert client.restore_yenotpass(restored)
+        # drawn from the store before the background login is done
+        assert restored.rtx_username == "alice"
+        assert restored.authorized("get_api_reports")
+
+        restored.await_login()
+        assert restored.authenticated()
+        assert not restored.login_pending()
+        assert len(server.requests_to("api/session", "POST")) == 2
+
+
+def test_failed_background_login_is_raised_once(appdata):
+    answers = iter([{"unexpected": True}, login_payload()])
+
+    def session_payload(record):
+        return next(answers), None
+
+    payloads = {"api/session": session_payload, "api/r0": sample_payload(5)}
+    with StandinServer(payloads) as server:
+        save_login(appdata, server)
+        MetadataStore.for_login(server.url, "alice").put(
+            "login",
+            {k: v for k, v in login_payload().items() if k != "access_expiration"},
+        )
+
+        session = client.RtxSession(None, prewarm=False)
+        assert client.restore_yenotpass(session)
+        with pytest.raises(KeyError):
+            session.await_login()
+
+        # the error is not raised again by each later request
+        assert not session.login_pending()
+        session.await_login()
+        std = session.std_client()
+        assert isinstance(std.get("api/r0"), client.StdPayload)
+
+        # a fresh login recovers the session
+        session.authenticate("alice", device_token="dt")
+        assert session.authenticated()
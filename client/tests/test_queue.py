@@ -0,0 +1,86 @@
+import time
+import threading
+import pytest
+from client.rtxqueue import QueuedJobScheduler
+
+
+class Reply:
+    def __init__(self, status_code, headers=None, body=b""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.body = body
+        self.closed = False
+        self.reader = None
+
+    def read(self):
+        self.reader = threading.current_thread().name
+        return self.body
+
+    def close(self):
+        self.closed = True
+
+
+class Session:
+    """
+    Answer the polls of each location with its list of replies in turn.
+    """
+
+    def __init__(self, replies):
+        self.replies = replies
+
+    def build_request(self, method, url):
+        return url
+
+    def send(self, request, stream=False, follow_redirects=False):
+        return self.replies[request].pop(0)
+
+
+def accepted(location, **headers):
+    return Reply(202, {"Location": location, **headers})
+
+
+def read_body(r):
+    return r.read()
+
+
+def test_failed_poll_fails_only_its_job():
+    scheduler = QueuedJobScheduler(min_interval=0.01)
+    final = Reply(200, body=b"done")
+    session = Session(
+        {
+            "job/bad": [Reply(202)],
+            "job/odd": [accepted("job/odd", **{"Expected-Duration": "soon"})],
+            "job/good": [accepted("job/good"), final],
+        }
+    )
+    bad = scheduler.park(session, accepted("job/bad"), read_body)
+    odd = scheduler.park(session, accepted("job/odd"), read_body)
+    good = scheduler.park(session, accepted("job/good"), read_body)
+
+    with pytest.raises(KeyError):
+        bad.result(timeout=5)
+    with pytest.raises(ValueError):
+        odd.result(timeout=5)
+    assert good.result(timeout=5) == b"done"
+    # the body is read off the poll thread
+    assert final.reader.startswith("rtx-queued-finish")
+    assert final.closed
+
+    # the poll thread still serves new jobs
+    session.replies["job/later"] = [Reply(200, body=b"later")]
+    later = scheduler.park(session, accepted("job/later"), read_body)
+    assert later.result(timeout=5) == b"later"
+
+
+def test_poll_thread_restarts():
+    scheduler = QueuedJobScheduler(min_interval=0.01)
+    session = Session({"job/a": [Reply(200, body=b"a")]})
+    scheduler.park(session, accepted("job/a"), read_body).result(timeout=5)
+
+    # a poll thread which died is replaced by the next park
+    scheduler._thread = threading.Thread(target=lambda: None)
+    scheduler._thread.start()
+    scheduler._thread.join()
+    session.replies["job/b"] = [Reply(200, body=b"b")]
+    future = scheduler.park(session, accepted("job/b"), read_body)
+    assert future.result(timeout=5) == b"b"
@@ -0,0 +1,34 @@
+import httpx
+from client.rtxcache import ResponseCache
+
+
+def response(size, **headers):
+    return httpx.Response(200, headers={"ETag": '"x"', **headers}, content=b"x" * size)
+
+
+def test_byte_budget():
+    cache = ResponseCache(max_bytes=1000, max_entry_bytes=600)
+    for name in "abc":
+        cache.store(name, f"api/{name}", response(400), 0, name.upper())
+    # a and b do not both fit with c
+    assert cache.lookup("a") == None
+    assert cache.lookup("b").result == "B"
+    assert cache.lookup("c").result == "C"
+    assert cache.stats()["bytes"] == 800
+
+    assert cache.store("d", "api/d", response(700), 0, "D") == None
+    assert (
+        cache.store("e", "api/e", response(10, **{"Cache-Control": "no-store"}), 0, "E")
+        == None
+    )
+    assert cache.stats()["entries"] == 2
+
+
+def test_entry_keeps_result_only():
+    cache = ResponseCache()
+    entry = cache.store("a", "api/a", response(100), 0, "A")
+    assert not hasattr(entry, "content")
+    assert entry.validators() == {"If-None-Match": '"x"'}
+    cache.store("a", "api/a", response(50), 0, "A2")
+    assert cache.stats()["bytes"] == 50
+    assert cache.lookup("a").result == "A2"
@@ -0,0 +1,90 @@
+import time
+import httpx
+import pytest
+from client.rtxcancel import CancelScope
+from client.rtxretry import (
+    RetryPolicy,
+    CircuitBreakers,
+    RetryTransport,
+    CircuitOpenError,
+    host_key,
+)
+
+
+class Flaky(httpx.BaseTransport):
+    """
+    Answer each request with the next of outcomes (an exception to raise or
+    a status code).
+    """
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+
+    def handle_request(self, request):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, request=request)
+
+
+def open_client(outcomes):
+    breakers = CircuitBreakers(failure_threshold=1, reset_timeout=0.05)
+    policy = RetryPolicy(retries=0)
+    transport = RetryTransport(Flaky(outcomes), policy, breakers)
+    client = httpx.Client(transport=transport)
+    with pytest.raises(httpx.ConnectError):
+        client.get("http://rtx.example/api/a")
+    assert breakers.state("rtx.example") == "open"
+    with pytest.raises(CircuitOpenError):
+        client.get("http://rtx.example/api/a")
+    time.sleep(0.06)
+    return client, breakers
+
+
+@pytest.mark.parametrize(
+    "trial,state",
+    [
+        (httpx.ReadError("reset"), "open"),
+        (httpx.ReadTimeout("slow report"), "half-open"),
+        (ValueError("odd"), "half-open"),
+        (500, "open"),
+        (404, "closed"),
+        (200, "closed"),
+    ],
+)
+def test_half_open_trial_is_released(trial, state):
+    ok = 200
+    client, breakers = open_client([httpx.ConnectError("down"), trial, ok])
+    if isinstance(trial, Exception):
+        with pytest.raises(type(trial)):
+            client.get("http://rtx.example/api/a")
+    else:
+        assert client.get("http://rtx.example/api/a").status_code == trial
+    # only a failure to reach the server or a server error opens the
+    # breaker again; otherwise the next request is the trial
+    assert breakers.state("rtx.example") == state
+    if state == "open":
+        time.sleep(0.06)
+    assert client.get("http://rtx.example/api/a").status_code == ok
+    assert breakers.state("rtx.example") == "closed"
+
+
+def test_host_key():
+    assert host_key("https://rtx.example:443/api") == host_key("https://rtx.example/")
+    assert host_key("http://rtx.example:8080/") == "rtx.example:8080"
+    assert host_key(httpx.URL("http://RTX.example/")) == "rtx.example"
+
+
+def test_cancelled_trial_is_released():
+    client, breakers = open_client(
+        [httpx.ConnectError("down"), httpx.ReadError("x"), 200]
+    )
+    scope = CancelScope()
+    scope.cancel()
+    with scope:
+        with pytest.raises(httpx.ReadError):
+            client.get("http://rtx.example/api/a")
+    # a client abort is not a failure and the next request is the trial
+    assert breakers.state("rtx.example") == "half-open"
+    assert client.get("http://rtx.example/api/a").status_code == 200
+    assert breakers.state("rtx.example") == "closed"
@@ -0,0 +1,64 @@
+import json
+import pytest
+from client.rtxstream import PositionalRows, decode_payload
+
+DOCUMENT = {
+    "total": 12.5,
+    "n": 1e-05,
+    "big": -12345678901234567890,
+    "flags": [True, False, None],
+    "note": 'café ✓ \U0001f600 "quoted"',
+    "trans": {
+        "columns": [["tid", None], ["amount", {"type": "currency_usd"}]],
+        "data": [
+            {"tid": 1, "amount": 10.25},
+            {"tid": 22, "amount": -3e2},
+            {"amount": 0, "tid": 333},
+        ],
+    },
+    "empty": {"columns": [], "data": []},
+}
+
+EXPECTED = dict(
+    DOCUMENT,
+    trans={
+        "columns": DOCUMENT["trans"]["columns"],
+        "data": [(1, 10.25), (22, -300.0), (333, 0)],
+    },
+    empty={"columns": [], "data": []},
+)
+
+# compact & spaced out as different servers write it
+BODIES = [
+    json.dumps(DOCUMENT, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+    json.dumps(DOCUMENT, indent=2).encode("utf-8"),
+]
+
+
+def check(chunks):
+    result = decode_payload(chunks)
+    assert result == EXPECTED
+    assert isinstance(result["trans"]["data"], PositionalRows)
+
+
+@pytest.mark.parametrize("body", BODIES, ids=["compact", "indented"])
+def test_split_at_every_offset(body):
+    for offset in range(len(body) + 1):
+        check([body[:offset], body[offset:]])
+
+
+@pytest.mark.parametrize("body", BODIES, ids=["compact", "indented"])
+def test_byte_at_a_time(body):
+    check([body[i : i + 1] for i in range(len(body))])
+
+
+@pytest.mark.parametrize("body", [b"12.5", b"[1e-05, 2]", b'"text"'])
+def test_not_a_payload(body):
+    for offset in range(len(body) + 1):
+        assert decode_payload([body[:offset], body[offset:]]) == json.loads(body)
+
+
+@pytest.mark.parametrize("body", [b'{"a": 1} x', b'{"a": 12.5', b'{"a": 1.}'])
+def test_invalid(body):
+    with pytest.raises(ValueError):
+        decode_payload([body])
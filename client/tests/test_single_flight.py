@@ -0,0 +1,49 @@
+import time
+import concurrent.futures as futures
+import client
+from standin import StandinServer, sample_payload
+
+
+def slow_queued_server():
+    return StandinServer(
+        {"api/slow": sample_payload(20)},
+        delays={"api/slow": 0.3},
+        queued={"api/slow": 0.3},
+    )
+
+
+def test_blocking_call_does_not_join_deferred():
+    with slow_queued_server() as server:
+        session = client.RtxSession(server.url, prewarm=False)
+        std = session.std_client()
+        with futures.ThreadPoolExecutor(1) as pool:
+            deferred = pool.submit(std.get, "api/slow", defer_queued=True)
+            time.sleep(0.1)
+            blocking = std.get("api/slow")
+
+        assert isinstance(blocking, client.StdPayload)
+        parked = deferred.result()
+        assert isinstance(parked, futures.Future)
+        assert isinstance(parked.result(timeout=5), client.StdPayload)
+        assert session.single_flight.stats()["coalesced"] == 0
+
+
+def test_leader_cancel_leaves_followers():
+    with slow_queued_server() as server:
+        session = client.RtxSession(server.url, prewarm=False)
+        std = session.std_client()
+        leader, invoke_leader = std.future_invocation()
+        follower, invoke_follower = std.future_invocation()
+        with futures.ThreadPoolExecutor(2) as pool:
+            first = pool.submit(invoke_leader, "api/slow")
+            time.sleep(0.1)
+            second = pool.submit(invoke_follower, "api/slow")
+            parked1, parked2 = first.result(), second.result()
+
+        assert session.single_flight.stats()["coalesced"] == 1
+        assert parked1 is not parked2
+        leader.cancel()
+        assert parked1.cancelled()
+        assert isinstance(parked2.result(timeout=5), client.StdPayload)
+        # the shared job was not cancelled on the server
+        assert server.requests_to("api/request/cancel", method="PUT") == []
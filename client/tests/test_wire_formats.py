@@ -0,0 +1,94 @@
+import json
+import uuid
+import decimal
+import datetime
+import pytest
+import rtlib
+import client
+from standin import StandinServer, sample_payload
+
+
+@pytest.fixture
+def standin():
+    with StandinServer({"api/sample": sample_payload(500)}) as server:
+        yield server
+
+
+def table_values(table):
+    attrs = table.DataRow.__slots__
+    return [tuple(getattr(r, a) for a in attrs) for r in table.rows]
+
+
+def json_table(payload):
+    text = rtlib.server.serialize(payload)
+    return client.StdPayload(text).main_table()
+
+
+def test_columnar_round_trip():
+    payload = sample_payload(50)
+    restored = rtlib.server.uncolumnar(rtlib.server.columnar(payload), rows=list)
+    plain = client.StdPayload(rtlib.server.serialize(payload))
+    assert restored["headers"] == plain.keys["headers"]
+    assert restored["trans"]["data"][3] == tuple(
+        plain.keys["trans"]["data"][3].values()
+    )
+
+
+@pytest.mark.parametrize("ctype", rtlib.server.wire_formats())
+def test_negotiated_table(standin, ctype):
+    session = client.RtxSession(standin.url, prewarm=False)
+    session.wire_formats = [ctype]
+    content = session.std_client().get("api/sample")
+
+    assert standin.requests[-1]["Accept"].startswith(ctype)
+    assert table_values(content.main_table()) == table_values(
+        json_table(sample_payload(500))
+    )
+
+
+def test_json_fallback():
+    with StandinServer({"api/sample": sample_payload(20)}, negotiate=False) as server:
+        session = client.RtxSession(server.url, prewarm=False)
+        content = session.std_client().get("api/sample")
+        assert table_values(content.main_table()) == table_values(
+            json_table(sample_payload(20))
+        )
+
+        # only payload factories ask for the compact formats
+        session.json_client().get("api/sample")
+        assert "rtlib" not in server.requests[-1].get("Accept", "")
+
+
+def test_json_stream():
+    payload = sample_payload(300)
+    expected = json.loads(json.dumps(payload, cls=rtlib.server.DateTimeEncoder))
+    assert json.loads(rtlib.server.serialize(payload)) == expected
+    chunks = list(rtlib.server.to_json_stream(payload, rows=64))
+    assert b"".join(chunks) == rtlib.server.to_json(payload).getvalue()
+    assert len(chunks) > 5
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        float("nan"),
+        float("-inf"),
+        decimal.Decimal("NaN"),
+        datetime.datetime(
+            1850, 1, 1, tzinfo=datetime.timezone(datetime.timedelta(seconds=-21036))
+        ),
+        {1: "int key"},
+        2**70,
+    ],
+)
+def test_json_edge_cases(value):
+    payload = {"columns": ["x"], "data": [{"x": 1.5}, {"x": value}]}
+    std = json.dumps(payload, cls=rtlib.server.DateTimeEncoder)
+    assert rtlib.server.serialize(payload) == std
+    chunks = rtlib.server.to_json_stream(payload, rows=1)
+    assert json.loads(b"".join(chunks)) == json.loads(std)
+
+
+def test_json_rejects_as_json():
+    with pytest.raises(TypeError):
+        rtlib.server.serialize({"x": uuid.uuid4()})
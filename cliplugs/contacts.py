@@ -305,8 +305,11 @@ def dump_tagged_contacts(cmd, args):
 
     personas = client.get("api/personas/list", tag_id=tag_id)
 
-    for persona in personas.main_table().rows:
-        content = client.get("api/persona/{}", persona.id)
+    specs = [("get", "api/persona/{}", p.id) for p in personas.main_table().rows]
+    for result in client.map(specs):
+        if not result.ok:
+            print(f"error loading {result.spec}:  {result.error}")
+            continue
 
-        print(persona_to_text(content, static=True, tagtable=tags.main_table()))
+        print(persona_to_text(result.value, static=True, tagtable=tags.main_table()))
         print("\n#=-=#=-=#=-=#=-=#=-=#=-=#=-=#=-=#\n")
@@ -0,0 +1,26 @@
+import re
+import replicate as api
+
+cli = api.get_global_router()
+
+
+@cli.command
+def perfstats(cmd, args):
+    # perfstats [reset | <endpoint regex>]
+    stats = cli.session.perf
+    if len(args) > 0 and args[0] == "reset":
+        stats.reset()
+        return
+
+    table = stats.as_table()
+    if len(args) > 0:
+        regex = args[0]
+        table.rows = [
+            row
+            for row in table.rows
+            if re.search(regex, row.endpoint, flags=re.IGNORECASE)
+        ]
+    if len(table.rows) == 0:
+        print("no requests timed")
+        return
+    api.show_table(table, max_rows=len(table.rows), max_colwidth=40)
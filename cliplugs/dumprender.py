@@ -0,0 +1,40 @@
+"""
+The rendering half of the finance dumps.  It runs in the worker processes of
+run_dump, which import this module by itself; it must not need the CLI router
+which cliplugs.finance registers its commands on.
+"""
+
+import os
+import hashlib
+import rtlib
+import client as climod
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def init_renderer(type_plugins):
+    """
+    Install the type definition plugins of the parent process in a worker so
+    that the columns are formatted alike.
+    """
+    for tplug in type_plugins:
+        rtlib.add_type_definition_plugin(tplug)
+
+
+def render_html(payload, outfile, rptclass):
+    """
+    Write the html of payload (the keys of a StdPayload) to outfile and
+    return its sha256.  This runs in a worker process so the arguments are
+    plain data.  The html is written to a .part file & renamed so that
+    outfile is never left half written.
+    """
+    content = climod.StdPayload(payload)
+    rtlib.server.content_write_html(content, outfile + ".part", rptclass)
+    os.replace(outfile + ".part", outfile)
+    return file_sha256(outfile)
@@ -1,7 +1,13 @@
 import os
+import json
 import datetime
+import threading
+import urllib.parse
+import multiprocessing
+import concurrent.futures as futures
 import rtlib
 import replicate as api
+from .dumprender import file_sha256, init_renderer, render_html
 
 cli = api.get_global_router()
 
@@ -78,62 +84,247 @@ def tran_new(cmd, args):
 
 @cli.command
 def month(cmd, args):
+    # month [--jobs N] <output directory>
+    jobs, args = parse_jobs(args)
     if len(args) == 0:
         raise api.UserError("specify an output directory for the month files")
-    dump_prior_month(cli.session, args[0])
+    dump_prior_month(cli.session, args[0], jobs=jobs)
 
 
 @cli.command
 def dumpyears(cmd, args):
+    # dumpyears [--jobs N] <output directory>
+    jobs, args = parse_jobs(args)
     if len(args) == 0:
         raise api.UserError("specify an output directory for the year sub-directories")
-    dump_data(cli.session, args[0])
+    dump_data(cli.session, args[0], jobs=jobs)
+
+
+def parse_jobs(args):
+    """
+    Return the value of a --jobs N (or --jobs=N) option in args and the
+    remaining args.  The default is min(4, cpu count).
+    """
+    jobs = min(4, os.cpu_count() or 1)
+    rest = []
+    args = list(args)
+    while len(args) > 0:
+        arg = args.pop(0)
+        if arg == "--jobs" or arg.startswith("--jobs="):
+            value = arg[len("--jobs=") :] if "=" in arg else None
+            if value == None:
+                if len(args) == 0:
+                    raise api.UserError("--jobs requires a number")
+                value = args.pop(0)
+            try:
+                jobs = int(value)
+            except ValueError:
+                raise api.UserError(f"--jobs requires a number (not {value})")
+            if jobs < 1:
+                raise api.UserError("--jobs must be at least 1")
+        else:
+            rest.append(arg)
+    return jobs, rest
+
+
+MANIFEST_NAME = "dump-manifest.json"
+
+
+class DumpFile:
+    """
+    One html file of a dump:  the report fetched with tail & params and
+    rendered by content_write_html as rptclass to path (relative to the
+    output directory).  A file of a closed period (resumable) is not
+    dumped again while it matches its manifest entry.
+    """
+
+    def __init__(self, path, rptclass, tail, resumable=True, **params):
+        self.path = path
+        self.rptclass = rptclass
+        self.tail = tail
+        self.params = params
+        self.resumable = resumable
+
+    @property
+    def request_key(self):
+        params = sorted((k, str(v)) for k, v in self.params.items())
+        return f"{self.tail}?{urllib.parse.urlencode(params)}"
+
+
+def read_manifest(outdir):
+    try:
+        with open(os.path.join(outdir, MANIFEST_NAME), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(outdir, manifest):
+    path = os.path.join(outdir, MANIFEST_NAME)
+    with open(path + ".part", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".part", path)
+
+
+def is_dumped(outdir, manifest, dfile):
+    """
+    Return True if the file of dfile was written by a prior dump of the same
+    request and is unchanged since (i.e. not missing or truncated).
+    """
+    entry = manifest.get(dfile.path)
+    if not dfile.resumable or entry == None:
+        return False
+    if entry["request"] != dfile.request_key:
+        return False
+    try:
+        return file_sha256(os.path.join(outdir, dfile.path)) == entry["sha256"]
+    except OSError:
+        return False
+
+
+def run_dump(session, outdir, dfiles, jobs):
+    """
+    Fetch & render the DumpFile list dfiles skipping those already dumped.
+    At most jobs reports are fetched at once and rendered in a pool of jobs
+    processes; a report is fetched while others render.  Fetched payloads
+    waiting to be rendered are bounded as well.  The manifest is updated as
+    each file is finished so that an interrupted dump resumes where it
+    stopped.
+    """
+    manifest = read_manifest(outdir)
+    pending = [d for d in dfiles if not is_dumped(outdir, manifest, d)]
+    skipped = len(dfiles) - len(pending)
+    if skipped > 0:
+        print(f"Skipping {skipped} unchanged files of a prior dump")
+    if len(pending) == 0:
+        return
+
+    for d in pending:
+        os.makedirs(os.path.dirname(os.path.join(outdir, d.path)), exist_ok=True)
+
+    stream = session.stream_client()
+    # a slot is held from the fetch until the render finishes
+    slots = threading.Semaphore(2 * jobs)
+
+    def get_payload(dfile):
+        return stream.get(dfile.tail, **dfile.params).keys
+
+    def fetch(dfile):
+        slots.acquire()
+        try:
+            return get_payload(dfile)
+        except BaseException:
+            slots.release()
+            raise
+
+    def finish(dfile, sha256):
+        manifest[dfile.path] = {"request": dfile.request_key, "sha256": sha256}
+        write_manifest(outdir, manifest)
+        print(f"Wrote {dfile.path}")
+
+    failures = []
+    if jobs == 1:
+        # in process with-out pools
+        for dfile in pending:
+            try:
+                outfile = os.path.join(outdir, dfile.path)
+                payload = get_payload(dfile)
+                finish(dfile, render_html(payload, outfile, dfile.rptclass))
+            except Exception as e:
+                failures.append((dfile, e))
+    else:
+        # Forking this process (with the threads of the session) can leave a
+        # worker holding a lock no thread will release; spawned workers
+        # start clean on every platform.
+        renderers = futures.ProcessPoolExecutor(
+            jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_renderer,
+            initargs=(list(rtlib.reportcore.TYPE_DEFINITION_PLUGINS),),
+        )
+        with renderers:
+            with futures.ThreadPoolExecutor(jobs) as fetchers:
+                fetching = {fetchers.submit(fetch, d): d for d in pending}
+                rendering = {}
+                waiting = set(fetching)
+                while len(waiting) > 0:
+                    done, waiting = futures.wait(
+                        waiting, return_when=futures.FIRST_COMPLETED
+                    )
+                    for f in done:
+                        if f in fetching:
+                            dfile = fetching.pop(f)
+                            if f.exception() != None:
+                                failures.append((dfile, f.exception()))
+                                continue
+                            outfile = os.path.join(outdir, dfile.path)
+                            rf = renderers.submit(
+                                render_html, f.result(), outfile, dfile.rptclass
+                            )
+                            rendering[rf] = dfile
+                            waiting.add(rf)
+                        else:
+                            dfile = rendering.pop(f)
+                            slots.release()
+                            if f.exception() != None:
+                                failures.append((dfile, f.exception()))
+                            else:
+                                finish(dfile, f.result())
+
+    for dfile, e in failures:
+        print(f"Failed {dfile.path}:  {e}")
+    if len(failures) > 0:
+        raise api.UserError(
+            f"{len(failures)} files were not written; run again to resume"
+        )
 
 
-def dump_data(session, outdir):
-    client = session.std_client()
+def dump_data(session, outdir, jobs=1):
+    client = session.stream_client()
 
     ycontent = client.get("api/transactions/years")
     years = ycontent.main_table()
 
     small_year, big_year = int(years.rows[0].year), int(years.rows[-1].year)
 
-    datadir = outdir
+    # the current year (or later) is still changing
+    open_year = datetime.date.today().year
 
+    dfiles = []
     for year in range(small_year, big_year + 1):
-        dest = os.path.join(datadir, str(year))
-        if not os.path.exists(dest):
-            os.makedirs(dest)
-
-        bscontent = client.get(
-            "api/gledger/balance-sheet", date=datetime.date(year, 12, 31)
-        )
-        bsfile = os.path.join(datadir, str(year), f"bal_sheet_{year}.html")
-        rtlib.server.content_write_html(bscontent, bsfile, "BalanceSheet")
-
-        trancontent = client.get(
-            "api/transactions/tran-detail",
-            date1=datetime.date(year, 1, 1),
-            date2=datetime.date(year, 12, 31),
-        )
-        tranfile = os.path.join(datadir, str(year), f"transactions_{year}.html")
-        rtlib.server.content_write_html(trancontent, tranfile, "TransactionList")
-
-        plcontent = client.get(
-            "api/gledger/detailed-pl",
-            date1=datetime.date(year, 1, 1),
-            date2=datetime.date(year, 12, 31),
-        )
-        plfile = os.path.join(datadir, str(year), f"detail_pl_{year}.html")
-        rtlib.server.content_write_html(plcontent, plfile, "DetailedProfitAndLoss")
-
-
-def dump_prior_month(session, outdir):
-    client = session.std_client()
-
-    if not os.path.exists(outdir):
-        os.makedirs(outdir)
-
+        date1 = datetime.date(year, 1, 1)
+        date2 = datetime.date(year, 12, 31)
+        resumable = year < open_year
+        dfiles += [
+            DumpFile(
+                os.path.join(str(year), f"bal_sheet_{year}.html"),
+                "BalanceSheet",
+                "api/gledger/balance-sheet",
+                resumable=resumable,
+                date=date2,
+            ),
+            DumpFile(
+                os.path.join(str(year), f"transactions_{year}.html"),
+                "TransactionList",
+                "api/transactions/tran-detail",
+                resumable=resumable,
+                date1=date1,
+                date2=date2,
+            ),
+            DumpFile(
+                os.path.join(str(year), f"detail_pl_{year}.html"),
+                "DetailedProfitAndLoss",
+                "api/gledger/detailed-pl",
+                resumable=resumable,
+                date1=date1,
+                date2=date2,
+            ),
+        ]
+
+    run_dump(session, outdir, dfiles, jobs)
+
+
+def dump_prior_month(session, outdir, jobs=1):
     td = datetime.date.today()
     year, month = td.year, td.month
     if month == 1:
@@ -145,18 +336,28 @@ def dump_prior_month(session, outdir):
 
     print(f"Dumping history {month_begin} to {month_end}")
 
-    bscontent = client.get("api/gledger/balance-sheet", date=month_end)
-    bsfile = os.path.join(outdir, "BalanceSheet.html")
-    rtlib.server.content_write_html(bscontent, bsfile, "BalanceSheet")
-
-    plcontent = client.get(
-        "api/gledger/detailed-pl", date1=month_begin, date2=month_end
-    )
-    plfile = os.path.join(outdir, "DetailedProfitLoss.html")
-    rtlib.server.content_write_html(plcontent, plfile, "DetailPL")
-
-    plcontent = client.get(
-        "api/gledger/interval-p-and-l", ending_date=month_end, intervals=3, length=6
-    )
-    plfile = os.path.join(outdir, "IntervalPL.html")
-    rtlib.server.content_write_html(plcontent, plfile, "IntervalPL")
+    dfiles = [
+        DumpFile(
+            "BalanceSheet.html",
+            "BalanceSheet",
+            "api/gledger/balance-sheet",
+            date=month_end,
+        ),
+        DumpFile(
+            "DetailedProfitLoss.html",
+            "DetailPL",
+            "api/gledger/detailed-pl",
+            date1=month_begin,
+            date2=month_end,
+        ),
+        DumpFile(
+            "IntervalPL.html",
+            "IntervalPL",
+            "api/gledger/interval-p-and-l",
+            ending_date=month_end,
+            intervals=3,
+            length=6,
+        ),
+    ]
+
+    run_dump(session, outdir, dfiles, jobs)
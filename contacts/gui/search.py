@@ -1057,7 +1057,8 @@ class ContactsList(QtWidgets.QWidget):
 
         i1 = None
         if self.last_edit != None:
-            row = [xx for xx in self.table.rows if xx.id == self.last_edit]
+            edited = self.table.get_by_key(self.last_edit, attrs="id")
+            row = [edited] if edited != None else []
             if len(row) > 0:
                 i1, _ = self.grid.model().index_object(row[0])
         elif len(self.table.rows) == 1:
@@ -17,6 +17,11 @@ class RoscoeExtensions:
         if state.session.authorized("get_api_roscoe_unprocessed"):
             self.roscoe_timer = roscoe.setup_timer(state.session, parent)
 
+    def login_stages(self, state, parent, pipeline):
+        if state.session.authorized("get_api_roscoe_unprocessed"):
+            fetch, show = roscoe.startup_check(state.session, parent)
+            pipeline.add("roscoe", fetch, requires=["auth"], apply=show)
+
     def show_link_parented(self, state, parent, url):
         if url.scheme() != "pyhacc":
             return False
@@ -53,6 +58,15 @@ class RoscoeExtensions:
 
 
 class AccountingExtensions:
+    def login_stages(self, state, parent, pipeline):
+        # the settings behind the account type & journal combos
+        names = [STATIC.account_types, STATIC.journals]
+        pipeline.add(
+            "static_settings",
+            lambda: state.session.ensure_static_settings(names),
+            requires=["auth"],
+        )
+
     def show_link_parented(self, state, parent, url):
         if url.scheme() != "pyhacc":
             return False
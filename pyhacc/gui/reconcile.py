@@ -11,7 +11,9 @@ class ReconciliationModel:
     def from_endpoint(cls, controller, payload):
         self = cls()
 
-        self.trans = payload.named_table("trans", mixin=mxc.ModelRow)
+        self.trans = payload.named_table(
+            "trans", mixin=mxc.ModelRow, track_changes=True
+        )
         self.trans.DataRow.controller = controller
         self.accounttable = payload.named_table("account", mixin=mxc.ModelRow)
         self.accounttable.DataRow.controller = controller
@@ -21,8 +23,9 @@ class ReconciliationModel:
 
     def http_files(self):
         return {
+            # only the splits toggled since loading
             "trans": self.trans.as_http_post_file(
-                inclusions=["sid", "pending", "reconciled"]
+                inclusions=["sid", "pending", "reconciled"], only_dirty=True
             ),
             "account": self.accounttable.as_http_post_file(
                 inclusions=["id", "rec_note"]
@@ -120,15 +120,30 @@ class PendingRoscoe(QtWidgets.QWidget):
             self.initial_load()
 
 
-def setup_timer(session, parent):
-    def check_roscoe():
-        client = session.std_client()
-        payload = client.get(PendingRoscoe.URL)
+def startup_check(session, parent):
+    """
+    Return the (fetch, show) pair of the login pipeline stage checking for
+    pending roscoe items; show is called on the GUI thread.
+    """
+
+    def fetch():
+        return session.std_client().get(PendingRoscoe.URL)
+
+    def show(payload):
         table = payload.main_table()
 
         if len(table.rows):
             parent.handle_url("pyhacc:roscoe/dock")
 
+    return fetch, show
+
+
+def setup_timer(session, parent):
+    fetch, show = startup_check(session, parent)
+
+    def check_roscoe():
+        show(fetch())
+
     # TODO setup a long poll rather than timer based
     timer = QtCore.QTimer(parent)
     timer.setInterval(60 * 1000)
@@ -1,8 +1,12 @@
 import contextlib
 import collections
+import itertools
+import operator
 from . import reportcore
 from . import html
 from . import server
+from . import columnar as columnar_store
+from . import lazyrows
 
 
 def augment_table(table, insert_columns, xform):
@@ -90,12 +94,58 @@ class ClientTable:
     This class and TypedTable present the same html generating API.   This
     class could be considered derived from TypedTable, but I'm uncomfortable
     with directly implementing it in that way.
+
+    With columnar the values are kept per column in compact arrays (see
+    rtlib.columnar) and rows is a sequence of DataRow views created as they
+    are accessed.  This is much smaller for large read-mostly tables.
+
+    With lazy the DataRow objects are built in chunks as they are first
+    accessed (see rtlib.lazyrows) so that a view of the first rows of a very
+    large table need not wait for the rest.
+
+    With track_changes each row keeps a snapshot of its values as loaded (see
+    SlottedRow._snapshot) so that as_writable(only_dirty=True) sends the
+    changed & added rows only.
     """
 
-    def __init__(self, columns, rows, mixin=None, cls_members=None, to_localtime=True):
+    def __init__(
+        self,
+        columns,
+        rows,
+        mixin=None,
+        cls_members=None,
+        to_localtime=True,
+        positional=False,
+        columnar=False,
+        lazy=False,
+        track_changes=False,
+    ):
+        # positional rows are sequences in column order rather than dicts
         self.to_localtime = to_localtime
-        f = self.row_factory(columns, mixin=mixin, cls_members=cls_members)
-        self.rows = [f(x) for x in rows]
+        self.positional = positional
+        self.row_factory(columns, mixin=mixin, cls_members=cls_members)
+        init = hasattr(self.DataRow, "_rtlib_init_")
+        if columnar and lazy:
+            raise ValueError("a ClientTable is columnar or lazy, not both")
+        if columnar and track_changes:
+            raise ValueError("a columnar ClientTable does not track changes")
+        self.track_changes = track_changes
+        if lazy:
+            self.rows = lazyrows.LazyRows(rows, self.row_builder(columns, init))
+        elif columnar:
+            values = self.python_values(columns, rows)
+            self.rows = columnar_store.ColumnarRows.from_tuples(
+                self.DataRow, values, init=init
+            )
+        else:
+            values = self.python_values(columns, rows)
+            self.rows = list(map(self.DataRow._make, values))
+            if init:
+                for row in self.rows:
+                    row._rtlib_init_()
+            if track_changes:
+                for row in self.rows:
+                    row._snapshot()
 
         # initialize pkey for deletion
         pkey = [
@@ -104,6 +154,7 @@ class ClientTable:
             if col[1] != None and col[1].get("primary_key", False)
         ]
         self.pkey = pkey
+        self._key_indexes = {}
 
         self.columns = reportcore.parse_columns(columns)
         self.columns_full = reportcore.parse_columns_full(columns)
@@ -119,6 +170,8 @@ class ClientTable:
         x.columns = self.columns
         x.columns_full = self.columns_full
         x.pkey = self.pkey
+        x._key_indexes = {}
+        x.track_changes = self.track_changes
         if deleted == "duplicate":
             x.deleted_rows = list(self.deleted_rows)
         else:
@@ -126,28 +179,134 @@ class ClientTable:
         return x
 
     def converter(self, row_field_list):
-        return reportcore.as_python(row_field_list, to_localtime=self.to_localtime)
+        return reportcore.as_python(
+            row_field_list, to_localtime=self.to_localtime, positional=self.positional
+        )
+
+    def bulk_converter(self, row_field_list):
+        return reportcore.as_python_columns(
+            row_field_list, to_localtime=self.to_localtime, positional=self.positional
+        )
+
+    def _rows_converter(self, row_field_list):
+        # A subclass overriding only converter (the per row method which
+        # came before bulk_converter) has its converter applied to each row.
+        for klass in type(self).__mro__:
+            if "bulk_converter" in vars(klass):
+                return self.bulk_converter(row_field_list)
+            if "converter" in vars(klass):
+                convert = self.converter(row_field_list)
+                return lambda block: list(map(convert, block))
+
+    def python_values(self, row_field_list, rows, chunk=4096):
+        """
+        Yield the tuple of Python values of each of rows.  The values are
+        converted a column at a time in chunks of rows.
+        """
+        convert = self._rows_converter(row_field_list)
+        rows = iter(rows)
+        while True:
+            block = list(itertools.islice(rows, chunk))
+            if len(block) == 0:
+                break
+            yield from convert(block)
+
+    def row_builder(self, row_field_list, init):
+        """
+        Return a function building the DataRow objects of a list of rows.
+        The rows are snapshot if the table tracks changes when they are
+        built (see mark_clean).
+        """
+        convert = self._rows_converter(row_field_list)
+        make = self.DataRow._make
+
+        def build(block):
+            built = list(map(make, convert(block)))
+            if init:
+                for row in built:
+                    row._rtlib_init_()
+            if self.track_changes:
+                for row in built:
+                    row._snapshot()
+            return built
+
+        return build
 
     def row_factory(self, row_field_list, mixin, cls_members=None):
-        self.DataRow = reportcore.fixedrecord(
+        record = reportcore.cached_fixedrecord(
             "DataRow",
             [r[0] for r in row_field_list],
             mixin=mixin,
             cls_members=cls_members,
         )
-        to_python = self.converter(row_field_list)
-
-        def init_bare(r):
-            nonlocal to_python, self
-            return self.DataRow(*to_python(r))
-
-        def init_custom(r):
-            nonlocal to_python, self
-            x = self.DataRow(*to_python(r))
-            x._rtlib_init_()
-            return x
-
-        return init_custom if hasattr(self.DataRow, "_rtlib_init_") else init_bare
+        # a class of this table for the class attributes set per table (e.g.
+        # model_columns)
+        self.DataRow = type("DataRow", (record,), {})
+
+    def _key_function(self, attrs):
+        if len(attrs) == 0:
+            raise RuntimeError("no primary key declared; needed for a keyed lookup")
+        # a single attribute gives the bare value, several a tuple
+        return operator.attrgetter(*attrs)
+
+    def _key_attrs(self, attrs):
+        if attrs == None:
+            return tuple(self.pkey)
+        if isinstance(attrs, str):
+            return (attrs,)
+        return tuple(attrs)
+
+    def key_index(self, attrs=None):
+        """
+        Return a dictionary of the rows by key; the key is the primary key
+        (or the value of attrs, an attribute name or list of them).  For a
+        key with several attributes it is a tuple.  A key held by several
+        rows maps to the first.
+
+        The index is kept with the table and rebuilt after recorded_delete,
+        bulk_delete & merge or when the number of rows changes.  After rows
+        are replaced or a key value is changed in place call reindex.
+        """
+        return self._keyed(self._key_attrs(attrs))[0]
+
+    def _keyed(self, attrs):
+        # the index of attrs & the position in rows of each row of it
+        token = (id(self.rows), len(self.rows))
+        cached = self._key_indexes.get(attrs)
+        if cached != None and cached[0] == token:
+            return cached[1:]
+        keyf = self._key_function(attrs)
+        index, positions = {}, {}
+        for pos, row in enumerate(self.rows):
+            key = keyf(row)
+            if key not in index:
+                index[key] = row
+                positions[key] = pos
+        self._key_indexes[attrs] = (token, index, positions)
+        return index, positions
+
+    def reindex(self):
+        self._key_indexes = {}
+
+    def get_by_key(self, key, default=None, attrs=None):
+        """
+        Return the row with the given key (see key_index) or default.  A row
+        found is checked to be in rows at its indexed position & with the
+        key; if it is not the index is stale (rows were replaced or a key
+        changed in place) and is rebuilt to look the key up again.  A key
+        not in the index is not looked for further.
+        """
+        attrs = self._key_attrs(attrs)
+        keyf = self._key_function(attrs)
+        index, positions = self._keyed(attrs)
+        row = index.get(key)
+        if row == None:
+            return default
+        pos = positions[key]
+        if pos < len(self.rows) and self.rows[pos] is row and keyf(row) == key:
+            return row
+        self.reindex()
+        return self._keyed(attrs)[0].get(key, default)
 
     def recorded_delete(self, row):
         index = self.rows.index(row)
@@ -159,6 +318,105 @@ class ClientTable:
 
         self.deleted_rows.append(row)
         del self.rows[index]
+        self.reindex()
+
+    def bulk_delete(self, rows=None, keys=None):
+        """
+        Delete the given rows and the rows of the given primary keys
+        recording them for as_writable as recorded_delete does.  This is one
+        pass over the table however many rows are deleted.
+        """
+        doomed = {id(r): r for r in (rows if rows != None else [])}
+        if keys != None:
+            # rebuilt; the rows are all visited below in any case
+            self.reindex()
+            index = self.key_index()
+            for key in keys:
+                if key in index:
+                    doomed[id(index[key])] = index[key]
+        if len(doomed) == 0:
+            return []
+
+        kept, removed = [], []
+        for row in self.rows:
+            (removed if id(row) in doomed else kept).append(row)
+        for row in removed:
+            row.__deleted__ = True
+        self.deleted_rows.extend(removed)
+        self.rows[:] = kept
+        self.reindex()
+        return removed
+
+    def merge(self, other, remove_missing=True):
+        """
+        Update this table in place from other (e.g. a table of the same
+        report or list reloaded from the server) matching rows by primary
+        key.  A row of both keeps its identity and takes the values of
+        other (unsaved edits of it are lost); rows only of other are added
+        and, with remove_missing, rows only of this table are dropped.  Rows
+        with-out a key (e.g. added & not yet saved) are kept at the end.  The
+        rows take the order of other; a key repeated in other takes the
+        first row of it.
+
+        Values are set with-out calling the __setattr__ of a mixin so a merge
+        does not mark a screen dirty.  Return the lists (added, changed,
+        removed) of rows.
+        """
+        attrs = list(self.DataRow.__slots__)
+        if list(other.DataRow.__slots__) != attrs:
+            raise ValueError("merge needs tables with the same columns")
+        keyattrs = self._key_attrs(None)
+        keyf = self._key_function(keyattrs)
+        self.reindex()
+        # a copy as the rows added are indexed as well
+        index = dict(self.key_index())
+        init = hasattr(self.DataRow, "_rtlib_init_")
+
+        def unsaved(key):
+            if len(keyattrs) == 1:
+                return key == None
+            return None in key
+
+        merged, added, changed = [], [], []
+        seen = set()
+        for incoming in other.rows:
+            values = incoming._as_tuple()
+            key = keyf(incoming)
+            row = None if unsaved(key) else index.get(key)
+            if row != None and id(row) in seen:
+                # other repeats a key; the first row of it is kept
+                continue
+            if row == None:
+                row = self.DataRow._make(values)
+                if init:
+                    row._rtlib_init_()
+                if not unsaved(key):
+                    index[key] = row
+                added.append(row)
+            else:
+                current = row._as_tuple()
+                if current != values:
+                    for attr, old, new in zip(attrs, current, values):
+                        if old != new:
+                            object.__setattr__(row, attr, new)
+                    changed.append(row)
+            if self.track_changes:
+                row._snapshot()
+            seen.add(id(row))
+            merged.append(row)
+
+        local, removed = [], []
+        for row in self.rows:
+            if id(row) in seen:
+                continue
+            if unsaved(keyf(row)) or not remove_missing:
+                local.append(row)
+            else:
+                removed.append(row)
+
+        self.rows[:] = merged + local
+        self.reindex()
+        return added, changed, removed
 
     @contextlib.contextmanager
     def adding_row(self):
@@ -202,11 +460,55 @@ class ClientTable:
         rows = [r._as_tuple() for r in self.rows]
         return columns, rows
 
+    def _loaded_rows(self):
+        # rows of a lazy table not yet built are unchanged
+        if isinstance(self.rows, lazyrows.LazyRows):
+            return self.rows.built()
+        return self.rows
+
+    def dirty_rows(self):
+        """
+        Return the rows changed or added since loading (or mark_clean).
+        With-out track_changes every row is returned.
+        """
+        if not self.track_changes:
+            return list(self.rows)
+        return [r for r in self._loaded_rows() if r._dirty_attrs() != []]
+
+    def mark_clean(self):
+        """
+        Take the current rows as the baseline of dirty_rows (e.g. after they
+        are saved) and forget the deleted rows.  Values changed in place
+        (e.g. the add & remove of a MatrixLink) are taken as saved.
+        """
+        if isinstance(self.rows, columnar_store.ColumnarRows):
+            raise ValueError("a columnar ClientTable does not track changes")
+        for row in self._loaded_rows():
+            for value in row._as_tuple():
+                clear = getattr(value, "clear_changes", None)
+                if clear != None:
+                    clear()
+            row._snapshot()
+        self.deleted_rows = []
+        self.track_changes = True
+
     def as_writable(
-        self, exclusions=None, inclusions=None, extensions=None, getter=None
+        self,
+        exclusions=None,
+        inclusions=None,
+        extensions=None,
+        getter=None,
+        only_dirty=False,
     ):
+        """
+        Return the table as a dictionary of columns & data (& deleted keys
+        if rows were deleted) to be sent to the server.  With only_dirty the
+        data holds only the rows of dirty_rows.
+        """
         assert exclusions == None or inclusions == None
 
+        rows = self.dirty_rows() if only_dirty else self.rows
+
         skipped = [c.attr for c in self.columns_full if c.skip_write]
         # skipped is added to exclusions, but note that inclusions is evaluated first
         if len(skipped) > 0:
@@ -221,7 +523,7 @@ class ClientTable:
             and getter == None
         ):
             attrs = self.DataRow.__slots__
-            slimrows = [r._as_dict() for r in self.rows]
+            slimrows = [r._as_dict() for r in rows]
         else:
             if inclusions != None:
                 attrs = list(inclusions)
@@ -234,7 +536,7 @@ class ClientTable:
 
             getter = getter if getter != None else getattr
             slimrows = []
-            for r in self.rows:
+            for r in rows:
                 slim = {a: getter(r, a) for a in attrs}
                 slimrows.append(slim)
 
@@ -263,4 +565,11 @@ class UnparsingClientTable(ClientTable):
     """
 
     def converter(self, row_field_list):
-        return reportcore.as_client(row_field_list, to_localtime=self.to_localtime)
+        return reportcore.as_client(
+            row_field_list, to_localtime=self.to_localtime, positional=self.positional
+        )
+
+    def bulk_converter(self, row_field_list):
+        return reportcore.as_client_columns(
+            row_field_list, to_localtime=self.to_localtime, positional=self.positional
+        )
@@ -0,0 +1,399 @@
+import array
+import datetime
+import itertools
+import collections.abc
+
+# Column kinds; the first value which is not None picks the kind and a later
+# value not fitting it turns the column into a plain list ("object").
+EMPTY = "empty"
+INT = "int"
+FLOAT = "float"
+BOOL = "bool"
+DATE = "date"
+STR = "str"
+OBJECT = "object"
+
+
+_KINDS = {int: INT, float: FLOAT, bool: BOOL, datetime.date: DATE, str: STR}
+
+
+def _kind_of(value):
+    t = type(value)
+    if t is int:
+        return INT
+    if t is float:
+        return FLOAT
+    if t is bool:
+        return BOOL
+    if t is datetime.date:
+        return DATE
+    if t is str:
+        return STR
+    return OBJECT
+
+
+class ColumnVector:
+    """
+    The values of one column in a compact encoding chosen from the values
+    themselves so that each value reads back exactly as stored:
+
+    - int, float & bool values in an array.array with a null mask
+    - dates as ordinals in an array.array with a null mask
+    - strings dictionary encoded (repeated strings are stored once)
+    - anything else (e.g. Decimal, datetime or a mix of types) in a list
+    """
+
+    def __init__(self):
+        self.kind = EMPTY
+        self.count = 0
+        self.data = None
+        self.nulls = None
+        # dictionary encoding of STR
+        self.values = None
+        self.codes = None
+
+    def _start(self, kind):
+        # called on the first value which is not None
+        self.kind = kind
+        if kind == STR:
+            self.values = [None]
+            self.codes = {None: 0}
+            self.data = array.array("I", bytes(4 * self.count))
+        elif kind == OBJECT:
+            self.data = [None] * self.count
+        else:
+            typecode = {INT: "q", FLOAT: "d", BOOL: "b", DATE: "i"}[kind]
+            self.data = array.array(
+                typecode, bytes(self.itemsize(typecode) * self.count)
+            )
+            self.nulls = bytearray(b"\x01" * self.count)
+
+    @staticmethod
+    def itemsize(typecode):
+        return array.array(typecode).itemsize
+
+    def _promote(self):
+        values = [self.get(i) for i in range(self.count)]
+        self.kind = OBJECT
+        self.data = values
+        self.nulls = None
+        self.values = None
+        self.codes = None
+
+    def _encode(self, value):
+        # return the stored form of a non-None value of the column kind
+        if self.kind == STR:
+            code = self.codes.get(value)
+            if code == None:
+                code = len(self.values)
+                self.values.append(value)
+                self.codes[value] = code
+            return code
+        if self.kind == DATE:
+            return value.toordinal()
+        return value
+
+    def _fits(self, value):
+        if value is None or self.kind == OBJECT:
+            return True
+        return _kind_of(value) == self.kind
+
+    def append(self, value):
+        if self.kind == EMPTY:
+            if value is None:
+                self.count += 1
+                return
+            self._start(_kind_of(value))
+        elif not self._fits(value):
+            self._promote()
+
+        if self.kind == OBJECT:
+            self.data.append(value)
+        elif self.kind == STR:
+            self.data.append(self._encode(value))
+        elif value is None:
+            self.data.append(0)
+            self.nulls.append(1)
+        else:
+            try:
+                self.data.append(self._encode(value))
+            except OverflowError:
+                # an int beyond 64 bits
+                self._promote()
+                self.data.append(value)
+                self.count += 1
+                return
+            self.nulls.append(0)
+        self.count += 1
+
+    def extend(self, values):
+        """
+        Append a sequence of values.  The common case of values all of the
+        column kind (or None) is encoded in bulk.
+        """
+        types = set(map(type, values))
+        has_none = type(None) in types
+        types.discard(type(None))
+        kinds = {_KINDS.get(t, OBJECT) for t in types}
+        if len(kinds) == 1 and self.kind == EMPTY:
+            self._start(kinds.pop())
+        elif len(kinds) == 0 and self.kind == EMPTY:
+            self.count += len(values)
+            return
+        elif len(kinds) > 1 or (kinds and kinds != {self.kind}):
+            if self.kind != OBJECT:
+                for value in values:
+                    self.append(value)
+                return
+
+        kind = self.kind
+        before = len(self.data)
+        try:
+            if kind == OBJECT:
+                self.data.extend(values)
+            elif kind == STR:
+                codes = self.codes
+                for value in set(values).difference(codes):
+                    codes[value] = len(self.values)
+                    self.values.append(value)
+                self.data.extend(map(codes.__getitem__, values))
+            else:
+                if kind == DATE:
+                    encoded = [0 if v is None else v.toordinal() for v in values]
+                elif has_none:
+                    encoded = [0 if v is None else v for v in values]
+                else:
+                    encoded = values
+                self.data.extend(encoded)
+                if has_none:
+                    self.nulls.extend([v is None for v in values])
+                else:
+                    self.nulls.extend(bytes(len(values)))
+        except OverflowError:
+            # an int beyond 64 bits
+            del self.data[before:]
+            self._promote()
+            self.data.extend(values)
+        self.count += len(values)
+
+    def get(self, index):
+        kind = self.kind
+        if kind == STR:
+            return self.values[self.data[index]]
+        if kind == OBJECT:
+            return self.data[index]
+        if kind == EMPTY or self.nulls[index]:
+            return None
+        value = self.data[index]
+        if kind == DATE:
+            return datetime.date.fromordinal(value)
+        if kind == BOOL:
+            return bool(value)
+        return value
+
+    def set(self, index, value):
+        if not 0 <= index < self.count:
+            raise IndexError("column index out of range")
+        if self.kind == EMPTY:
+            if value is None:
+                return
+            self._start(_kind_of(value))
+        elif not self._fits(value):
+            self._promote()
+
+        if self.kind in (OBJECT, STR):
+            self.data[index] = value if self.kind == OBJECT else self._encode(value)
+        elif value is None:
+            self.data[index] = 0
+            self.nulls[index] = 1
+        else:
+            try:
+                self.data[index] = self._encode(value)
+            except OverflowError:
+                self._promote()
+                self.data[index] = value
+                return
+            self.nulls[index] = 0
+
+    def __len__(self):
+        return self.count
+
+
+class ColumnStore:
+    """
+    The values of a table as one ColumnVector per attribute.
+    """
+
+    def __init__(self, attrs):
+        self.attrs = list(attrs)
+        self.vectors = [ColumnVector() for _ in self.attrs]
+        self.count = 0
+
+    def append(self, values):
+        for vector, value in zip(self.vectors, values):
+            vector.append(value)
+        self.count += 1
+        return self.count - 1
+
+    def extend(self, rows):
+        rows = list(rows)
+        if len(rows) == 0:
+            return
+        for vector, values in zip(self.vectors, zip(*rows)):
+            vector.extend(values)
+        self.count += len(rows)
+
+    def row_values(self, index):
+        return tuple(v.get(index) for v in self.vectors)
+
+
+def columnar_row_class(DataRow):
+    """
+    Return a subclass of DataRow whose attributes are read from & written to
+    a ColumnStore rather than the instance.  Mixins & class members of
+    DataRow are kept.
+    """
+    attrs = list(DataRow.__slots__)
+
+    def column_property(pos):
+        def getter(self):
+            return self._store.vectors[pos].get(self._index)
+
+        def setter(self, value):
+            self._store.vectors[pos].set(self._index, value)
+
+        return property(getter, setter)
+
+    def _as_tuple(self):
+        return self._store.row_values(self._index)
+
+    def _as_dict(self):
+        return dict(zip(attrs, self._store.row_values(self._index)))
+
+    def __repr__(self):
+        values = self._store.row_values(self._index)
+        pairs = [f"{k}={repr(v)}" for k, v in zip(attrs, values)]
+        return f"{DataRow.__name__}({', '.join(pairs)})"
+
+    namespace = {attr: column_property(pos) for pos, attr in enumerate(attrs)}
+    namespace.update(
+        {
+            "__slots__": ("_store", "_index"),
+            "_as_tuple": _as_tuple,
+            "_as_dict": _as_dict,
+            "__repr__": __repr__,
+        }
+    )
+    return type(DataRow.__name__, (DataRow,), namespace)
+
+
+class ColumnarRows(collections.abc.MutableSequence):
+    """
+    The rows of a ClientTable kept in a ColumnStore.  Row objects are views
+    (see columnar_row_class) created when first accessed and then kept so
+    that a row keeps its identity.  Rows from elsewhere (e.g. a flipper row
+    added to the table) are held as they are.
+
+    Slicing returns a plain list of rows.
+    """
+
+    def __init__(self, DataRow, store, init=False):
+        self.RowView = columnar_row_class(DataRow)
+        self.store = store
+        self.init = init
+        self._order = array.array("q", range(store.count))
+        # store index -> row object (views accessed so far & adopted rows)
+        self._rows = {}
+        # id(row) -> store index of adopted rows
+        self._adopted = {}
+
+    @classmethod
+    def from_tuples(cls, DataRow, tuples, init=False):
+        store = ColumnStore(DataRow.__slots__)
+        tuples = iter(tuples)
+        while True:
+            # a chunk at a time bounds the transient row tuples
+            chunk = list(itertools.islice(tuples, 4096))
+            if len(chunk) == 0:
+                break
+            store.extend(chunk)
+        return cls(DataRow, store, init=init)
+
+    def _row(self, key):
+        row = self._rows.get(key)
+        if row is None:
+            row = self.RowView.__new__(self.RowView)
+            row._store = self.store
+            row._index = key
+            self._rows[key] = row
+            if self.init:
+                row._rtlib_init_()
+        return row
+
+    def _key(self, row):
+        if isinstance(row, self.RowView) and row._store is self.store:
+            return row._index
+        key = self._adopted.get(id(row))
+        if key == None:
+            # The store holds None for an adopted row; its values are read
+            # from the row itself.
+            key = self.store.append((None,) * len(self.store.attrs))
+            self._rows[key] = row
+            self._adopted[id(row)] = key
+        return key
+
+    def __len__(self):
+        return len(self._order)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(k) for k in self._order[index]]
+        return self._row(self._order[index])
+
+    def __setitem__(self, index, row):
+        if isinstance(index, slice):
+            keys = array.array("q", [self._key(r) for r in row])
+            self._order[index] = keys
+        else:
+            self._order[index] = self._key(row)
+
+    def __delitem__(self, index):
+        del self._order[index]
+
+    def insert(self, index, row):
+        self._order.insert(index, self._key(row))
+
+    def __iter__(self):
+        for key in self._order:
+            yield self._row(key)
+
+    def index(self, row, start=0, stop=None):
+        if isinstance(row, self.RowView) and row._store is self.store:
+            key = row._index
+        elif id(row) in self._adopted:
+            key = self._adopted[id(row)]
+        else:
+            raise ValueError(f"{row!r} is not in rows")
+        stop = len(self._order) if stop == None else stop
+        return self._order.index(key, start, stop)
+
+    def __contains__(self, row):
+        try:
+            self.index(row)
+            return True
+        except ValueError:
+            return False
+
+    def sort(self, key=None, reverse=False):
+        rows = list(self)
+        rows.sort(key=key, reverse=reverse)
+        self._order = array.array("q", [self._key(r) for r in rows])
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return f"ColumnarRows({len(self)} rows)"
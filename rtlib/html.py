@@ -112,6 +112,102 @@ def html_table(columns, rows, **kwargs):
     return table
 
 
+# The streaming writer below writes the markup which ET.tostring(...,
+# method="html") writes for html_table; these are its escapes.
+
+
+def _escape_text(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _escape_attribute(text):
+    return text.replace("&", "&amp;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def _attributes(attrs):
+    return "".join(f' {k}="{_escape_attribute(v)}"' for k, v in attrs.items())
+
+
+def cell_writer(column):
+    """
+    Return a function of a row returning the markup of the td element which
+    cell constructs for column.  The column settings are read once rather
+    than for each cell.
+    """
+    attr = column.attr
+    formatter = column.formatter
+    has_url = column.url_factory != None
+    type_ = column.type_
+    open_td = '<td align="right">' if column.alignment == "right" else "<td>"
+    empty = open_td + "</td>"
+    link_attrs = ' target="_blank"' if column.url_new_window else ""
+
+    # html, multiline & boolean cells are parsed as markup; a column has few
+    # distinct values of these (notably boolean) so the result is kept
+    fragments = {}
+
+    def fragment(markup):
+        result = fragments.get(markup)
+        if result == None:
+            if len(fragments) > 4096:
+                fragments.clear()
+            element = ET.fromstring(markup)
+            result = ET.tostring(element, method="html", encoding="unicode")
+            fragments[markup] = result
+        return result
+
+    def write(row):
+        try:
+            v = getattr(row, attr)
+        except AttributeError:
+            return empty
+        if v == None:
+            return empty
+        link = reportcore.column_url(column, row) if has_url else None
+        if formatter != None:
+            v = formatter(v)
+        if v == None:
+            return empty
+        if type_ == "html":
+            return open_td + fragment(f"<p>{v}</p>") + "</td>"
+        if type_ == "multiline":
+            v = saxutils.escape(v).replace("\n", "<br />")
+            return open_td + fragment(f"<p>{v}</p>") + "</td>"
+        if type_ == "boolean":
+            return '<td align="center">' + fragment(f"<p>{v}</p>") + "</td>"
+        if link == None:
+            text = str(v)
+            return open_td + (_escape_text(text) if text != "" else "\u00a0") + "</td>"
+        href = _escape_attribute(link)
+        text = _escape_text(v.strip())
+        return f'{open_td}<a href="{href}"{link_attrs}>{text}</a></td>'
+
+    return write
+
+
+def iter_html_table(columns, rows, chunk=256, **kwargs):
+    """
+    Yield the markup of the table of html_table (as ET.tostring writes it
+    with method="html") in str pieces of chunk rows.  Nothing is held for
+    more than chunk rows.  Encode the pieces as us-ascii with
+    xmlcharrefreplace for the bytes of ET.tostring.
+    """
+    heads = "".join(
+        f"<th>{_escape_text(c.label) if c.label else ''}</th>" for c in columns
+    )
+    yield f"<table{_attributes(kwargs)}><thead><tr>{heads}</tr></thead><tbody>"
+
+    writers = [cell_writer(c) for c in columns]
+    lines = []
+    for row in rows:
+        lines.append("<tr>" + "".join([w(row) for w in writers]) + "</tr>")
+        if len(lines) >= chunk:
+            yield "".join(lines)
+            lines = []
+    lines.append("</tbody></table>")
+    yield "".join(lines)
+
+
 def styled_html_table(columns, rows, tid=None, tclass=None, **kwargs):
     """
     Generate an HTML table based on reportcore columns.
@@ -123,5 +219,5 @@ def styled_html_table(columns, rows, tid=None, tclass=None, **kwargs):
         attrkwargs["class"] = tclass
     for k, v in kwargs.items():
         attrkwargs[k] = str(v)
-    table = html_table(columns, rows, **attrkwargs)
-    return ET.tostring(table, method="html")
+    pieces = iter_html_table(columns, rows, **attrkwargs)
+    return "".join(pieces).encode("us-ascii", "xmlcharrefreplace")
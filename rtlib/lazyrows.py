@@ -0,0 +1,130 @@
+import collections.abc
+
+# marks a position whose row is not yet built
+_UNBUILT = object()
+
+
+class LazyRows(collections.abc.MutableSequence):
+    """
+    The rows of a ClientTable built when first accessed.  The source rows (as
+    sent by the server) are converted by build a chunk of positions at a time
+    and the row objects are then kept so that a row keeps its identity.  The
+    source row is dropped once its row is built.
+
+    Any row handed out is a built row so changing a row, inserting and
+    assigning work as with a list.  Slicing returns a plain list of rows;
+    iteration, sort and reverse build all rows.
+    """
+
+    def __init__(self, source, build, chunk=1024):
+        self._build = build
+        self.chunk = chunk
+        self._source = list(source)
+        self._rows = [_UNBUILT] * len(self._source)
+        self._unbuilt = len(self._source)
+
+    def _materialize(self, start, stop):
+        if self._unbuilt == 0:
+            return
+        rows = self._rows
+        positions = [i for i in range(start, stop) if rows[i] is _UNBUILT]
+        if len(positions) == 0:
+            return
+        built = self._build([self._source[i] for i in positions])
+        for i, row in zip(positions, built):
+            rows[i] = row
+            self._source[i] = None
+        self._unbuilt -= len(positions)
+
+    def _materialize_chunk(self, index):
+        start = index - index % self.chunk
+        self._materialize(start, min(start + self.chunk, len(self._rows)))
+
+    def materialize(self):
+        """
+        Build all rows.
+        """
+        self._materialize(0, len(self._rows))
+
+    def built_count(self):
+        return len(self._rows) - self._unbuilt
+
+    def built(self):
+        """
+        Return a list of the rows built so far in order.
+        """
+        return [r for r in self._rows if r is not _UNBUILT]
+
+    def _materialize_slice(self, index):
+        start, stop, step = index.indices(len(self._rows))
+        positions = range(start, stop, step)
+        if len(positions) > 0:
+            self._materialize(min(positions), max(positions) + 1)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self._materialize_slice(index)
+            return self._rows[index]
+        row = self._rows[index]
+        if row is _UNBUILT:
+            self._materialize_chunk(index if index >= 0 else index + len(self._rows))
+            row = self._rows[index]
+        return row
+
+    def __setitem__(self, index, row):
+        if isinstance(index, slice):
+            rows = list(row)
+            self._materialize_slice(index)
+            self._rows[index] = rows
+            self._source[index] = [None] * len(rows)
+        else:
+            if self._rows[index] is _UNBUILT:
+                self._unbuilt -= 1
+            self._rows[index] = row
+            self._source[index] = None
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            removed = self._rows[index]
+        else:
+            removed = [self._rows[index]]
+        self._unbuilt -= sum(1 for r in removed if r is _UNBUILT)
+        del self._rows[index]
+        del self._source[index]
+
+    def insert(self, index, row):
+        self._rows.insert(index, row)
+        self._source.insert(index, None)
+
+    def __iter__(self):
+        for start in range(0, len(self._rows), self.chunk):
+            self._materialize(start, min(start + self.chunk, len(self._rows)))
+            yield from self._rows[start : start + self.chunk]
+
+    def index(self, row, start=0, stop=None):
+        # an unbuilt row cannot be asked for
+        stop = len(self._rows) if stop == None else stop
+        return self._rows.index(row, start, stop)
+
+    def __contains__(self, row):
+        return row in self._rows
+
+    def sort(self, key=None, reverse=False):
+        self.materialize()
+        self._rows.sort(key=key, reverse=reverse)
+
+    def reverse(self):
+        self.materialize()
+        self._rows.reverse()
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return f"LazyRows({len(self)} rows, {self.built_count()} built)"
@@ -1,9 +1,14 @@
 import re
 import copy
-import functools
+import json
 import datetime
 import keyword
 import base64
+import hashlib
+import operator
+import threading
+import collections
+from . import timezones
 
 IDENTIFIER_RE = re.compile(r"^[^\d\W]\w*\Z", re.UNICODE)
 KEYWORD_SET = set(keyword.kwlist)
@@ -40,10 +45,102 @@ class SlottedRow:
         ]
         return f"{self.__class__.__name__}({', '.join(values)})"
 
+    def _snapshot(self):
+        """
+        Record the current values as the baseline of _dirty_attrs.
+        """
+        # bypass any __setattr__ of a mixin (e.g. one marking a screen dirty)
+        object.__setattr__(self, "_rtlib_baseline", self._as_tuple())
+
+    def _dirty_attrs(self):
+        """
+        Return the list of attributes changed since _snapshot or None if the
+        row has no snapshot (e.g. a row added to a table).  A value changed
+        in place is seen only if it has a has_changes method (e.g.
+        rtlib.server.MatrixLink).
+        """
+        baseline = getattr(self, "_rtlib_baseline", None)
+        if baseline == None:
+            return None
+        return [
+            attr
+            for attr, old, new in zip(
+                self.__class__.__slots__, baseline, self._as_tuple()
+            )
+            if _value_changed(old, new)
+        ]
+
+
+def _value_changed(old, new):
+    if new is old:
+        has_changes = getattr(new, "has_changes", None)
+        return has_changes != None and has_changes()
+    return old != new
+
+
+def _record_methods(members):
+    """
+    Return the specialized methods of a fixedrecord class generated as
+    Python source in the manner of collections.namedtuple.  The SlottedRow
+    methods remain the general case (e.g. keyword construction or a member
+    not yet assigned).
+    """
+    # parenthesized tuples so that a record of no members is () = args
+    attrs = "(" + "".join(f"self.{m}, " for m in members) + ")"
+    keyed = ", ".join(f"{m!r}: self.{m}" for m in members)
+    items = "(" + "".join(f"_d[{m!r}], " for m in members) + ")"
+    source = f"""\
+def __init__(self, *args, **kwargs):
+    if kwargs or len(args) != {len(members)}:
+        _init(self, *args, **kwargs)
+        return
+    {attrs} = args
+
+def _as_tuple(self):
+    try:
+        return {attrs}
+    except AttributeError:
+        return _as_tuple(self)
+
+def _as_dict(self):
+    try:
+        return {{{keyed}}}
+    except AttributeError:
+        return _as_dict(self)
+
+def _make(cls, values):
+    self = _new(cls)
+    {attrs} = values
+    return self
+
+def _from_dict(cls, _d):
+    self = _new(cls)
+    {attrs} = {items}
+    return self
+"""
+    namespace = {
+        "_init": SlottedRow.__init__,
+        "_as_tuple": SlottedRow._as_tuple,
+        "_as_dict": SlottedRow._as_dict,
+        "_new": object.__new__,
+    }
+    exec(source, namespace)
+    return {
+        "__init__": namespace["__init__"],
+        "_as_tuple": namespace["_as_tuple"],
+        "_as_dict": namespace["_as_dict"],
+        "_make": classmethod(namespace["_make"]),
+        "_from_dict": classmethod(namespace["_from_dict"]),
+    }
+
 
 def fixedrecord(name, members, mixin=None, cls_members=None):
     """
     This is a namedtuple only better.
+
+    The class has __init__, _as_tuple & _as_dict specialized to the
+    members and the constructors _make (from a sequence in member order)
+    and _from_dict (from a dict keyed by member).
     """
     kw_clash = KEYWORD_SET.intersection(members)
     if len(kw_clash) > 0:
@@ -57,7 +154,8 @@ def fixedrecord(name, members, mixin=None, cls_members=None):
         )
 
     cls_members = cls_members if cls_members else {}
-    Kls1 = type(name, (SlottedRow,), {"__slots__": members, **cls_members})
+    methods = _record_methods(list(members))
+    Kls1 = type(name, (SlottedRow,), {"__slots__": members, **methods, **cls_members})
     if mixin == None:
         return Kls1
     elif isinstance(mixin, (list, tuple)):
@@ -66,6 +164,63 @@ def fixedrecord(name, members, mixin=None, cls_members=None):
         return type(name, (Kls1, mixin), {})
 
 
+class BoundedCache:
+    """
+    A thread-safe mapping holding at most maxsize entries; the least
+    recently used entry is evicted first.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value != None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+RECORD_CLASSES = BoundedCache(256)
+
+
+def cached_fixedrecord(name, members, mixin=None, cls_members=None):
+    """
+    Return a fixedrecord class shared by all callers with the same name,
+    members, mixin & cls_members.  Class attributes set on the result are
+    seen by all of them; derive a class to hold those.
+    """
+    if isinstance(mixin, list):
+        mixin = tuple(mixin)
+    cls_items = tuple(sorted(cls_members.items())) if cls_members else ()
+    key = (name, tuple(members), mixin, cls_items)
+    try:
+        Kls = RECORD_CLASSES.get(key)
+    except TypeError:
+        # an unhashable class member
+        return fixedrecord(name, members, mixin=mixin, cls_members=cls_members)
+    if Kls == None:
+        Kls = fixedrecord(name, members, mixin=mixin, cls_members=cls_members)
+        RECORD_CLASSES.put(key, Kls)
+    return Kls
+
+
 class ColumnAction:
     def __init__(self, label, callback, scope="global", defaulted=False, reloads=False):
         self.label = label
@@ -209,6 +364,8 @@ TYPE_DEFINITION_PLUGINS = []
 def add_type_definition_plugin(tplug):
     global TYPE_DEFINITION_PLUGINS
     TYPE_DEFINITION_PLUGINS.append(tplug)
+    # parsed columns are polished by the plugins
+    PARSED_COLUMNS.clear()
 
 
 def attr_to_label(attr):
@@ -326,28 +483,60 @@ def type_included(type_):
     return True
 
 
-def parse_columns(column_list):
-    # wish to mutate -- work on a copy
-    column_list = copy.deepcopy(column_list)
+PARSED_COLUMNS = BoundedCache(256)
 
-    def column_included(attr, meta):
-        if meta == None:
-            return True
-        return type_included(meta.get("type", None))
 
-    return [api_to_model(*x) for x in column_list if column_included(*x)]
+def column_spec_key(column_list):
+    """
+    Return a hash of the canonical JSON of column_list or None if it is not
+    JSON (e.g. the meta of a column built in the client holds a function).
+    """
+    try:
+        canonical = json.dumps(column_list, sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha1(canonical.encode("utf8")).hexdigest()
+
+
+def _clone_column(column):
+    c = copy.copy(column)
+    c.actions = list(column.actions)
+    return c
+
+
+def _parsed_columns(column_list):
+    # Return the Column objects of all of column_list.  The cached Column
+    # objects are not handed out since callers change their columns.
+    key = column_spec_key(column_list)
+    parsed = PARSED_COLUMNS.get(key) if key != None else None
+    if parsed == None:
+        # wish to mutate -- work on a copy
+        parsed = [api_to_model(*x) for x in copy.deepcopy(column_list)]
+        if key != None:
+            PARSED_COLUMNS.put(key, parsed)
+    return parsed
+
+
+def parse_columns(column_list):
+    return [
+        _clone_column(c) for c in _parsed_columns(column_list) if type_included(c.type_)
+    ]
 
 
 def parse_columns_full(column_list):
     # TODO:  this is an obnoxious minor variant of parse_columns
-    # wish to mutate -- work on a copy
-    column_list = copy.deepcopy(column_list)
-    return [api_to_model(*x) for x in column_list]
+    return [_clone_column(c) for c in _parsed_columns(column_list)]
 
 
 def parse_datetime(v):
     if v == None:
         return v
+    if len(v) in (19, 26) and v[10] == "T" and v[19:20] in ("", "."):
+        # the form of datetime.isoformat (with-out a time zone)
+        try:
+            return datetime.datetime.fromisoformat(v)
+        except ValueError:
+            pass
     try:
         return datetime.datetime.strptime(v, "%Y-%m-%dT%H:%M:%S")
     except ValueError:
@@ -372,7 +561,7 @@ def parse_date(s):
         return s
     if len(s) != 10 or s[4] != "-" or s[7] != "-":
         raise ValueError(f"invalid date string {s}")
-    return datetime.date(int(s[:4]), int(s[5:7]), int(s[8:10]))
+    return datetime.date.fromisoformat(s)
 
 
 def parse_matrix(v):
@@ -428,70 +617,143 @@ def str_column_coerce(column, value):
     return value
 
 
-def as_python(columns, to_localtime=True):
-    def row_coerce(converters, _data):
-        return tuple(func(_data[key]) for key, func in converters)
+def date_column(meta, to_localtime):
+    # Dates repeat heavily (e.g. the transactions of a ledger) so each
+    # distinct string is parsed once and the parses are kept for the
+    # following chunks of the table.
+    parsed = {None: None}
+
+    def convert(values):
+        if len(parsed) > 65536:
+            parsed.clear()
+            parsed[None] = None
+        for s in set(values).difference(parsed):
+            parsed[s] = parse_date(s)
+        return list(map(parsed.__getitem__, values))
+
+    return convert
 
-    identity = lambda v: v
+
+def _local_converter(meta, to_localtime):
+    # return the LocalTimeConverter for the UTC datetimes of a column or
+    # None if the column is to be left as it is
+    if not to_localtime or meta.get("widget_kwargs", {}).get("localtime", False):
+        return None
+    return timezones.local_time_converter()
+
+
+def datetime_column(meta, to_localtime):
+    local = _local_converter(meta, to_localtime)
+
+    def convert(values):
+        parsed = {None: None}
+        for s in set(values).difference(parsed):
+            parsed[s] = parse_datetime(s)
+        if local != None:
+            strings = list(parsed.keys())
+            parsed = dict(zip(strings, local.convert([parsed[s] for s in strings])))
+        return list(map(parsed.__getitem__, values))
+
+    return convert
+
+
+def boolean_column(meta, to_localtime):
+    return lambda values: [False if v is None else v for v in values]
+
+
+def binary_column(meta, to_localtime):
+    return lambda values: list(map(parse_binary, values))
+
+
+def matrix_column(meta, to_localtime):
+    return lambda values: list(map(parse_matrix, values))
+
+
+# Converters of the JSON values of a column to Python by column type.  Each
+# is a factory called with the column meta & to_localtime which returns a
+# function converting a list of the values of the column to a list of Python
+# values.  Columns of other types are left as they are.
+VALUE_CONVERTERS = {
+    "date": date_column,
+    "datetime": datetime_column,
+    "boolean": boolean_column,
+    "binary": binary_column,
+    "matrix": matrix_column,
+}
+
+
+def add_value_converter(type_, factory):
+    global VALUE_CONVERTERS
+    VALUE_CONVERTERS[type_] = factory
+
+
+def columns_function(columns, converters, positional):
+    """
+    Return a function converting a list of rows to a list of tuples by
+    applying converters (a function or None for each of columns) to the
+    values of one column at a time.
+    """
+    if positional:
+        getters = [operator.itemgetter(i) for i in range(len(columns))]
+    else:
+        getters = [operator.itemgetter(x[0]) for x in columns]
+    pairs = list(zip(getters, converters))
+
+    def convert(rows):
+        if not isinstance(rows, list):
+            rows = list(rows)
+        if len(pairs) == 0:
+            return [()] * len(rows)
+        values = []
+        for getter, func in pairs:
+            column = list(map(getter, rows))
+            values.append(column if func == None else func(column))
+        return list(zip(*values))
+
+    return convert
+
+
+def as_python_columns(columns, to_localtime=True, positional=False):
+    """
+    Return a function converting a list of rows of JSON values to a list of
+    tuples of Python values (see as_python) a column at a time.
+    """
 
     def column_converter(attr, meta):
-        if meta == None or meta.get("type", None) == None:
-            return identity
-        elif meta["type"] == "matrix":
-            return parse_matrix
-        elif meta["type"] == "boolean":
-            return lambda v: False if v == None else v
-        elif meta["type"] == "binary":
-            return parse_binary
-        elif meta["type"] == "date":
-            return lambda v: parse_date(v) if v != None else None
-        elif meta["type"] == "datetime":
-            if to_localtime and not meta.get("widget_kwargs", {}).get(
-                "localtime", False
-            ):
-                offset = (
-                    datetime.datetime.utcnow() - datetime.datetime.now()
-                ).total_seconds() / 3600
-                return (
-                    lambda v, offset=offset: parse_datetime(v)
-                    - datetime.timedelta(hours=offset)
-                    if v != None
-                    else v
-                )
-            else:
-                return parse_datetime
-        else:
-            return identity
+        if meta == None or meta.get("type", None) not in VALUE_CONVERTERS:
+            return None
+        return VALUE_CONVERTERS[meta["type"]](meta, to_localtime)
 
-    converters = [(x[0], column_converter(*x)) for x in columns]
-    return functools.partial(row_coerce, converters)
+    converters = [column_converter(*x) for x in columns]
+    return columns_function(columns, converters, positional)
 
 
-def as_client(columns, to_localtime=True):
-    def row_coerce(converters, _data):
-        return tuple(func(_data[key]) for key, func in converters)
+def as_python(columns, to_localtime=True, positional=False):
+    """
+    Return a function converting one row of JSON values to a tuple of Python
+    values.  The row is a dictionary keyed by attribute or, with positional,
+    a sequence in the order of columns.
+    """
+    convert = as_python_columns(columns, to_localtime, positional)
+    return lambda row: convert([row])[0]
 
-    identity = lambda v: v
+
+def as_client_columns(columns, to_localtime=True, positional=False):
+    """
+    Return a function converting a list of rows of Python values to a list
+    of tuples with the datetimes shifted to local time as by as_python.
+    """
 
     def column_converter(attr, meta):
-        if meta == None or meta.get("type", None) == None:
-            return identity
-        elif meta["type"] == "datetime":
-            if to_localtime and not meta.get("widget_kwargs", {}).get(
-                "localtime", False
-            ):
-                offset = (
-                    datetime.datetime.utcnow() - datetime.datetime.now()
-                ).total_seconds() / 3600
-                return (
-                    lambda v, offset=offset: v - datetime.timedelta(hours=offset)
-                    if v != None
-                    else v
-                )
-            else:
-                return identity
-        else:
-            return identity
+        if meta == None or meta.get("type", None) != "datetime":
+            return None
+        local = _local_converter(meta, to_localtime)
+        return local.convert if local != None else None
+
+    converters = [column_converter(*x) for x in columns]
+    return columns_function(columns, converters, positional)
+
 
-    converters = [(x[0], column_converter(*x)) for x in columns]
-    return functools.partial(row_coerce, converters)
+def as_client(columns, to_localtime=True, positional=False):
+    convert = as_client_columns(columns, to_localtime, positional)
+    return lambda row: convert([row])[0]
@@ -1,3 +1,5 @@
+import operator
+
 html_template = """\
 <html>
  <head>
@@ -14,34 +16,53 @@ html_template = """\
 """
 
 
-def content_write_html(content, outfile, rptclass):
+def iter_content_html(content, rptclass, chunk=256):
+    """
+    Yield the html document of the main table of content in str pieces of
+    chunk rows.  Each cell writer is prepared once per column.
+    """
     table = content.main_table()
-    lines = table.rows
     cols = [c for c in table.columns if not c.hidden]
 
-    def bracket_list(ll, td, join=""):
-        return join.join(["<{0}>{1}</{0}>".format(td, i) for i in ll])
-
-    def format(p, c):
-        v = getattr(p, c.attr)
-        if c.formatter != None:
-            v = c.formatter(v)
-        return v
+    def cell_writer(c):
+        getter = operator.attrgetter(c.attr)
+        formatter = c.formatter
+        if formatter == None:
+            return lambda p: f"<td>{getter(p)}</td>"
+        return lambda p: f"<td>{formatter(getter(p))}</td>"
 
-    header = [bracket_list([c.label.replace("\n", "<br />") for c in cols], "th")]
-    header += [bracket_list([format(p, c) for c in cols], "td") for p in lines]
-    table = bracket_list(header, "tr", join="\n")
+    writers = [cell_writer(c) for c in cols]
 
     heads = [f"  <p>{x}</p>" for x in content.keys["headers"][1:]]
-    heads = "\n".join(heads)
+    before, after = html_template.split("{table}")
+    yield before.format(
+        title=content.keys["headers"][0],
+        version="0.0.1",
+        rptclass=rptclass,
+        heads="\n".join(heads),
+    )
 
+    labels = "".join(
+        ["<th>{}</th>".format(c.label.replace("\n", "<br />")) for c in cols]
+    )
+    lines = ["<table>\n<tr>" + labels + "</tr>"]
+    for p in table.rows:
+        lines.append("\n<tr>" + "".join([w(p) for w in writers]) + "</tr>")
+        if len(lines) >= chunk:
+            yield "".join(lines)
+            lines = []
+    lines.append("\n</table>")
+    yield "".join(lines)
+    yield after
+
+
+def content_write_html(content, outfile, rptclass):
+    """
+    Write the html document of the main table of content to outfile (a file
+    name or a text file object) as it is generated.
+    """
+    if hasattr(outfile, "write"):
+        outfile.writelines(iter_content_html(content, rptclass))
+        return
     with open(outfile, "w") as outf:
-        outf.write(
-            html_template.format(
-                title=content.keys["headers"][0],
-                version="0.0.1",
-                rptclass=rptclass,
-                heads=heads,
-                table="<table>\n" + table + "\n</table>",
-            )
-        )
+        outf.writelines(iter_content_html(content, rptclass))
@@ -1,5 +1,7 @@
 import io
+import gzip
 import json
+import math
 import datetime
 import decimal
 
@@ -18,6 +20,15 @@ class MatrixLink:
     def serialized(self):
         return {"add": list(self.add), "remove": list(self.remove)}
 
+    def has_changes(self):
+        return len(self.add) > 0 or len(self.remove) > 0
+
+    def clear_changes(self):
+        # the links as they are now become the original (e.g. once saved)
+        self.original = (self.original - self.remove) | self.add
+        self.add = set()
+        self.remove = set()
+
     def linked(self, other):
         return other in ((self.original - self.remove) | self.add)
 
@@ -51,12 +62,310 @@ class DateTimeEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, o)
 
 
+# The JSON encoding is done by orjson when it is installed.  The values of
+# DateTimeEncoder are kept:  orjson writes dates, datetimes & times as
+# isoformat and calls DateTimeEncoder.default for Decimal & MatrixLink.  The
+# text differs from json only in form (compact separators & utf-8 rather
+# than \u escapes).  A document which orjson would write differently or not
+# at all is encoded by json (see _orjson_exact):  a non-finite float or
+# Decimal (orjson writes null for NaN), an aware datetime with seconds in its
+# UTC offset, a non-str dict key, an int beyond 64 bits or a value of any
+# other type (e.g. a uuid.UUID which json rejects).
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson != None:
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATACLASS
+    _orjson_default = DateTimeEncoder().default
+
+_EXACT_TYPES = {str, int, bool, type(None), datetime.date, datetime.time}
+_CONTAINER_TYPES = {dict, list, tuple}
+
+
+def _orjson_exact(thing):
+    """
+    Return True if orjson encodes thing as json with DateTimeEncoder does.
+    This walks the values of thing with-out recursion; nesting deeper than
+    orjson allows returns False.
+    """
+    isfinite = math.isfinite
+    stack = [(thing, 0)]
+    while len(stack) > 0:
+        value, depth = stack.pop()
+        tv = type(value)
+        if tv is dict:
+            values = value.values()
+        elif tv is list or tv is tuple:
+            values = value
+        else:
+            values = (value,)
+        for v in values:
+            tv = type(v)
+            if tv in _EXACT_TYPES:
+                continue
+            if tv is float:
+                if not isfinite(v):
+                    return False
+            elif tv in _CONTAINER_TYPES:
+                if depth >= 250:
+                    return False
+                stack.append((v, depth + 1))
+            elif tv is decimal.Decimal:
+                if not v.is_finite():
+                    return False
+            elif tv is datetime.datetime:
+                offset = v.utcoffset()
+                if offset != None and offset.seconds % 60 != 0:
+                    return False
+            elif tv is not MatrixLink:
+                return False
+    return True
+
+
+def _std_json_bytes(thing):
+    return json.dumps(thing, cls=DateTimeEncoder).encode("utf8")
+
+
+def _json_bytes(thing):
+    # the utf-8 JSON of thing as bytes
+    if orjson != None and _orjson_exact(thing):
+        try:
+            return orjson.dumps(thing, default=_orjson_default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass
+    return _std_json_bytes(thing)
+
+
 def serialize(thing, pprint=False):
     if pprint:
         return json.dumps(thing, cls=DateTimeEncoder, indent=4)
     else:
-        return json.dumps(thing, cls=DateTimeEncoder)
+        return _json_bytes(thing).decode("utf8")
 
 
 def to_json(thing):
-    return io.BytesIO(serialize(thing).encode("utf8"))
+    return io.BytesIO(_json_bytes(thing))
+
+
+def _json_chunks(thing, rows, separators):
+    comma, colon = separators
+    if isinstance(thing, dict) and all(isinstance(k, str) for k in thing):
+        yield b"{"
+        for index, (key, value) in enumerate(thing.items()):
+            yield (comma if index > 0 else b"") + _json_bytes(key) + colon
+            yield from _json_chunks(value, rows, separators)
+        yield b"}"
+    elif isinstance(thing, (list, tuple)) and len(thing) > rows:
+        yield b"["
+        for start in range(0, len(thing), rows):
+            batch = _json_bytes(list(thing[start : start + rows]))
+            yield (comma if start > 0 else b"") + batch[1:-1]
+        yield b"]"
+    else:
+        yield _json_bytes(thing)
+
+
+def to_json_stream(thing, rows=1024):
+    """
+    Yield the JSON of thing (as to_json) in utf-8 byte chunks.  Long lists
+    (e.g. the data of a table from as_writable) are encoded rows items at a
+    time so that the complete document is not held in memory, e.g.
+    httpx.post(url, content=to_json_stream(table.as_writable())).
+    """
+    separators = (b",", b":") if orjson != None else (b", ", b": ")
+    return _json_chunks(thing, rows, separators)
+
+
+# Compact wire formats
+#
+# An rtlib table is sent as JSON rows in which every row repeats every key.
+# The compact formats carry each table column-wise as one vector per column
+# (the "vectors" key replaces "data") in MessagePack or CBOR.  Cell values are
+# reduced to the same plain values as DateTimeEncoder produces for JSON so
+# that the client converts them identically.
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/vnd.rtlib.columnar+msgpack"
+CBOR_CONTENT_TYPE = "application/vnd.rtlib.columnar+cbor"
+
+_PLAIN_TYPES = (str, int, float, bool, type(None))
+_PLAINER = DateTimeEncoder()
+
+
+def _plain(v):
+    if isinstance(v, _PLAIN_TYPES):
+        return v
+    return _PLAINER.default(v)
+
+
+def _column_attr(c):
+    return c if isinstance(c, str) else c[0]
+
+
+def columnar(thing):
+    """
+    Return a copy of thing with each rtlib table (a dict with columns & data)
+    carried column-wise and all values reduced to plain types.
+    """
+    if isinstance(thing, dict):
+        if "columns" in thing and isinstance(thing.get("data"), list):
+            attrs = [_column_attr(c) for c in thing["columns"]]
+            rows = thing["data"]
+            if len(rows) > 0 and isinstance(rows[0], dict):
+                vectors = [[_plain(r.get(a)) for r in rows] for a in attrs]
+            else:
+                vectors = [[_plain(r[i]) for r in rows] for i in range(len(attrs))]
+            result = {k: columnar(v) for k, v in thing.items() if k != "data"}
+            result["vectors"] = vectors
+            result["length"] = len(rows)
+            return result
+        return {k: columnar(v) for k, v in thing.items()}
+    if isinstance(thing, (list, tuple)):
+        return [columnar(v) for v in thing]
+    return _plain(thing)
+
+
+def uncolumnar(thing, rows=list):
+    """
+    Invert :func:`columnar`.  Table rows are rebuilt as tuples in column
+    order and collected with the rows callable.
+    """
+    if isinstance(thing, dict):
+        if "columns" in thing and "vectors" in thing:
+            result = {
+                k: uncolumnar(v, rows)
+                for k, v in thing.items()
+                if k not in ("vectors", "length")
+            }
+            vectors = thing["vectors"]
+            if len(vectors) > 0:
+                result["data"] = rows(zip(*vectors))
+            else:
+                result["data"] = rows(() for _ in range(thing["length"]))
+            return result
+        return {k: uncolumnar(v, rows) for k, v in thing.items()}
+    if isinstance(thing, list):
+        return [uncolumnar(v, rows) for v in thing]
+    return thing
+
+
+def _msgpack_dumps(thing):
+    return msgpack.packb(columnar(thing), use_bin_type=True)
+
+
+def _msgpack_loads(content):
+    return msgpack.unpackb(content, raw=False, use_list=True)
+
+
+def _cbor_dumps(thing):
+    return cbor2.dumps(columnar(thing))
+
+
+def _cbor_loads(content):
+    return cbor2.loads(content)
+
+
+def wire_formats():
+    """
+    Return the compact content types which this installation can encode and
+    decode in order of preference.
+    """
+    types = []
+    if msgpack != None:
+        types.append(MSGPACK_CONTENT_TYPE)
+    if cbor2 != None:
+        types.append(CBOR_CONTENT_TYPE)
+    return types
+
+
+def _accepted(header):
+    # parse an Accept or Accept-Encoding header to {value: q}
+    accepted = {}
+    for part in (header or "").split(","):
+        value, *params = [x.strip() for x in part.split(";")]
+        if value == "":
+            continue
+        q = 1.0
+        for p in params:
+            if p.startswith("q="):
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[value.lower()] = q
+    return accepted
+
+
+def negotiate(accept):
+    """
+    Choose a content type for a response to a request with the given Accept
+    header.  This is JSON unless a compact format available here is
+    preferred by the client.
+    """
+    accepted = _accepted(accept)
+    best, best_q = JSON_CONTENT_TYPE, accepted.get(JSON_CONTENT_TYPE, 0.001)
+    for ctype in wire_formats():
+        q = accepted.get(ctype, 0.0)
+        if q > best_q:
+            best, best_q = ctype, q
+    return best
+
+
+def serialize_wire(thing, content_type):
+    """
+    Encode thing for the content type returned by :func:`negotiate`.
+    """
+    if content_type == MSGPACK_CONTENT_TYPE:
+        return _msgpack_dumps(thing)
+    if content_type == CBOR_CONTENT_TYPE:
+        return _cbor_dumps(thing)
+    return _json_bytes(thing)
+
+
+def deserialize_wire(content, content_type, rows=list):
+    """
+    Decode a response body of the given content type; compact tables are
+    returned with tuple rows (see :func:`uncolumnar`).  Return None for a
+    content type which is not a compact wire format.
+    """
+    ctype = (content_type or "").split(";")[0].strip().lower()
+    if ctype == MSGPACK_CONTENT_TYPE and msgpack != None:
+        return uncolumnar(_msgpack_loads(content), rows)
+    if ctype == CBOR_CONTENT_TYPE and cbor2 != None:
+        return uncolumnar(_cbor_loads(content), rows)
+    return None
+
+
+def compress_body(body, accept_encoding, minimum=1024):
+    """
+    Compress a response body for the client's Accept-Encoding preferring
+    zstd (when zstandard is installed) over gzip.  Return the pair
+    (content_encoding, body) where content_encoding is None for an
+    uncompressed body.
+    """
+    if len(body) < minimum:
+        return None, body
+    accepted = _accepted(accept_encoding)
+    if zstandard != None and accepted.get("zstd", 0.0) > 0:
+        return "zstd", zstandard.ZstdCompressor(level=3).compress(body)
+    if accepted.get("gzip", 0.0) > 0:
+        return "gzip", gzip.compress(body, compresslevel=6)
+    return None, body
@@ -0,0 +1,66 @@
+import pytest
+import rtlib
+
+COLUMNS = [
+    ("id", {"type": "integer", "primary_key": True}),
+    ("name", {}),
+    ("links", {"type": "matrix"}),
+]
+
+
+def sample_rows(count):
+    return [{"id": i, "name": f"n{i}", "links": [1, 2]} for i in range(count)]
+
+
+def dirty_ids(table):
+    return [r.id for r in table.dirty_rows()]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_dirty_rows(lazy):
+    table = rtlib.ClientTable(COLUMNS, sample_rows(5), lazy=lazy, track_changes=True)
+    assert dirty_ids(table) == []
+
+    table.rows[1].name = "changed"
+    table.rows[3].links.toggle_linked(3, True)
+    with table.adding_row() as row:
+        row.id = 9
+    assert dirty_ids(table) == [1, 3, 9]
+
+    writable = table.as_writable(only_dirty=True)
+    assert [d["id"] for d in writable["data"]] == [1, 3, 9]
+    assert writable["data"][1]["links"].serialized() == {"add": [3], "remove": []}
+
+    table.recorded_delete(table.rows[0])
+    assert table.as_writable(only_dirty=True)["deleted"] == [[0]]
+
+    table.mark_clean()
+    assert dirty_ids(table) == []
+    # the row of id 3 (now third) keeps its saved link
+    assert table.rows[2].links.linked(3)
+    assert table.as_writable(only_dirty=True) == {
+        "columns": ["id", "name", "links"],
+        "data": [],
+    }
+
+
+def test_without_tracking_all_rows_are_dirty():
+    table = rtlib.ClientTable(COLUMNS, sample_rows(3))
+    assert dirty_ids(table) == [0, 1, 2]
+    assert len(table.as_writable(only_dirty=True)["data"]) == 3
+
+
+def test_lazy_mark_clean_snapshots_later_rows():
+    table = rtlib.ClientTable(COLUMNS, sample_rows(10000), lazy=True)
+    table.rows[0].name = "changed"
+    table.mark_clean()
+    assert table.rows.built_count() < len(table.rows)
+    # rows built after mark_clean are clean until changed
+    table.rows[-1].name = "changed"
+    assert dirty_ids(table) == [9999]
+
+
+def test_columnar_does_not_track():
+    table = rtlib.ClientTable(COLUMNS[:2], sample_rows(3), columnar=True)
+    with pytest.raises(ValueError):
+        table.mark_clean()
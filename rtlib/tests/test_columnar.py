@@ -0,0 +1,176 @@
+import decimal
+import datetime
+import pytest
+import rtlib
+from rtlib import columnar
+
+BIG = 2**70
+
+
+def vector_of(values, bulk):
+    vector = columnar.ColumnVector()
+    if bulk:
+        vector.extend(values)
+    else:
+        for value in values:
+            vector.append(value)
+    return vector
+
+
+def read_back(vector):
+    return [vector.get(i) for i in range(len(vector))]
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+@pytest.mark.parametrize(
+    "values, kind",
+    [
+        ([1, None, -(2**63), 2**63 - 1], columnar.INT),
+        ([1.5, None, 2.0], columnar.FLOAT),
+        ([True, None, False], columnar.BOOL),
+        ([datetime.date(2021, 3, 1), None], columnar.DATE),
+        (["a", None, "b", "a"], columnar.STR),
+        ([None, None], columnar.EMPTY),
+        # values which would not read back exactly from one array
+        ([1, 2.0], columnar.OBJECT),
+        ([True, 1], columnar.OBJECT),
+        ([datetime.date(2021, 3, 1), datetime.datetime(2021, 3, 1)], columnar.OBJECT),
+        ([decimal.Decimal("1.10"), None], columnar.OBJECT),
+        ([1, BIG, None], columnar.OBJECT),
+        ([-BIG, 1], columnar.OBJECT),
+    ],
+)
+def test_vector_reads_back(values, kind, bulk):
+    vector = vector_of(values, bulk)
+    assert vector.kind == kind
+    assert read_back(vector) == values
+    assert [type(v) for v in read_back(vector)] == [type(v) for v in values]
+
+
+def test_vector_extend_after_kind():
+    vector = vector_of([None, None], bulk=True)
+    vector.extend([1, None])
+    vector.extend([None, 2])
+    assert vector.kind == columnar.INT
+    assert read_back(vector) == [None, None, 1, None, None, 2]
+    # a bulk extend which overflows keeps the earlier values
+    vector.extend([3, BIG])
+    assert vector.kind == columnar.OBJECT
+    assert read_back(vector) == [None, None, 1, None, None, 2, 3, BIG]
+
+
+def test_vector_set():
+    vector = vector_of([1, 2, 3], bulk=True)
+    vector.set(0, None)
+    vector.set(1, 5)
+    assert read_back(vector) == [None, 5, 3]
+    vector.set(2, BIG)
+    assert read_back(vector) == [None, 5, BIG]
+    with pytest.raises(IndexError):
+        vector.set(3, 1)
+
+    strings = vector_of([None, "a"], bulk=True)
+    strings.set(0, "b")
+    strings.set(1, None)
+    assert read_back(strings) == ["b", None]
+
+    empty = vector_of([None, None], bulk=False)
+    empty.set(1, 4.5)
+    assert empty.kind == columnar.FLOAT
+    assert read_back(empty) == [None, 4.5]
+
+
+COLUMNS = [("id", {"type": "integer"}), ("name", {})]
+
+
+def columnar_table(count):
+    rows = [{"id": i, "name": f"n{i % 3}"} for i in range(count)]
+    return rtlib.ClientTable(COLUMNS, rows, columnar=True)
+
+
+def ids(table):
+    return [r.id for r in table.rows]
+
+
+def test_rows_identity_and_writes():
+    table = columnar_table(5)
+    row = table.rows[2]
+    assert table.rows[2] is row
+    row.name = None
+    row.id = BIG
+    assert table.rows[2]._as_tuple() == (BIG, None)
+    assert table.rows.index(row) == 2 and row in table.rows
+
+
+def test_rows_slices():
+    table = columnar_table(6)
+    rows = table.rows
+    assert [r.id for r in rows[1:4]] == [1, 2, 3]
+    assert [r.id for r in rows[::-2]] == [5, 3, 1]
+
+    rows[0:2] = [rows[4], rows[5]]
+    assert ids(table) == [4, 5, 2, 3, 4, 5]
+    del rows[-2:]
+    assert ids(table) == [4, 5, 2, 3]
+    rows.insert(1, rows[3])
+    assert ids(table) == [4, 3, 5, 2, 3]
+
+
+def test_rows_sort():
+    table = columnar_table(5)
+    table.rows.sort(key=lambda r: (r.name, -r.id))
+    assert ids(table) == [3, 0, 4, 1, 2]
+    table.rows.sort(key=lambda r: r.id, reverse=True)
+    assert ids(table) == [4, 3, 2, 1, 0]
+
+
+def test_adopted_rows():
+    table = columnar_table(3)
+    with table.adding_row() as row:
+        row.id = 7
+        row.name = "new"
+    assert table.rows[-1] is row
+    assert table.rows.index(row) == 3 and row in table.rows
+    # an adopted row keeps its values on itself and may be moved
+    table.rows.sort(key=lambda r: -r.id)
+    assert ids(table) == [7, 2, 1, 0]
+    assert table.rows[0] is row
+    assert table.rows.store.row_values(3) == (None, None)
+    other = columnar_table(1).rows[0]
+    assert other not in table.rows
+
+
+def report_table(count):
+    columns = [
+        ("tid", {"type": "integer"}),
+        ("trandate", {"type": "date"}),
+        ("memo", {}),
+        ("debit", {"type": "currency_usd"}),
+        ("reconciled", {"type": "boolean"}),
+        ("stamp", {"type": "datetime"}),
+    ]
+    data = [
+        {
+            "tid": i,
+            "trandate": f"2021-{i % 12 + 1:02}-{i % 28 + 1:02}",
+            "memo": None if i % 3 else f"memo {i % 7}",
+            "debit": f"{i * 7}.{i % 100:02}" if i % 2 else None,
+            "reconciled": i % 5 == 0,
+            "stamp": f"2021-03-14T{i % 24:02}:30:00",
+        }
+        for i in range(count)
+    ]
+    return {"columns": columns, "data": data}
+
+
+def test_same_as_plain_table():
+    payload = report_table(500)
+    plain = rtlib.ClientTable(payload["columns"], payload["data"])
+    table = rtlib.ClientTable(payload["columns"], payload["data"], columnar=True)
+    assert len(table.rows) == len(plain.rows)
+    assert [r._as_tuple() for r in table.rows] == [r._as_tuple() for r in plain.rows]
+    assert [r._as_dict() for r in table.rows[:5]] == [
+        r._as_dict() for r in plain.rows[:5]
+    ]
+    assert table.as_writable() == plain.as_writable()
+    assert repr(table.rows[3]) == repr(plain.rows[3])
@@ -0,0 +1,76 @@
+import decimal
+import datetime
+import xml.etree.ElementTree as ET
+import rtlib
+import rtlib.html as html
+
+
+def element_tree_table(columns, rows, tid=None, tclass=None, **kwargs):
+    # styled_html_table as written with ElementTree before iter_html_table
+    attrs = {}
+    if tid != None:
+        attrs["id"] = tid
+    if tclass != None:
+        attrs["class"] = tclass
+    attrs.update({k: str(v) for k, v in kwargs.items()})
+    return ET.tostring(html.html_table(columns, rows, **attrs), method="html")
+
+
+def sample_table():
+    columns = [
+        ("tid", {"type": "integer", "label": "Id <#>", "alignment": "right"}),
+        ("trandate", {"type": "date", "label": "Date"}),
+        ("debit", {"type": "currency_usd", "label": "Debit & Fee"}),
+        ("memo", {"label": 'Memo "quoted"'}),
+        ("notes", {"type": "multiline", "label": "Notes"}),
+        ("body", {"type": "html", "label": "Body"}),
+        ("reconciled", {"type": "boolean", "label": "Rec"}),
+        (
+            "payee",
+            {
+                "label": "Payee",
+                "url_factory": lambda v: f"lms:payee?name={v}&x=<1>",
+                "url_new_window": True,
+            },
+        ),
+        ("account", {"label": "Account", "url_factory": lambda v: f'acc/"{v}"'}),
+    ]
+    rows = []
+    for i in range(600):
+        rows.append(
+            {
+                "tid": i if i % 7 else None,
+                "trandate": datetime.date(2024, 1, 1) + datetime.timedelta(days=i),
+                "debit": decimal.Decimal(i * 37) / 100 if i % 3 else None,
+                "memo": ["", "a < b & c > d", 'say "hi"', "café — ok", None][i % 5],
+                "notes": ["line 1\nline <2> & 3", None, "single"][i % 3],
+                "body": ["<b>bold</b> &amp; plain", None][i % 2],
+                "reconciled": [True, False, None][i % 3],
+                "payee": [" Payee & Sons ", None, "Café"][i % 3],
+                "account": ["4000 <Sales>", None][i % 2],
+            }
+        )
+    return rtlib.ClientTable(columns, rows)
+
+
+def test_streaming_matches_element_tree():
+    table = sample_table()
+    expected = element_tree_table(
+        table.columns, table.rows, tid="t&1", tclass='x"y', border=1
+    )
+    actual = html.styled_html_table(
+        table.columns, table.rows, tid="t&1", tclass='x"y', border=1
+    )
+    assert actual == expected
+
+    pieces = list(html.iter_html_table(table.columns, table.rows, chunk=64))
+    assert len(pieces) > 2
+    expected = element_tree_table(table.columns, table.rows)
+    assert "".join(pieces).encode("us-ascii", "xmlcharrefreplace") == expected
+
+
+def test_streaming_empty_table():
+    table = sample_table()
+    assert html.styled_html_table(table.columns, []) == element_tree_table(
+        table.columns, []
+    )
@@ -0,0 +1,89 @@
+import pytest
+import rtlib
+
+COLUMNS = [("id", {"type": "integer", "primary_key": True}), ("name", {})]
+
+
+def table_of(*ids, lazy=False):
+    rows = [{"id": i, "name": f"n{i}"} for i in ids]
+    return rtlib.ClientTable(COLUMNS, rows, lazy=lazy)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_key_index(lazy):
+    table = table_of(1, 2, 3, 2, lazy=lazy)
+    index = table.key_index()
+    assert sorted(index) == [1, 2, 3]
+    # a repeated key maps to the first row of it
+    assert index[2] is table.rows[1]
+    assert table.key_index("name")["n3"] is table.rows[2]
+    assert table.get_by_key(4, "none") == "none"
+
+
+def test_get_by_key_after_insert_and_delete():
+    table = table_of(1, 2, 3)
+    assert table.get_by_key(1).name == "n1"
+    # the number of rows is unchanged
+    del table.rows[0]
+    table.rows.append(table_of(4).rows[0])
+    assert table.get_by_key(1) == None
+    assert table.get_by_key(4) is table.rows[2]
+    assert table.get_by_key(2) is table.rows[0]
+
+    table.rows[0].id = 9
+    assert table.get_by_key(2) == None
+    assert table.get_by_key(9) is table.rows[0]
+
+
+def test_bulk_delete():
+    table = table_of(1, 2, 3, 4)
+    removed = table.bulk_delete(rows=[table.rows[0]], keys=[3, 7])
+    assert [r.id for r in removed] == [1, 3]
+    assert [r.id for r in table.rows] == [2, 4]
+    assert table.get_by_key(3) == None
+    assert table.as_writable()["deleted"] == [[1], [3]]
+    assert table.bulk_delete(keys=[7]) == []
+
+
+def test_merge():
+    table = table_of(1, 2, 3)
+    kept = table.rows[1]
+    with table.adding_row() as row:
+        row.name = "unsaved"
+
+    other = table_of(2, 4, 2, 4)
+    other.rows[0].name = "changed"
+    added, changed, removed = table.merge(other)
+
+    assert [r.id for r in table.rows] == [2, 4, None]
+    assert table.rows[0] is kept and kept.name == "changed"
+    assert [r.id for r in added] == [4]
+    assert changed == [kept]
+    assert [r.id for r in removed] == [1, 3]
+    assert table.get_by_key(4) is table.rows[1]
+
+
+def test_merge_keep_missing():
+    table = table_of(1, 2)
+    table.merge(table_of(2, 3), remove_missing=False)
+    assert [r.id for r in table.rows] == [2, 3, 1]
+
+
+def test_get_by_key_miss_keeps_index():
+    table = table_of(*range(100))
+    table.key_index()
+    cached = table._key_indexes[("id",)]
+    for key in range(100, 200):
+        assert table.get_by_key(key) == None
+    assert table._key_indexes[("id",)] is cached
+
+    # rows added change the number of rows
+    with table.adding_row() as row:
+        row.id = 150
+    assert table.get_by_key(150) is row
+
+    # a key changed in place with-out a lookup of the old one
+    table.rows[0].id = 500
+    assert table.get_by_key(500) == None
+    table.reindex()
+    assert table.get_by_key(500) is table.rows[0]
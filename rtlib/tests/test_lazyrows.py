@@ -0,0 +1,132 @@
+import pytest
+import rtlib
+from rtlib.lazyrows import LazyRows
+
+
+class Row:
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return f"Row({self.value})"
+
+
+def lazy(count, chunk=10):
+    built = []
+
+    def build(block):
+        built.append(list(block))
+        return [Row(v) for v in block]
+
+    return LazyRows(range(count), build, chunk=chunk), built
+
+
+def values(rows):
+    return [r.value for r in rows]
+
+
+def test_index_builds_its_chunk():
+    rows, built = lazy(35)
+    assert rows.built_count() == 0
+    row = rows[12]
+    assert row.value == 12 and rows[12] is row
+    assert built == [list(range(10, 20))]
+    assert rows.built_count() == 10
+    assert values(rows.built()) == list(range(10, 20))
+
+
+def test_negative_index():
+    rows, built = lazy(35)
+    assert rows[-1].value == 34
+    assert built == [list(range(30, 35))]
+    assert rows[-35].value == 0
+    with pytest.raises(IndexError):
+        rows[-36]
+    with pytest.raises(IndexError):
+        rows[35]
+
+
+def test_slices():
+    rows, built = lazy(35)
+    assert values(rows[8:12]) == [8, 9, 10, 11]
+    # only the positions of the slice are built
+    assert built == [[8, 9, 10, 11]]
+    assert values(rows[-3:]) == [32, 33, 34]
+    assert values(rows[30:20:-4]) == [30, 26, 22]
+    assert rows[20:10] == []
+    assert rows.built_count() == 4 + 3 + 9
+
+
+def test_slice_assignment():
+    rows, built = lazy(35)
+    new = [Row("a"), Row("b")]
+    rows[5:8] = new
+    assert len(rows) == 34
+    assert values(rows[4:8]) == [4, "a", "b", 8]
+    assert rows[5] is new[0]
+    rows[::10] = [Row("x")] * 4
+    assert values(rows[::10]) == ["x"] * 4
+    assert values(list(rows)) == [
+        "x", 1, 2, 3, 4, "a", "b", 8, 9, 10,
+        "x", 12, 13, 14, 15, 16, 17, 18, 19, 20,
+        "x", 22, 23, 24, 25, 26, 27, 28, 29, 30,
+        "x", 32, 33, 34,
+    ]  # fmt: skip
+    assert rows.built_count() == len(rows)
+
+
+def test_insert_and_del_unbuilt():
+    rows, built = lazy(30)
+    added = Row("new")
+    rows.insert(15, added)
+    assert len(rows) == 31 and rows.built_count() == 1
+    assert rows[15] is added
+    assert rows.index(added) == 15 and added in rows
+
+    del rows[0]
+    del rows[20:25]
+    assert len(rows) == 25
+    assert rows.built_count() == 1
+    # the rows after the insert & deletes are those expected
+    assert rows[14] is added
+    assert values(list(rows)) == (
+        list(range(1, 15)) + ["new"] + list(range(15, 20)) + list(range(25, 30))
+    )
+    assert rows.built_count() == 25
+
+
+def test_set_and_del_bookkeeping():
+    rows, built = lazy(20)
+    rows[3] = Row("set")
+    assert rows.built_count() == 1
+    rows[3] = Row("again")
+    assert rows.built_count() == 1
+    rows[4]
+    del rows[3]
+    del rows[-1]
+    assert rows.built_count() == 9
+    rows.materialize()
+    assert rows.built_count() == len(rows) == 18
+    # every source row left was built once
+    assert sorted(v for block in built for v in block) == sorted(
+        set(range(20)) - {3, 19}
+    )
+
+
+def test_sort_and_reverse_build_all():
+    rows, built = lazy(25)
+    rows.reverse()
+    assert rows.built_count() == 25
+    assert values(rows[:3]) == [24, 23, 22]
+    rows.sort(key=lambda r: r.value % 5)
+    assert values(rows[:5]) == [20, 15, 10, 5, 0]
+
+
+def test_lazy_client_table():
+    columns = [("id", {"type": "integer"}), ("name", {})]
+    data = [{"id": i, "name": f"n{i}"} for i in range(3000)]
+    plain = rtlib.ClientTable(columns, data)
+    table = rtlib.ClientTable(columns, data, lazy=True)
+    assert table.rows[-1]._as_tuple() == (2999, "n2999")
+    assert table.rows.built_count() < 3000
+    assert [r._as_tuple() for r in table.rows] == [r._as_tuple() for r in plain.rows]
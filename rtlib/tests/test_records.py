@@ -0,0 +1,32 @@
+import pytest
+import rtlib
+
+
+@pytest.mark.parametrize("members", [[], ["a"], ["a", "b"]])
+def test_record_methods(members):
+    Record = rtlib.fixedrecord("Record", members)
+    values = tuple(range(len(members)))
+    row = Record._make(values)
+    assert row._as_tuple() == values
+    assert row._as_dict() == dict(zip(members, values))
+    assert Record._from_dict(row._as_dict())._as_tuple() == values
+    assert Record(*values)._as_tuple() == values
+
+
+def test_table_of_no_columns():
+    table = rtlib.ClientTable([], [{}, {}])
+    assert [r._as_tuple() for r in table.rows] == [(), ()]
+    assert table.as_writable() == {"columns": [], "data": [{}, {}]}
+    assert rtlib.ClientTable([], []).rows == []
+
+
+class UpperTable(rtlib.ClientTable):
+    # a subclass of the per row converter only
+    def converter(self, row_field_list):
+        return lambda row: tuple(row[c[0]].upper() for c in row_field_list)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_row_converter_of_subclass(lazy):
+    table = UpperTable([("name", {})], [{"name": "a"}, {"name": "b"}], lazy=lazy)
+    assert [r.name for r in table.rows] == ["A", "B"]
@@ -0,0 +1,90 @@
+import time
+import datetime
+import zoneinfo
+import pytest
+from rtlib import timezones
+
+dt = datetime.datetime
+
+
+def local_tz(monkeypatch, tz):
+    monkeypatch.setenv("TZ", tz)
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.fixture
+def posix_tz(monkeypatch):
+    # US eastern by a POSIX rule rather than a zoneinfo key
+    yield from local_tz(monkeypatch, "EST+5EDT,M3.2.0/2,M11.1.0/2")
+
+
+@pytest.fixture
+def chicago_tz(monkeypatch):
+    yield from local_tz(monkeypatch, "America/Chicago")
+
+
+# UTC & the local time of America/New_York either side of the changes in 2021
+EASTERN = [
+    (dt(2021, 3, 14, 6, 59), dt(2021, 3, 14, 1, 59)),
+    (dt(2021, 3, 14, 7, 0), dt(2021, 3, 14, 3, 0)),
+    (dt(2021, 7, 1, 12, 0), dt(2021, 7, 1, 8, 0)),
+    (dt(2021, 11, 7, 5, 59), dt(2021, 11, 7, 1, 59)),
+    (dt(2021, 11, 7, 6, 0), dt(2021, 11, 7, 1, 0)),
+    (dt(2021, 12, 1, 12, 0), dt(2021, 12, 1, 7, 0)),
+]
+
+
+def test_dst_changes():
+    converter = timezones.LocalTimeConverter(zoneinfo.ZoneInfo("America/New_York"))
+    utc = [u for u, _ in EASTERN]
+    assert converter.convert(utc + [None]) == [l for _, l in EASTERN] + [None]
+    # again from the cached offsets
+    assert converter.convert(utc) == [l for _, l in EASTERN]
+
+
+def test_change_off_the_hour():
+    # Lord Howe Island moves its clocks half an hour at 15:30 UTC
+    converter = timezones.LocalTimeConverter(zoneinfo.ZoneInfo("Australia/Lord_Howe"))
+    utc = [dt(2021, 10, 2, 15, 0), dt(2021, 10, 2, 15, 29), dt(2021, 10, 2, 15, 30)]
+    assert converter.convert(utc) == [
+        dt(2021, 10, 3, 1, 30),
+        dt(2021, 10, 3, 1, 59),
+        dt(2021, 10, 3, 2, 30),
+    ]
+
+
+def test_posix_tz_uses_localtime(posix_tz):
+    assert timezones.local_zone() == None
+    converter = timezones.local_time_converter()
+    assert converter.zone == None
+    utc = [u for u, _ in EASTERN]
+    assert converter.convert(utc) == [l for _, l in EASTERN]
+
+
+def test_local_zone(chicago_tz):
+    assert timezones.local_zone() == zoneinfo.ZoneInfo("America/Chicago")
+    converter = timezones.local_time_converter()
+    assert converter.convert([dt(2021, 7, 1, 12, 0)]) == [dt(2021, 7, 1, 7, 0)]
+
+
+def test_localtime_out_of_range(posix_tz, monkeypatch):
+    localtime = time.localtime
+
+    def windows_localtime(seconds):
+        # the time.localtime of Windows refuses times before 1970
+        if seconds < 0:
+            raise OSError(22, "Invalid argument")
+        return localtime(seconds)
+
+    monkeypatch.setattr(time, "localtime", windows_localtime)
+    converter = timezones.LocalTimeConverter()
+    utc = [dt(1969, 7, 1, 12, 0), dt(1969, 12, 1, 12, 0), dt(2021, 7, 1, 12, 0)]
+    # the standard offset before 1970
+    assert converter.convert(utc) == [
+        dt(1969, 7, 1, 7, 0),
+        dt(1969, 12, 1, 7, 0),
+        dt(2021, 7, 1, 8, 0),
+    ]
@@ -0,0 +1,112 @@
+import os
+import time
+import datetime
+import threading
+import tzlocal
+
+UTC = datetime.timezone.utc
+EPOCH = datetime.datetime(1970, 1, 1)
+HOUR = datetime.timedelta(hours=1)
+
+
+def local_zone():
+    """
+    Return the tzinfo of local time as tzlocal finds it (the TZ environment
+    variable, the system settings or the Windows time zone) or None if it is
+    not known as a zoneinfo key (e.g. a POSIX rule such as
+    TZ=EST5EDT,M3.2.0,M11.1.0).  With None the offsets are taken from
+    time.localtime.
+    """
+    try:
+        # not the zone cached by tzlocal; TZ may have changed since
+        return tzlocal.reload_localzone()
+    except (LookupError, ValueError, OSError):
+        return None
+
+
+class LocalTimeConverter:
+    """
+    Convert naive UTC datetimes to naive datetimes of zone (a tzinfo or None
+    for the local time of time.localtime) by the UTC offset in effect at
+    each moment; datetimes on either side of a daylight saving change each
+    get their own offset.
+
+    The offset is looked up once per UTC hour and cached.  An hour in which
+    the offset changes (a transition off the hour) is not cached and each
+    datetime in it is converted by itself.
+    """
+
+    CACHE_SIZE = 200000
+
+    def __init__(self, zone=None):
+        self.zone = zone
+        self._offsets = {}
+
+    def offset(self, utc):
+        if self.zone == None:
+            seconds = (utc - EPOCH).total_seconds()
+            try:
+                local = time.localtime(seconds)
+            except (OverflowError, OSError, ValueError):
+                # out of the range of the platform (e.g. before 1970 on
+                # Windows); take the standard offset rather than none
+                return datetime.timedelta(seconds=-time.timezone)
+            return datetime.timedelta(seconds=local.tm_gmtoff)
+        return utc.replace(tzinfo=UTC).astimezone(self.zone).utcoffset()
+
+    def _hour_offset(self, key):
+        hour = datetime.datetime.fromordinal(key // 24) + HOUR * (key % 24)
+        try:
+            start = self.offset(hour)
+            end = self.offset(hour + HOUR - datetime.timedelta(microseconds=1))
+        except (OverflowError, OSError, ValueError):
+            # out of the range of the platform (e.g. datetime.max)
+            return None
+        return start if start == end else None
+
+    def _exact(self, utc):
+        try:
+            return utc + self.offset(utc)
+        except (OverflowError, OSError, ValueError):
+            return utc
+
+    def convert(self, values):
+        """
+        Return a list of the datetimes of values converted; None is kept.
+        """
+        offsets = self._offsets
+        if len(offsets) > self.CACHE_SIZE:
+            offsets.clear()
+        # the UTC hour as an integer is much quicker than truncating
+        keys = [None if v is None else v.toordinal() * 24 + v.hour for v in values]
+        for key in set(keys).difference(offsets):
+            if key != None:
+                offsets[key] = self._hour_offset(key)
+
+        result = []
+        for v, key in zip(values, keys):
+            if key is None:
+                result.append(None)
+                continue
+            # another thread may have cleared offsets; None is always correct
+            offset = offsets.get(key)
+            result.append(self._exact(v) if offset is None else v + offset)
+        return result
+
+
+_converters = {}
+_converters_lock = threading.Lock()
+
+
+def local_time_converter():
+    """
+    Return the LocalTimeConverter of the current local zone.  It is shared so
+    that its cached offsets serve all tables.
+    """
+    key = (os.environ.get("TZ"), time.tzname, time.timezone)
+    with _converters_lock:
+        converter = _converters.get(key)
+        if converter == None:
+            converter = LocalTimeConverter(local_zone())
+            _converters[key] = converter
+        return converter
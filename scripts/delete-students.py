@@ -12,9 +12,13 @@ def delete_personas_by_tag(session, tagname):
 
     personas = mycli.get("api/personas/list", tag_id=tag_id)
 
-    for persona in personas.main_table().rows:
+    rows = personas.main_table().rows
+    for persona in rows:
         print("delete -- ", persona)
-        mycli.delete(f"api/persona/{persona.id}")
+    results = mycli.map([("delete", "api/persona/{}", persona.id) for persona in rows])
+    for persona, result in zip(rows, results):
+        if not result.ok:
+            print(f"failed -- {persona.id}:  {result.error}")
 
 
 if __name__ == "__main__":
@@ -25,7 +25,16 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     localconfig.set_identity(args.profile)
-    session = climod.auto_session(args.server_url)
+    session = climod.auto_session(
+        args.server_url, metadata_store=True, http2=True, prewarm=True
+    )
+    session.enable_response_cache(
+        ttl_rules=[
+            (r"/poll-changes$", None),
+            (r"^api/static_settings$", 15 * 60),
+            (r"^api/tags/list$", 60),
+        ]
+    )
 
     launch = True
     if platform.system() != "Windows":
@@ -67,3 +67,4 @@ def replicate_init():
     import cliplugs.finance  # noqa: F401
     import cliplugs.contacts  # noqa: F401
     import cliplugs.roscoe  # noqa: F401
+    import cliplugs.diagnostics  # noqa: F401
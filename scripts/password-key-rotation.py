@@ -3,26 +3,66 @@ import client
 import localconfig
 
 
-def password_key_rotation(session):
+def password_key_rotation(session, parallelism=16):
     mycli = session.std_client()
 
     bits = mycli.get("api/personas/all-bits", bit_type="urls")
+    recs = bits.named_table("contacts").rows
 
-    def get_password(rec):
-        passbit1 = mycli.get(
-            "api/persona/{}/bit/{}", rec.persona_id, rec.id, bit_type="urls"
-        )
+    def progress(done, total):
+        print(f"\r{done}/{total}", end="", flush=True)
 
-        return passbit1.named_table("bit").rows[0].password
+    def get_passwords():
+        specs = [
+            (
+                "get",
+                "api/persona/{}/bit/{}",
+                rec.persona_id,
+                rec.id,
+                {"bit_type": "urls"},
+            )
+            for rec in recs
+        ]
+        results = mycli.map(specs, parallelism=parallelism, progress=progress)
+        print()
+        return [
+            r.value.named_table("bit").rows[0].password if r.ok else r.error
+            for r in results
+        ]
 
-    for rec in bits.named_table("contacts").rows:
-        pass1 = get_password(rec)
+    def report(failed, message):
+        for rec, error in failed:
+            print(f"bit {rec.id} of persona {rec.persona_id}:  {error}")
+        # not an assert which python -O would skip
+        if len(failed) > 0:
+            raise RuntimeError(message)
 
-        mycli.put("api/persona/{}/bit/{}/rotate", rec.persona_id, rec.id)
+    passes1 = get_passwords()
+    # nothing is rotated unless every password can be compared afterwards
+    unread = [
+        (rec, pass1)
+        for rec, pass1 in zip(recs, passes1)
+        if isinstance(pass1, Exception)
+    ]
+    report(unread, "Passwords could not be read; nothing was rotated")
 
-        pass2 = get_password(rec)
+    specs = [
+        ("put", "api/persona/{}/bit/{}/rotate", rec.persona_id, rec.id) for rec in recs
+    ]
+    rotated = mycli.map(specs, parallelism=parallelism, progress=progress)
+    print()
 
-        assert pass1 == pass2, "Key rotation failed"
+    passes2 = get_passwords()
+
+    failed = []
+    for rec, pass1, rot, pass2 in zip(recs, passes1, rotated, passes2):
+        errors = [e for e in (rot.error, pass2) if isinstance(e, Exception)]
+        if len(errors) > 0:
+            failed.append((rec, errors[0]))
+        elif pass1 != pass2:
+            failed.append((rec, "password changed by rotation"))
+
+    report(failed, "Key rotation failed")
 
 
 if __name__ == "__main__":